@@ -0,0 +1,54 @@
+#! /usr/bin/env python3
+
+"""Measures how long Game.fork takes, on a new game and on a game near its end"""
+
+import os, sys, argparse
+import copy
+import random
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pycatan
+from pycatan.card import ResCard
+
+# builds as much as possible for every player, to get a board like one near the end of a game
+def fill_game(game, turns):
+    for p in game.players:
+        p.add_cards([ResCard.Wood, ResCard.Brick, ResCard.Sheep, ResCard.Wheat] * 10)
+    for i in range(turns):
+        player = game.players[i % len(game.players)]
+        roads = player.get_available_roads()
+        if roads:
+            road = random.choice(roads)
+            game.add_road(player, road[0], road[1])
+        settlements = player.get_available_settlements()
+        if settlements and player.get_buildings():
+            game.add_settlement(player, random.choice(settlements))
+        elif settlements:
+            game.add_settlement(player, random.choice(settlements), True)
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--forks", type=int, default=2000, help="Number of forks per repeat")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Number of repeats, the best one is shown")
+    parser.add_argument("-s", "--seed", type=int, default=1)
+    args = parser.parse_args(argv[1:])
+
+    random.seed(args.seed)
+    game = pycatan.Game()
+    best = min(timeit.repeat(game.fork, number=args.forks, repeat=args.repeat))
+    print("fork, new game:   %8.1f us" % (best / args.forks * 1e6))
+
+    fill_game(game, 45)
+    print("(%d roads, %d buildings)" % (len(game.board.roads), len(game.board.get_buildings())))
+    best = min(timeit.repeat(game.fork, number=args.forks, repeat=args.repeat))
+    print("fork, late game:  %8.1f us" % (best / args.forks * 1e6))
+
+    # for comparison
+    number = max(1, args.forks // 50)
+    best = min(timeit.repeat(lambda: copy.deepcopy(game), number=number, repeat=args.repeat))
+    print("deepcopy, late game: %8.1f us" % (best / number * 1e6))
+
+if __name__ == "__main__":
+    main(sys.argv)
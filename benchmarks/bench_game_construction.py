@@ -0,0 +1,22 @@
+#! /usr/bin/env python3
+
+"""Measures how long it takes to make a new Game"""
+
+import os, sys, argparse
+import timeit
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pycatan
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--games", type=int, default=2000, help="Number of games to make per repeat")
+    parser.add_argument("-r", "--repeat", type=int, default=5, help="Number of repeats, the best one is shown")
+    args = parser.parse_args(argv[1:])
+
+    best = min(timeit.repeat(pycatan.Game, number=args.games, repeat=args.repeat))
+    print("Game(): %8.1f us" % (best / args.games * 1e6))
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,73 @@
+#! /usr/bin/env python3
+
+"""Measures the per-build latency of the longest road engine on random 15 road networks"""
+
+import os, sys, time, argparse
+import gc
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pycatan
+
+# the exhaustive search Player.get_longest_road used to do, copying the road list at every step
+def exhaustive_longest(roads, road, all_roads, length, best):
+    for p in (road.point_one, road.point_two):
+        connected = [r for r in all_roads if r.point_one == p or r.point_two == p]
+        if len(connected) == 0:
+            best[0] = max(best[0], length)
+        for c in connected:
+            if all_roads.count(c) > 0:
+                c_roads = all_roads[:]
+                del c_roads[c_roads.index(c)]
+                exhaustive_longest(roads, c, c_roads, length + 1, best)
+
+def percentile(times, p):
+    return sorted(times)[min(len(times) - 1, int(len(times) * p))]
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--networks", type=int, default=300, help="Number of 15 road networks to build")
+    parser.add_argument("-s", "--seed", type=int, default=1, help="Random seed")
+    parser.add_argument("--cut-chance", type=float, default=.2, help="Chance of an opponent settling on each new road")
+    args = parser.parse_args(argv[1:])
+
+    random.seed(args.seed)
+    # keeps garbage collection pauses out of the latencies
+    gc.disable()
+    engine_times = []
+    cut_times = []
+    exhaustive_times = []
+    for n in range(args.networks):
+        game = pycatan.Game()
+        player, opponent = game.players[0], game.players[1]
+        game.add_settlement(player, random.choice(game.board.get_all_points()), True)
+        while player.num_roads > 0:
+            roads = player.get_available_roads()
+            if not roads: break
+            p1, p2 = random.choice(roads)
+
+            start = time.perf_counter()
+            road = player.place_road(p1, p2)
+            engine_times.append(time.perf_counter() - start)
+
+            roads = player.get_roads()
+            start = time.perf_counter()
+            exhaustive_longest(roads, road, [r for r in roads if r is not road], 1, [0])
+            exhaustive_times.append(time.perf_counter() - start)
+
+            if random.random() < args.cut_chance:
+                point = random.choice([p1, p2])
+                if game.add_settlement(opponent, point, True) == pycatan.Statuses.ALL_GOOD:
+                    # times the cut the settlement already made, by running it again
+                    start = time.perf_counter()
+                    player.cut_roads(point)
+                    cut_times.append(time.perf_counter() - start)
+
+    for name, times in (("engine", engine_times), ("engine cut", cut_times), ("exhaustive", exhaustive_times)):
+        print("%-10s calls: %6d  mean: %8.1f us  p99: %8.1f us  max: %8.1f us" % (
+            name, len(times), sum(times) / len(times) * 1e6,
+            percentile(times, .99) * 1e6, max(times) * 1e6))
+
+if __name__ == "__main__":
+    main(sys.argv)
@@ -0,0 +1,67 @@
+#! /usr/bin/env python3
+
+"""Compares the roll-indexed production table against the old full board scan"""
+
+import os, sys, time, argparse
+import random
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+import pycatan
+from pycatan.board import Board
+from pycatan.building import BuildingType
+
+# the way Board.add_yield used to work, walking every point for every roll
+def scan_yield(board, roll):
+    for r in board.points:
+        for p in r:
+            if p.building != None:
+                for tile in p.tiles:
+                    if board.robber is tile:
+                        continue
+                    if tile.token_num == roll:
+                        card_type = Board.get_card_from_tile(tile.type)
+                        if p.building.type == BuildingType.City:
+                            board.game.players[p.building.owner].add_cards([card_type, card_type])
+                        else:
+                            board.game.players[p.building.owner].add_cards([card_type])
+
+# builds a late game board with a settlement or city on most of the free points
+def setup_game(seed):
+    random.seed(seed)
+    game = pycatan.Game()
+    points = game.board.get_all_points()
+    random.shuffle(points)
+    for n, point in enumerate(points):
+        player = game.players[n % len(game.players)]
+        if game.add_settlement(player, point, is_starting=True) != pycatan.Statuses.ALL_GOOD:
+            continue
+        if n % 2:
+            player.add_cards(pycatan.card.cityBuild)
+            game.upgrade_settlement(point, player)
+    return game
+
+def bench(fn, game, rolls):
+    start = time.perf_counter()
+    for roll in rolls:
+        fn(game.board, roll)
+    return time.perf_counter() - start
+
+def main(argv):
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("-n", "--rolls", type=int, default=100000, help="Number of rolls to time")
+    parser.add_argument("-s", "--seed", type=int, default=1, help="Random seed for the board")
+    args = parser.parse_args(argv[1:])
+
+    game = setup_game(args.seed)
+    rolls = [random.randint(1, 6) + random.randint(1, 6) for i in range(args.rolls)]
+
+    scan = bench(scan_yield, game, rolls)
+    indexed = bench(Board.add_yield, game, rolls)
+
+    print("scan:    %8.2f us/roll" % (scan / len(rolls) * 1e6))
+    print("indexed: %8.2f us/roll" % (indexed / len(rolls) * 1e6))
+    print("speedup: %8.1fx" % (scan / indexed))
+
+if __name__ == "__main__":
+    main(sys.argv)
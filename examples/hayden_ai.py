@@ -46,7 +46,7 @@ class Random2Player(ai_player.AIPlayer):
 
       r = self.game.add_settlement(self.player, p, is_starting=True)
       if r == pycatan.Statuses.ALL_GOOD: 
-        cpoints = p.connected_points[:]
+        cpoints = list(p.connected_points)
         random.shuffle(cpoints)
         for p2 in cpoints:
           r = self.game.add_road(self.player, p, p2, is_starting=True)
@@ -81,53 +81,14 @@ class Random2Player(ai_player.AIPlayer):
     error_actions = []
 
     while 1:
+      legal = self.game.legal_actions(self.player)
       actions = []
-      if self.player.has_cards([ResCard.Wood, ResCard.Brick]):
-        ## check if there are any available spots
-        available_roads = self.player.get_available_roads()
-        if available_roads and self.player.num_roads > 0:
-          actions.append((2, ("build_road", available_roads)))
-
-      if self.player.has_cards([ResCard.Wood, ResCard.Brick, ResCard.Wheat, ResCard.Sheep]):
-        ## check if there are any available spots
-        available_points = self.player.get_available_settlements()
-        if available_points and self.player.num_settlements > 0:
-          actions.append((3, ("build_settlement", available_points)))
-
-      if self.player.has_cards([ResCard.Ore, ResCard.Wheat, ResCard.Sheep]):
-        if len(self.game.dev_deck) > 0:
-          actions.append((1, ("build_dev", None)))
-
-      if len(self.player.cards) > 0:
-        cards = []
-        for ctype in (ResCard.Wood, ResCard.Brick, ResCard.Wheat, ResCard.Sheep, ResCard.Ore):
-          n = self.player.cards.count(ctype)
-          if n >= 4:
-            cards.append(ctype)
-        if cards:
-          actions.append((2, ("trade_to_bank", cards)))
-
-      if self.player.has_cards([ResCard.Ore, ResCard.Ore, ResCard.Ore, ResCard.Wheat, ResCard.Wheat]):
-        bpoints = [item for sublist in self.game.board.points for item in sublist]
-        settlements = [building for building in self.player.get_buildings() if building.type == pycatan.BuildingType.Settlement]
-        if settlements and self.player.num_cities > 0:
-          actions.append((4, ("upgrade_settlement", settlements)))
-
-      if self.player.dev_cards:
-        playable = []
+      for weight, cmd in ((2, "build_road"), (3, "build_settlement"), (1, "build_dev"), (2, "trade_to_bank"), (4, "upgrade_settlement")):
+        if cmd in legal:
+          actions.append((weight, (cmd, legal[cmd])))
+      if "use_dev_card" in legal:
         logging.debug ("dev_cards: %s" % self.player.dev_cards)
-        for c in self.player.dev_cards:
-          if c == DevCard.VictoryPoint: continue
-          #if c == DevCard.Road: continue
-          if c == DevCard.Road:
-            if self.player.num_roads >= 2:
-              available_roads = self.player.get_available_roads()
-              if len(available_roads) >= 2:
-                playable.append(c)
-          else:
-            playable.append(c)
-        if playable:
-          actions.append((1, ("use_dev_card", playable)))
+        actions.append((1, ("use_dev_card", list(legal["use_dev_card"]))))
 
       ## remove the actions that caused errors
       actions = [(action,args) for action,args in actions if action not in error_actions]
@@ -167,11 +128,10 @@ class Random2Player(ai_player.AIPlayer):
         assert res == Statuses.ALL_GOOD
 
       elif cmd == "upgrade_settlement":
-        available_settlements = action[1]
+        available_points = action[1]
         
         ranked_settlements = []
-        for building in available_settlements:
-          point = building.point
+        for point in available_points:
           w = 0.
           for tile in point.tiles:
             w += 2. * tile.prob()
@@ -180,13 +140,13 @@ class Random2Player(ai_player.AIPlayer):
               w += .25 * tile.prob()
             if tile.type in (pycatan.TileType.Pasture,):
               w += .15 * tile.prob()
-          ranked_settlements.append((w, building))
+          ranked_settlements.append((w, point))
         ranked_settlements.sort(key=lambda x: x[0])
 
-        settlement = ranked_settlements[-1][1]
+        point = ranked_settlements[-1][1]
 
-        logging.debug("%s: upgrade_settlement %s" % (self.player, settlement))
-        res = self.game.upgrade_settlement(settlement.point, self.player)
+        logging.debug("%s: upgrade_settlement %s" % (self.player, point))
+        res = self.game.upgrade_settlement(point, self.player)
         if res != Statuses.ALL_GOOD: 
           logging.error("%s: upgrade_settlement %s" % (self.player, res))
           error_actions.append("upgrade_settlement")
@@ -234,7 +194,7 @@ class Random2Player(ai_player.AIPlayer):
         elif card == DevCard.Monopoly:
           args['card_type'] = random.choice([ResCard.Wood, ResCard.Brick, ResCard.Ore, ResCard.Sheep, ResCard.Wheat])
         elif card == DevCard.Road:
-          available_roads = self.player.get_available_roads()
+          available_roads = list(legal["use_dev_card"][DevCard.Road])
           (p1, p2) = random.choice(available_roads)
           available_roads.remove((p1,p2))
           args['road_one'] = {"start":p1, "end":p2}
@@ -246,26 +206,26 @@ class Random2Player(ai_player.AIPlayer):
           error_actions.append("use_dev_card")
         
       elif cmd == "trade_to_bank":
-        card = random.choice(action[1])
+        (card, rate) = random.choice(action[1])
         possble_cards = [ResCard.Wood, ResCard.Brick, ResCard.Ore, ResCard.Sheep, ResCard.Wheat]
         possble_cards.remove(card)
         request = random.choice(possble_cards)
-        res = self.game.trade_to_bank(self.player, [card]*4, request)
+        res = self.game.trade_to_bank(self.player, [card]*rate, request)
         if res != Statuses.ALL_GOOD: 
           logging.error("%s: trade_to_bank %s %s %s" % (self.player, res, card, request))
           error_actions.append("trade_to_bank")
 
   def remove_cards(self, ncards):
     for i in range(ncards):
-      j = random.choice(range(len(self.player.cards)))
-      c = self.player.cards[j]
-      del self.player.cards[j]
+      c = self.player.get_random_card()
+      self.player.remove_cards([c])
       logging.debug("%s: discarded %s" % (self.player, c))
 
   def move_robber(self, sim):
     logging.debug("%s: move_robber" % self.player)
 
-    tiles = self.game.board.get_all_tiles()
+    board = self.game.board
+    tiles = board.get_all_tiles()
     potential_tiles = []
     for tile in tiles:
       w = 0.
@@ -273,22 +233,18 @@ class Random2Player(ai_player.AIPlayer):
       if tile.type in (pycatan.TileType.Fields,  pycatan.TileType.Mountains):
         w += .5 * tile.prob()
 
-      for p in tile.points:
-        if p.building == None:
-          pass
-        elif p.building.owner == self.player.get_num():
-          w += -2. * tile.prob()
+      ## tile_owners has the cards each owner gets from the tile, so a city counts twice
+      for owner, weight in board.tile_owners.get(tile, {}).items():
+        if owner == self.player.get_num():
+          w += -2. * weight * tile.prob()
         else:
-          w += 1. * tile.prob()
+          w += 1. * weight * tile.prob()
       potential_tiles.append((w, tile))
 
     potential_tiles.sort(key=lambda x: x[0])
     tile = potential_tiles[-1][1]
-    
-    potential = []
-    for p in tile.points:
-      if p.building and p.building.owner != self.player.get_num():
-        potential.append(p.building.owner)
+
+    potential = board.get_robber_victims(tile, self.player)
 
     ## probably should take the point leader
     ## also, should take from the player who has resources that we need
@@ -296,7 +252,6 @@ class Random2Player(ai_player.AIPlayer):
     victim = None
     if potential:
       victim = random.choice(potential)
-      victim = self.game.players[victim]
 
     return (tile, victim)
 
@@ -0,0 +1,317 @@
+#! /usr/bin/env python3
+
+"""ranks any number of AIs by playing them against each other on a worker pool, and keeping a rating for each"""
+
+import os, sys, time, logging, argparse, json, math
+import importlib
+import random
+import multiprocessing
+
+import play
+import tournament
+
+_version = "0.1"
+
+# A rating with a mean skill mu and an uncertainty sigma, updated after each game with the
+# Weng-Lin Bradley-Terry rule (the rule used by OpenSkill, which is close to TrueSkill but has a closed form)
+class Rating(object):
+  __slots__ = ("mu", "sigma", "games")
+
+  # the defaults used by TrueSkill
+  MU = 25.
+  SIGMA = 25. / 3
+  # the skill difference which gives about a 76% chance of winning
+  BETA = 25. / 6
+  # the smallest fraction sigma^2 can be multiplied by in one game, so it never reaches 0
+  KAPPA = 0.0001
+
+  def __init__(self, mu=MU, sigma=SIGMA, games=0):
+    self.mu = mu
+    self.sigma = sigma
+    self.games = games
+
+  # a low estimate of the skill, used to order the ladder so that new AIs start at the bottom
+  @property
+  def conservative(self):
+    return self.mu - 3 * self.sigma
+
+  def dict(self):
+    return {"mu": self.mu, "sigma": self.sigma, "games": self.games}
+
+  def __repr__(self):
+    return "Rating(mu=%.2f, sigma=%.2f)" % (self.mu, self.sigma)
+
+# returns the chance a beats b, and the combined spread of their ratings
+def win_chance(a, b, beta=Rating.BETA):
+  c = math.sqrt(a.sigma ** 2 + b.sigma ** 2 + 2 * beta ** 2)
+  return 1. / (1. + math.exp((b.mu - a.mu) / c)), c
+
+# updates the ratings of the players of a game from their ranks, where 0 is first and equal ranks are ties
+def rate_game(ratings, ranks, beta=Rating.BETA):
+  changes = []
+  for i, a in enumerate(ratings):
+    omega = 0.
+    delta = 0.
+    for j, b in enumerate(ratings):
+      if i == j: continue
+      p, c = win_chance(a, b, beta)
+      if ranks[i] < ranks[j]:
+        s = 1.
+      elif ranks[i] == ranks[j]:
+        s = 0.5
+      else:
+        s = 0.
+      omega += a.sigma ** 2 / c * (s - p)
+      gamma = a.sigma / c
+      delta += gamma * a.sigma ** 2 / c ** 2 * p * (1 - p)
+    changes.append((omega, delta))
+
+  # the new ratings are worked out from the old ones, so they are only set at the end
+  for r, (omega, delta) in zip(ratings, changes):
+    r.mu += omega
+    r.sigma *= math.sqrt(max(1 - delta, Rating.KAPPA))
+    r.games += 1
+
+# returns how evenly matched two ratings are, from 0 to 1, as TrueSkill's match quality
+def match_quality(a, b, beta=Rating.BETA):
+  spread = 2 * beta ** 2 + a.sigma ** 2 + b.sigma ** 2
+  return math.sqrt(2 * beta ** 2 / spread) * math.exp(-(a.mu - b.mu) ** 2 / (2 * spread))
+
+# picks the players for the next game from ratings, a dict from name to Rating
+# the game is built around the most uncertain player, and each other seat goes to the player who
+# adds the most information: an uncertain player who is evenly matched with those already picked
+# busy counts the games each player is already down to play, which are taken to be played already
+def pick_group(ratings, size, busy):
+  def uncertainty(name):
+    return ratings[name].sigma ** 2 / (1 + busy.get(name, 0))
+
+  names = sorted(ratings)
+  group = [max(names, key=uncertainty)]
+  while len(group) < size:
+    candidates = [name for name in names if name not in group]
+
+    def information(name):
+      quality = sum(match_quality(ratings[name], ratings[other]) for other in group) / len(group)
+      return uncertainty(name) * quality
+
+    group.append(max(candidates, key=information))
+  return group
+
+# returns the class named by path, such as "scott_ai.AIPlayer"
+def load_class(path):
+  module, name = path.rsplit(".", 1)
+  return getattr(importlib.import_module(module), name)
+
+# returns the AIs given on the command line, as a list of (name, class path, keyword arguments)
+# each is the name of an AI from tournament.AIS, or name=module.Class for any ai_player.AIPlayer
+def parse_players(text):
+  entrants = []
+  for spec in text.split(","):
+    spec = spec.strip()
+    if not spec: continue
+    if "=" in spec:
+      name, path = spec.split("=", 1)
+    elif spec in tournament.AIS:
+      name = spec
+      cls = tournament.AIS[spec]
+      path = "%s.%s" % (cls.__module__, cls.__name__)
+    else:
+      raise ValueError("Unknown AI %s, give name=module.Class or one of %s" % (spec, ", ".join(sorted(tournament.AIS))))
+    entrants.append((name, path, {}))
+  return entrants
+
+# returns the AIs in a population file, a JSON list of {"name": ..., "class": "module.Class", "args": {...}}
+# args are passed to the class as keyword arguments, ex: to make weight variants of the same AI
+def load_population(filename):
+  with open(filename) as f:
+    return [(e["name"], e["class"], e.get("args", {})) for e in json.load(f)]
+
+# the state of each worker process, set by init_worker
+_worker = {}
+
+# sets up a worker with a controller for every AI, and a Game for each number of players
+def init_worker(entrants, quiet=True):
+  if quiet:
+    logging.getLogger().setLevel(logging.CRITICAL)
+  _worker["controllers"] = dict((name, load_class(path)(name, **args)) for name, path, args in entrants)
+  _worker["games"] = {}
+
+# plays one game between the AIs in names, and returns its result as a dict
+def play_game(task):
+  game_num, seed, names = task
+  random.seed(seed)
+  controllers = [_worker["controllers"][name] for name in names]
+  sim = play.CatanSim(controllers, _worker["games"].get(len(names)), seed=seed)
+  _worker["games"][len(names)] = sim.game
+  sim.start(None)
+
+  game = sim.game
+  return {
+    "game": game_num,
+    "seed": seed,
+    "winner": game.winner.name if game.winner else None,
+    "seats": [p.name for p in game.players],
+    "scores": [p.get_VP(include_dev=True) for p in game.players],
+    "rounds": sim.round,
+  }
+
+# returns the rank of each seat in a result, the winner first and then the others by their points
+def get_ranks(result):
+  keys = [(r == result["winner"], score) for r, score in zip(result["seats"], result["scores"])]
+  order = sorted(set(keys), reverse=True)
+  return [order.index(key) for key in keys]
+
+# A ladder which plays games between the AIs and updates their ratings as the results come in
+# Games are planned in batches from the ratings at the start of the batch, and the results are
+# rated in the order of the games, so a ladder gives the same ratings whatever the number of workers
+class Ladder(object):
+
+  def __init__(self, entrants, seats=4, seed=0, batch=32):
+    if len(entrants) < 2:
+      raise ValueError("A ladder needs at least 2 AIs")
+    if len(set(name for name, path, args in entrants)) != len(entrants):
+      raise ValueError("Each AI needs its own name")
+    self.entrants = entrants
+    self.seats = min(seats, len(entrants))
+    self.seed = seed
+    self.batch = batch
+    self.ratings = dict((name, Rating()) for name, path, args in entrants)
+    self.games_played = 0
+
+  # returns the next batch of games to play
+  def plan(self, ngames):
+    busy = {}
+    tasks = []
+    for i in range(ngames):
+      group = pick_group(self.ratings, self.seats, busy)
+      for name in group:
+        busy[name] = busy.get(name, 0) + 1
+      game_num = self.games_played + i
+      tasks.append((game_num, tournament.game_seed(self.seed, game_num), group))
+    return tasks
+
+  # rates the players of a game from its result
+  def add_result(self, result):
+    rate_game([self.ratings[name] for name in result["seats"]], get_ranks(result))
+    self.games_played += 1
+
+  # returns the names of the AIs, best first
+  def standings(self):
+    return sorted(self.ratings, key=lambda name: (-self.ratings[name].conservative, name))
+
+  # plays ngames games on nworkers processes, calling on_batch after each batch of results
+  def run(self, ngames, nworkers, on_batch=None):
+    pool = None
+    if nworkers <= 1:
+      init_worker(self.entrants, quiet=False)
+    else:
+      pool = multiprocessing.Pool(nworkers, initializer=init_worker, initargs=(self.entrants,))
+
+    results = []
+    try:
+      while self.games_played < ngames:
+        tasks = self.plan(min(self.batch, ngames - self.games_played))
+        if pool == None:
+          done = [play_game(task) for task in tasks]
+        else:
+          done = sorted(pool.imap_unordered(play_game, tasks), key=lambda r: r["game"])
+        for r in done:
+          self.add_result(r)
+        results.extend(done)
+        if on_batch:
+          on_batch(self)
+    finally:
+      if pool != None:
+        pool.terminate()
+    return results
+
+def log_standings(ladder, top=None):
+  standings = ladder.standings()
+  logging.info("After %d games:" % ladder.games_played)
+  for n, name in enumerate(standings[:top]):
+    r = ladder.ratings[name]
+    logging.info("%3d. %-20s %6.2f  (mu %.2f, sigma %.2f, %d games)" % (n + 1, name, r.conservative, r.mu, r.sigma, r.games))
+
+def start(args):
+  entrants = []
+  if args.population:
+    entrants += load_population(args.population)
+  if args.players:
+    entrants += parse_players(args.players)
+
+  ladder = Ladder(entrants, seats=args.seats, seed=args.seed, batch=args.batch)
+
+  batches = [0]
+  def on_batch(ladder):
+    batches[0] += 1
+    if args.report and batches[0] % args.report == 0:
+      log_standings(ladder, args.top)
+
+  t = time.time()
+  results = ladder.run(args.games, args.workers, on_batch)
+  elapsed = time.time() - t
+
+  if args.output:
+    with open(args.output, "w") as f:
+      json.dump(dict((name, ladder.ratings[name].dict()) for name in ladder.standings()), f, indent=2)
+
+  rate = len(results) / elapsed if elapsed > 0 else 0.
+  logging.info("%d games on %d workers in %.1fs (%.1f games/s)" % (len(results), args.workers, elapsed, rate))
+  log_standings(ladder, args.top)
+
+def parse_args(argv):
+  parser = argparse.ArgumentParser(
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    description=__doc__)
+
+  parser.add_argument("--players", type=str, default=None,
+                      help="Comma separated AIs, each one of %s or name=module.Class" % ", ".join(sorted(tournament.AIS)))
+  parser.add_argument("--population", type=str, default=None,
+                      help="JSON file listing the AIs, as {\"name\": ..., \"class\": \"module.Class\", \"args\": {...}}")
+  parser.add_argument("--games", type=int, default=1000,
+                      help="Number of games to play")
+  parser.add_argument("--seats", type=int, default=4, choices=[3, 4],
+                      help="Number of players in each game")
+  parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                      help="Number of worker processes")
+  parser.add_argument("--batch", type=int, default=32,
+                      help="Number of games planned at once from the current ratings")
+  parser.add_argument("--seed", type=int, default=0,
+                      help="Seed the seed of each game is worked out from")
+  parser.add_argument("--report", type=int, default=10,
+                      help="Log the standings after this many batches, 0 for only at the end")
+  parser.add_argument("--top", type=int, default=None,
+                      help="Only log this many of the best AIs")
+  parser.add_argument("-o", "--output", type=str, default=None,
+                      help="File to write the final ratings to, as JSON")
+  parser.add_argument("--log-level", type=str,
+                      choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+                      help="Desired console log level")
+  parser.add_argument("-d", "--debug", dest="log_level", action="store_const",
+                      const="DEBUG",
+                      help="Activate debugging")
+  parser.add_argument("-q", "--quiet", dest="log_level", action="store_const",
+                      const="CRITICAL",
+                      help="Quite mode")
+
+  args = parser.parse_args(argv[1:])
+  if args.log_level is None: args.log_level = "INFO"
+  if not args.players and not args.population:
+    args.players = ",".join(sorted(tournament.AIS))
+
+  return parser, args
+
+def main(argv, stdout, environ):
+  parser, args = parse_args(argv)
+
+  numeric_loglevel = getattr(logging, args.log_level.upper(), None)
+  if not isinstance(numeric_loglevel, int):
+    raise ValueError('Invalid log level: %s' % args.log_level)
+
+  logging.basicConfig(format="[%(asctime)s] %(levelname)-8s %(message)s",
+                    datefmt="%m/%d %H:%M:%S", level=numeric_loglevel)
+
+  start(args)
+
+if __name__ == "__main__":
+  main(sys.argv, sys.stdout, os.environ)
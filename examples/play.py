@@ -15,19 +15,29 @@ import scott_ai
 import hayden_ai
 
 import catanlog
+import tournament_stats
 
 _version = "0.1"
 
 class CatanSim:
-  def __init__(self, players):
+  # game can be a Game from an earlier CatanSim, which is reset and reused
+  # seed seeds the game's random streams, see pycatan.RandomStreams
+  # the players are seated in a random order, unless shuffle is False
+  def __init__(self, players, game=None, seed=None, shuffle=True):
     self.log = catanlog.CatanLog()
-    self.game = pycatan.Game(self.log)
+    if game:
+      game.reset(seed=seed)
+      game.log = self.log
+      self.game = game
+    else:
+      self.game = pycatan.Game(self.log, num_of_players=len(players), seed=seed)
     logging.debug("%s players" % len(self.game.players))
 
     self.mode = "init"
     
     players = players[:]
-    random.shuffle(players)
+    if shuffle:
+      random.shuffle(players)
 
     for n,player in enumerate(self.game.players):
       player.controller = players[n]
@@ -47,9 +57,9 @@ class CatanSim:
 
     if roll == 7:
       ## card check
-      for player in self.game.players:
-        if len(player.cards) > 7:
-          player.controller.remove_cards(len(player.cards) // 2)
+      for p in self.game.players:
+        if p.num_cards > 7:
+          p.controller.remove_cards(p.num_cards // 2)
 
       ## move robber
       (tile, victim) = player.controller.move_robber(self)
@@ -118,7 +128,8 @@ class CatanSim:
     
     
 
-def start():
+# plays games until stopped, or until every pair of AIs has been told apart if stop is True
+def start(stop=False):
   if board_renderer:
     br = board_renderer.BoardRenderer(None, [60, 10])
     br.clear()
@@ -132,8 +143,11 @@ def start():
   players.append(scott_ai.AIPlayer("scott_ai"))
 
   ngames = 0
+  game = None
+  tstats = tournament_stats.TournamentStats([p.name for p in players])
   while 1:
-    c = CatanSim(players)
+    c = CatanSim(players, game)
+    game = c.game
     c.start(br)
     ngames += 1 
 
@@ -147,7 +161,11 @@ def start():
       stats.append("%s: %.1f" % (p.name, 100.*p.win / (p.win+p.lose)))
     logging.info(' '.join(stats))
 
-    #break
+    tstats.add({"seats": [p.name for p in c.game.players], "winner": c.game.winner.name if c.game.winner else None})
+    if stop and tstats.settled():
+      for line in tstats.report():
+        logging.info(line)
+      break
   
 def test():
   logging.warn("Testing")
@@ -173,6 +191,8 @@ def parse_args(argv):
   parser.add_argument("-q", "--quiet", dest="log_level", action="store_const",
                       const="CRITICAL",
                       help="Quite mode")
+  parser.add_argument("--stop", action="store_true",
+                      help="Stop once every pair of AIs has been told apart")
   #parser.add_argument("files", type=str, nargs='+')
 
   args = parser.parse_args(argv[1:])
@@ -194,7 +214,7 @@ def main(argv, stdout, environ):
 
   if args.test_flag:  test();   return
   
-  start()
+  start(args.stop)
 
 if __name__ == "__main__":
   main(sys.argv, sys.stdout, os.environ)
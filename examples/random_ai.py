@@ -24,7 +24,7 @@ class RandomPlayer(ai_player.AIPlayer):
 
       r = self.game.add_settlement(self.player, p, is_starting=True)
       if r == pycatan.Statuses.ALL_GOOD: 
-        cpoints = p.connected_points[:]
+        cpoints = list(p.connected_points)
         random.shuffle(cpoints)
         for p2 in cpoints:
           r = self.game.add_road(self.player, p, p2, is_starting=True)
@@ -41,56 +41,14 @@ class RandomPlayer(ai_player.AIPlayer):
     error_actions = []
 
     while 1:
+      legal = self.game.legal_actions(self.player)
       actions = []
-      if self.player.has_cards([ResCard.Wood, ResCard.Brick]):
-        ## check if there are any available spots
-        available_roads = self.player.get_available_roads()
-        if available_roads and self.player.num_roads > 0:
-          actions.append(("build_road", available_roads))
-
-      if self.player.has_cards([ResCard.Wood, ResCard.Brick, ResCard.Wheat, ResCard.Sheep]):
-        ## check if there are any available spots
-        available_points = self.player.get_available_settlements()
-        if available_points and self.player.num_settlements > 0:
-          actions.append(("build_settlement", available_points))
-
-      if self.player.has_cards([ResCard.Ore, ResCard.Wheat, ResCard.Sheep]):
-        if len(self.game.dev_deck) > 0:
-          actions.append(("build_dev", None))
-
-      if len(self.player.cards) > 0:
-        cards = []
-        for ctype in (ResCard.Wood, ResCard.Brick, ResCard.Wheat, ResCard.Sheep, ResCard.Ore):
-          n = self.player.cards.count(ctype)
-          if n >= 4:
-            cards.append(ctype)
-        if cards:
-          actions.append(("trade_to_bank", cards))
-
-      if self.player.has_cards([ResCard.Ore, ResCard.Ore, ResCard.Ore, ResCard.Wheat, ResCard.Wheat]):
-        bpoints = [item for sublist in self.game.board.points for item in sublist]
-        settlements = []
-        for p in bpoints:
-          if p.building and p.building.owner == self.player.get_num() and p.building.type == pycatan.BuildingType.Settlement:
-            settlements.append(p)
-        if settlements and self.player.num_cities > 0:
-          actions.append(("upgrade_settlement", settlements))
-
-      if self.player.dev_cards:
-        playable = []
+      for cmd in ("build_road", "build_settlement", "build_dev", "trade_to_bank", "upgrade_settlement"):
+        if cmd in legal:
+          actions.append((cmd, legal[cmd]))
+      if "use_dev_card" in legal:
         logging.debug ("dev_cards: %s" % self.player.dev_cards)
-        for c in self.player.dev_cards:
-          if c == DevCard.VictoryPoint: continue
-          #if c == DevCard.Road: continue
-          if c == DevCard.Road:
-            if self.player.num_roads >= 2:
-              available_roads = self.player.get_available_roads()
-              if len(available_roads) >= 2:
-                playable.append(c)
-          else:
-            playable.append(c)
-        if playable:
-          actions.append(("use_dev_card", playable))
+        actions.append(("use_dev_card", list(legal["use_dev_card"])))
 
       ## remove the actions that caused errors
       actions = [(action,args) for action,args in actions if action not in error_actions]
@@ -153,7 +111,7 @@ class RandomPlayer(ai_player.AIPlayer):
         elif card == DevCard.Monopoly:
           args['card_type'] = random.choice([ResCard.Wood, ResCard.Brick, ResCard.Ore, ResCard.Sheep, ResCard.Wheat])
         elif card == DevCard.Road:
-          available_roads = self.player.get_available_roads()
+          available_roads = list(legal["use_dev_card"][DevCard.Road])
           (p1, p2) = random.choice(available_roads)
           available_roads.remove((p1,p2))
           args['road_one'] = {"start":p1, "end":p2}
@@ -165,20 +123,19 @@ class RandomPlayer(ai_player.AIPlayer):
           error_actions.append("use_dev_card")
         
       elif cmd == "trade_to_bank":
-        card = random.choice(action[1])
+        (card, rate) = random.choice(action[1])
         possble_cards = [ResCard.Wood, ResCard.Brick, ResCard.Ore, ResCard.Sheep, ResCard.Wheat]
         possble_cards.remove(card)
         request = random.choice(possble_cards)
-        res = self.game.trade_to_bank(self.player, [card]*4, request)
+        res = self.game.trade_to_bank(self.player, [card]*rate, request)
         if res != Statuses.ALL_GOOD: 
           logging.error("%s: trade_to_bank %s %s %s" % (self.player, res, card, request))
           error_actions.append("trade_to_bank")
 
   def remove_cards(self, ncards):
     for i in range(ncards):
-      j = random.choice(range(len(self.player.cards)))
-      c = self.player.cards[j]
-      del self.player.cards[j]
+      c = self.player.get_random_card()
+      self.player.remove_cards([c])
       logging.debug("%s: discarded %s" % (self.player, c))
 
   def move_robber(self, sim):
@@ -187,15 +144,11 @@ class RandomPlayer(ai_player.AIPlayer):
     tiles = self.game.board.get_all_tiles()
     tile = random.choice(tiles)
     
-    potential = []
-    for p in tile.points:
-      if p.building and p.building.owner != self.player.get_num():
-        potential.append(p.building.owner)
+    potential = self.game.board.get_robber_victims(tile, self.player)
 
     victim = None
     if potential:
       victim = random.choice(potential)
-      victim = self.game.players[victim]
 
     return (tile, victim)
 
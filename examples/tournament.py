@@ -0,0 +1,259 @@
+#! /usr/bin/env python3
+
+"""plays a tournament of CatanSim games between the AIs, spread over several processes"""
+
+import os, sys, time, logging, argparse, json, math
+import random
+import multiprocessing
+
+# the AI modules are imported here so that each worker has them loaded before its first game
+import random_ai
+import scott_ai
+import hayden_ai
+
+import play
+import tournament_stats
+
+_version = "0.1"
+
+# the AIs which can play, by name
+AIS = {
+  "random_ai": random_ai.RandomPlayer,
+  "hayden_ai": hayden_ai.Random2Player,
+  "scott_ai": scott_ai.AIPlayer,
+}
+
+# the state of each worker process, set by init_worker
+# the controllers and the Game are reused from one game to the next
+_worker = {}
+
+# returns the seed for a game, worked out from the tournament's seed
+# so that any game can be replayed on its own with the same result
+def game_seed(seed, game_num):
+  return random.Random("%s-%s" % (seed, game_num)).getrandbits(64)
+
+# sets up a worker to play games between the AIs in names
+# quiet turns off the AIs' logging, which is only useful when watching a single game
+def init_worker(names, quiet=True):
+  if quiet:
+    logging.getLogger().setLevel(logging.CRITICAL)
+  _worker["controllers"] = [AIS[name](name) for name in names]
+  _worker["game"] = None
+
+# plays one game, and returns its result as a dict
+# the game is played on the board and dice of deal, which are worked out from seed
+# if rotation is None the players are seated at random, otherwise the seats are the
+# AIs in the order they were given, moved round by rotation
+def play_game(task):
+  game_num, deal, seed, rotation = task
+  # the AIs and the seating still use the random module
+  random.seed(seed)
+  controllers = _worker["controllers"]
+  if rotation != None:
+    controllers = controllers[rotation:] + controllers[:rotation]
+  sim = play.CatanSim(controllers, _worker["game"], seed=seed, shuffle=rotation == None)
+  _worker["game"] = sim.game
+  sim.start(None)
+
+  game = sim.game
+  return {
+    "game": game_num,
+    "deal": deal,
+    "rotation": rotation,
+    "seed": seed,
+    "winner": game.winner.name if game.winner else None,
+    "seats": [p.name for p in game.players],
+    "scores": [p.get_VP(include_dev=True) for p in game.players],
+    "rounds": sim.round,
+  }
+
+# returns the games to play, as tasks for play_game
+# in duplicate mode each of the ndeals deals is played once for each rotation of the seats,
+# so every AI plays every deal from every seat with the same dice (common random numbers)
+def make_tasks(names, ndeals, seed, duplicate=False):
+  tasks = []
+  for deal in range(ndeals):
+    rotations = range(len(names)) if duplicate else [None]
+    for rotation in rotations:
+      tasks.append((len(tasks), deal, game_seed(seed, deal), rotation))
+  return tasks
+
+# plays the games, using a pool of workers if there is more than one
+# returns the results in the order of the games
+# if stats is a TournamentStats, each result is added to it in order, and no more games
+# are played once it is settled, so the games played do not depend on the number of workers
+def run(names, ngames, nworkers, seed, duplicate=False, stats=None):
+  tasks = make_tasks(names, ngames, seed, duplicate)
+  games_per_deal = len(names) if duplicate else 1
+  # when stopping early the games are played in batches, which never split a deal
+  if stats == None:
+    batch = max(1, len(tasks))
+  elif nworkers <= 1:
+    batch = games_per_deal
+  else:
+    batch = max(1, nworkers * 16 // games_per_deal) * games_per_deal
+
+  pool = None
+  if nworkers <= 1:
+    init_worker(names, quiet=False)
+  else:
+    pool = multiprocessing.Pool(nworkers, initializer=init_worker, initargs=(names,))
+
+  results = []
+  try:
+    for start in range(0, len(tasks), batch):
+      todo = tasks[start:start + batch]
+      if pool == None:
+        done = [play_game(task) for task in todo]
+      else:
+        # big enough chunks that the workers are not waiting on the parent, small enough to share the games out evenly
+        chunksize = max(1, len(todo) // (nworkers * 8))
+        done = sorted(pool.imap_unordered(play_game, todo, chunksize), key=lambda r: r["game"])
+      for r in done:
+        results.append(r)
+        if stats != None:
+          stats.add(r)
+          # only stop at the end of a deal, so every deal is played from every seat
+          if len(results) % games_per_deal == 0 and stats.settled():
+            return results
+  finally:
+    if pool != None:
+      pool.terminate()
+  return results
+
+# totals up the results for each AI
+def summarize(names, results):
+  summary = dict((name, {"games": 0, "wins": 0, "seat_wins": [0] * len(names), "rounds": 0}) for name in names)
+  for r in results:
+    for seat, name in enumerate(r["seats"]):
+      s = summary[name]
+      s["games"] += 1
+      s["rounds"] += r["rounds"]
+      if r["winner"] == name:
+        s["wins"] += 1
+        s["seat_wins"][seat] += 1
+  for s in summary.values():
+    s["win_rate"] = float(s["wins"]) / s["games"] if s["games"] else 0.
+  return summary
+
+# compares each pair of AIs over the deals of a duplicate tournament
+# each AI scores the share of a deal's games it won, and the difference in the two AIs' scores
+# is averaged over the deals, which cancels out most of the luck of the board and the dice
+# returns a list of (name, other name, mean difference, low, high) where low and high
+# are the bounds of the confidence interval for the difference, by default 95%
+def paired_differences(names, results, z=1.96):
+  deals = {}
+  for r in results:
+    scores = deals.setdefault(r["deal"], dict((name, [0, 0]) for name in names))
+    for name in r["seats"]:
+      scores[name][1] += 1
+    if r["winner"] != None:
+      scores[r["winner"]][0] += 1
+
+  differences = []
+  for i, name in enumerate(names):
+    for other in names[i + 1:]:
+      diffs = []
+      for scores in deals.values():
+        wins, games = scores[name]
+        other_wins, other_games = scores[other]
+        diffs.append(float(wins) / games - float(other_wins) / other_games)
+      n = len(diffs)
+      mean = sum(diffs) / n if n else 0.
+      # the standard error of the mean, from the sample variance
+      if n > 1:
+        error = math.sqrt(sum((d - mean) ** 2 for d in diffs) / (n - 1) / n)
+      else:
+        error = float("inf")
+      differences.append((name, other, mean, mean - z * error, mean + z * error))
+  return differences
+
+def start(args):
+  names = args.players.split(",")
+  for name in names:
+    if name not in AIS:
+      raise ValueError("Unknown AI %s, choose from %s" % (name, ", ".join(sorted(AIS))))
+  if len(set(names)) != len(names):
+    raise ValueError("Each AI can only play once in a game")
+
+  stats = None
+  if args.stop:
+    stats = tournament_stats.TournamentStats(names, delta=args.delta, alpha=args.alpha, beta=args.alpha)
+
+  t = time.time()
+  results = run(names, args.games, args.workers, args.seed, args.duplicate, stats)
+  elapsed = time.time() - t
+
+  if args.output:
+    with open(args.output, "w") as f:
+      for r in results:
+        f.write(json.dumps(r) + "\n")
+
+  summary = summarize(names, results)
+  rate = len(results) / elapsed if elapsed > 0 else 0.
+  logging.info("%d games on %d workers in %.1fs (%.1f games/s)" % (len(results), args.workers, elapsed, rate))
+  for name in names:
+    s = summary[name]
+    logging.info("%s: %.1f%% wins (%d/%d) by seat %s" % (name, 100. * s["win_rate"], s["wins"], s["games"], s["seat_wins"]))
+  if args.duplicate:
+    ndeals = len(set(r["deal"] for r in results))
+    for name, other, mean, low, high in paired_differences(names, results):
+      logging.info("%s - %s: %+.1f%% wins, 95%% CI %+.1f%% to %+.1f%% over %d deals" % (name, other, 100. * mean, 100. * low, 100. * high, ndeals))
+  if stats != None:
+    for line in stats.report():
+      logging.info(line)
+    if stats.settled():
+      logging.info("Stopped early, every pair of AIs was settled after %d games" % len(results))
+
+def parse_args(argv):
+  parser = argparse.ArgumentParser(
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+    description=__doc__)
+
+  parser.add_argument("--games", type=int, default=100,
+                      help="Number of games to play, or of deals in duplicate mode")
+  parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                      help="Number of worker processes")
+  parser.add_argument("--players", type=str, default="random_ai,hayden_ai,scott_ai",
+                      help="Comma separated AIs which play in every game, from %s" % ", ".join(sorted(AIS)))
+  parser.add_argument("--seed", type=int, default=0,
+                      help="Seed the seed of each game is worked out from")
+  parser.add_argument("--duplicate", action="store_true",
+                      help="Play each deal (board and dice) once for each rotation of the seats, and compare the AIs in pairs")
+  parser.add_argument("--stop", action="store_true",
+                      help="Stop as soon as a sequential probability ratio test has told every pair of AIs apart, --games is then the most games to play")
+  parser.add_argument("--delta", type=float, default=0.05,
+                      help="For --stop, the difference from an even head to head win rate which the tests look for")
+  parser.add_argument("--alpha", type=float, default=0.05,
+                      help="For --stop, the chance the tests pick the wrong AI")
+  parser.add_argument("-o", "--output", type=str, default=None,
+                      help="File to write each game's result to, as JSON lines")
+  parser.add_argument("--log-level", type=str,
+                      choices=["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"],
+                      help="Desired console log level")
+  parser.add_argument("-d", "--debug", dest="log_level", action="store_const",
+                      const="DEBUG",
+                      help="Activate debugging")
+  parser.add_argument("-q", "--quiet", dest="log_level", action="store_const",
+                      const="CRITICAL",
+                      help="Quite mode")
+
+  args = parser.parse_args(argv[1:])
+  if args.log_level is None: args.log_level = "INFO"
+
+  return parser, args
+
+def main(argv, stdout, environ):
+  parser, args = parse_args(argv)
+
+  numeric_loglevel = getattr(logging, args.log_level.upper(), None)
+  if not isinstance(numeric_loglevel, int):
+    raise ValueError('Invalid log level: %s' % args.log_level)
+
+  logging.basicConfig(format="[%(asctime)s] %(levelname)-8s %(message)s",
+                    datefmt="%m/%d %H:%M:%S", level=numeric_loglevel)
+
+  start(args)
+
+if __name__ == "__main__":
+  main(sys.argv, sys.stdout, os.environ)
@@ -0,0 +1,184 @@
+"""streaming statistics for comparing AIs, which are updated after every game and can tell when to stop playing"""
+
+import math
+
+# returns the Wilson score interval for a win rate, z is the normal quantile (1.96 for 95%)
+def wilson_interval(wins, games, z=1.96):
+  if games == 0:
+    return (0., 1.)
+  p = float(wins) / games
+  z2 = z * z
+  centre = (p + z2 / (2 * games)) / (1 + z2 / games)
+  spread = z * math.sqrt(p * (1 - p) / games + z2 / (4 * games * games)) / (1 + z2 / games)
+  return (max(0., centre - spread), min(1., centre + spread))
+
+# returns the z where the standard normal cdf is q, by bisection
+def _normal_quantile(q):
+  low, high = -10., 10.
+  for i in range(100):
+    mid = (low + high) / 2
+    if 0.5 * math.erfc(-mid / math.sqrt(2)) < q:
+      low = mid
+    else:
+      high = mid
+  return (low + high) / 2
+
+# returns the continued fraction for the incomplete beta function, see incomplete_beta
+def _beta_fraction(a, b, x):
+  tiny = 1e-30
+  c = 1.
+  d = 1. - (a + b) * x / (a + 1)
+  if abs(d) < tiny: d = tiny
+  d = 1. / d
+  h = d
+  for m in range(1, 200):
+    m2 = 2 * m
+    for aa in (m * (b - m) * x / ((a + m2 - 1) * (a + m2)), -(a + m) * (a + b + m) * x / ((a + m2) * (a + m2 + 1))):
+      d = 1. + aa * d
+      if abs(d) < tiny: d = tiny
+      c = 1. + aa / c
+      if abs(c) < tiny: c = tiny
+      d = 1. / d
+      h *= d * c
+    if abs(d * c - 1.) < 1e-12:
+      break
+  return h
+
+# returns the regularized incomplete beta function I_x(a, b), the cdf of a Beta(a, b) distribution
+def incomplete_beta(a, b, x):
+  if x <= 0.: return 0.
+  if x >= 1.: return 1.
+  front = math.exp(math.lgamma(a + b) - math.lgamma(a) - math.lgamma(b) + a * math.log(x) + b * math.log(1 - x))
+  # the continued fraction converges quickly on one side of the mean, so use the symmetry on the other
+  if x < (a + 1) / (a + b + 2):
+    return front * _beta_fraction(a, b, x) / a
+  return 1. - front * _beta_fraction(b, a, 1 - x) / b
+
+# returns the central credible interval for a win rate, with a uniform Beta(1, 1) prior
+def credible_interval(wins, games, level=0.95):
+  a = wins + 1.
+  b = games - wins + 1.
+
+  # finds the x where the cdf is q, by bisection
+  def quantile(q):
+    low, high = 0., 1.
+    for i in range(60):
+      mid = (low + high) / 2
+      if incomplete_beta(a, b, mid) < q:
+        low = mid
+      else:
+        high = mid
+    return (low + high) / 2
+
+  tail = (1. - level) / 2
+  return (quantile(tail), quantile(1. - tail))
+
+# the win rate of one AI, kept up to date one game at a time
+class WinRate(object):
+  __slots__ = ("wins", "games")
+
+  def __init__(self):
+    self.wins = 0
+    self.games = 0
+
+  def add(self, won):
+    self.games += 1
+    if won:
+      self.wins += 1
+
+  @property
+  def rate(self):
+    return float(self.wins) / self.games if self.games else 0.
+
+  def wilson(self, z=1.96):
+    return wilson_interval(self.wins, self.games, z)
+
+  def credible(self, level=0.95):
+    return credible_interval(self.wins, self.games, level)
+
+# Wald's sequential probability ratio test between two AIs
+# Only the games won by one of the two count, and p is the chance the first AI won such a game
+# The test is between p = 0.5 - delta (the second AI is better) and p = 0.5 + delta (the first is better),
+# alpha and beta are the chances of wrongly picking the first and the second AI
+class SPRT(object):
+  __slots__ = ("name", "other", "win_step", "loss_step", "lower", "upper", "llr", "wins", "losses", "decision")
+
+  def __init__(self, name, other, delta=0.05, alpha=0.05, beta=0.05):
+    if not 0 < delta < 0.5:
+      raise ValueError("delta must be between 0 and 0.5")
+    self.name = name
+    self.other = other
+    p0 = 0.5 - delta
+    p1 = 0.5 + delta
+    # the change in the log likelihood ratio for a win and for a loss of the first AI
+    self.win_step = math.log(p1 / p0)
+    self.loss_step = math.log((1 - p1) / (1 - p0))
+    self.lower = math.log(beta / (1 - alpha))
+    self.upper = math.log((1 - beta) / alpha)
+    self.llr = 0.
+    self.wins = 0
+    self.losses = 0
+    # the name of the better AI once the test has finished, otherwise None
+    self.decision = None
+
+  # adds the result of a game, by the name of its winner
+  # games after the test has finished do not change the decision
+  def add(self, winner):
+    if winner == self.name:
+      self.wins += 1
+      self.llr += self.win_step
+    elif winner == self.other:
+      self.losses += 1
+      self.llr += self.loss_step
+    else:
+      return
+    if self.decision == None:
+      if self.llr >= self.upper:
+        self.decision = self.name
+      elif self.llr <= self.lower:
+        self.decision = self.other
+
+# keeps the win rate of each AI and a SPRT between each pair of AIs over the games of a tournament
+# results are the dicts returned by tournament.play_game
+class TournamentStats(object):
+
+  def __init__(self, names, delta=0.05, alpha=0.05, beta=0.05, level=0.95):
+    self.names = list(names)
+    self.level = level
+    self.games = 0
+    self.win_rates = dict((name, WinRate()) for name in self.names)
+    self.tests = []
+    for i, name in enumerate(self.names):
+      for other in self.names[i + 1:]:
+        self.tests.append(SPRT(name, other, delta, alpha, beta))
+
+  def add(self, result):
+    self.games += 1
+    for name in result["seats"]:
+      self.win_rates[name].add(result["winner"] == name)
+    for test in self.tests:
+      test.add(result["winner"])
+
+  # whether every pair of AIs has been told apart, so no more games are needed
+  def settled(self):
+    return all(test.decision != None for test in self.tests)
+
+  # returns a line of text for each AI and each pair of AIs
+  def report(self):
+    z = _normal_quantile(1. - (1. - self.level) / 2)
+    pct = int(round(100 * self.level))
+    lines = []
+    for name in self.names:
+      r = self.win_rates[name]
+      w = r.wilson(z)
+      c = r.credible(self.level)
+      lines.append("%s: %.1f%% wins (%d/%d), %d%% Wilson %.1f%%-%.1f%%, credible %.1f%%-%.1f%%" % (
+        name, 100. * r.rate, r.wins, r.games, pct, 100. * w[0], 100. * w[1], 100. * c[0], 100. * c[1]))
+    for test in self.tests:
+      if test.decision == None:
+        verdict = "undecided"
+      else:
+        verdict = "%s is better" % test.decision
+      lines.append("%s vs %s: %d-%d, llr %.2f in (%.2f, %.2f), %s" % (
+        test.name, test.other, test.wins, test.losses, test.llr, test.lower, test.upper, verdict))
+    return lines
@@ -1,8 +1,11 @@
 from pycatan.board import Board
 from pycatan.building import Building, BuildingType 
 from pycatan.card import ResCard, DevCard
+from pycatan.counters import ActionCounters
 from pycatan.game import Game
+from pycatan.game_state import GameState
 from pycatan.harbor import Harbor
 from pycatan.player import Player
+from pycatan.random_streams import RandomStreams
 from pycatan.statuses import Statuses
 from pycatan.tile_type import TileType
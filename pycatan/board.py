@@ -6,6 +6,7 @@ from pycatan.tile_type import TileType
 from pycatan.card import ResCard, DevCard
 from pycatan.tile import Tile
 from pycatan.point import Point
+from pycatan.legality import Legality
 
 import logging
 
@@ -32,86 +33,231 @@ class Board(object):
         # Where the players can place settlements/cities
         # Will be set at the end of __init__
         self.points = ()
+        # The tiles and points in a flat tuple, so that each one's id is its index
+        self.all_tiles = ()
+        self.all_points = ()
+        # Every place a road can go, as Board.edge_key of its points, so that each edge's id is its index
+        self.edges = ()
         # The roads
         self.roads = []
+        # The roads indexed by Board.edge_key of their points
+        self.road_index = {}
+        # The roads touching each point
+        self.point_roads = {}
         # The locations of the harbors
         self.harbors = []
+        # The production index
+        # maps each roll to a list of (owner, card, amount) entries
+        # Will be set with reindex_production once the tiles are set
+        self.production = {}
+        # The tiles for each token number, used to rebuild the production index
+        self.tiles_by_token = {}
         # The location of the robber
         # going r, i
-        self.robber = None
+        self._robber = None
+        # The buildings and roads as bitboards, used to check where things can be built
+        # Player.settlement_points and road_frontier are worked out from them
+        # Should be set in a subclass, since it needs the ids of the points and edges
+        self.legality = None
+        # The settlements and cities of each player
+        # maps each owner to a dict from the points to the buildings on them, in the order they were built
+        self.buildings = {}
+        # The production weight of each player on each tile, i.e. the cards they get when it produces
+        # maps each tile to a dict from the owners to their weight
+        # the dicts are replaced rather than changed, so they can be shared by copies of the index
+        self.tile_owners = {}
 
     @staticmethod
     def get_tile_indexes_for_point(r, i):
       pass
 
+    # Sets the tile types, tokens and harbor types
+    def set_layout(self, layout):
+      pass
+
+    # removes every building and road, and sets a new layout
+    def reset(self, layout):
+      for point in self.get_all_points():
+        point.building = None
+
+      self.roads = []
+      self.road_index = {}
+      self.point_roads = {}
+      self.legality = Legality(self.legality.topology)
+      self.buildings = {}
+      self.tile_owners = {}
+
+      self.set_layout(layout)
+
     def get_connected_points(self, r, i):
       pass
 
+    # returns the id of the edge between two points
+    def get_edge_id(self, p1, p2):
+      pass
+
+    # returns the point with an id, or the point itself if it is given a Point
+    def resolve_point(self, point):
+      if isinstance(point, int):
+        return self.all_points[point]
+      return point
+
+    # returns the tile with an id, or the tile itself if it is given a Tile
+    def resolve_tile(self, tile):
+      if isinstance(tile, int):
+        return self.all_tiles[tile]
+      return tile
+
     @staticmethod
     def get_outside_points():
       pass
 
+    # the tile the robber is on
+    # setting it keeps the production index up to date
+    @property
+    def robber(self):
+        return self._robber
+
+    @robber.setter
+    def robber(self, tile):
+        old_tile = self._robber
+        self._robber = tile
+        # the robber may be set to something other than a tile (ex: None)
+        for t in (old_tile, tile):
+            token_num = getattr(t, "token_num", None)
+            if token_num in self.production:
+                self.update_production(token_num)
+
     # gives the players cards for a certain roll
     def add_yield(self, roll):
-
-        for r in self.points:
-            for p in r:
-                # Check there is a building on the point
-                if p.building != None:
-                    building = p.building
-                    tiles = p.tiles
-
-                    # checks if any tiles have the right number
-                    for current_tile in tiles:
-
-                        #logging.debug("Robber %s %s" % (self.robber, current_tile))
-                        # makes sure the robber isn't there
-                        if self.robber is current_tile:
-                            # skips this tile
-                            continue
-
-                        if current_tile.token_num == roll:
-                            # adds the card to the player's inventory
-                            owner = building.owner
-                            # gets the card type
-                            card_type = Board.get_card_from_tile(current_tile.type)
-                            # adds two if it is a city
-                            if building.type == BuildingType.City:
-                                self.game.players[owner].add_cards([
-                                    card_type,
-                                    card_type
-                                ])
-
-                            else:
-                                self.game.players[owner].add_cards([
-                                    card_type
-                                ])
+        players = self.game.players
+        for owner, card_type, amount in self.production.get(roll, ()):
+            players[owner].add_card(card_type, amount)
+
+    # rebuilds the production index for every roll
+    # should be called whenever the tiles' types or tokens change
+    def reindex_production(self):
+        self.tiles_by_token = {}
+        for tile in self.get_all_tiles():
+            # the desert does not produce anything
+            if tile.token_num == None or Board.get_card_from_tile(tile.type) == None:
+                continue
+            self.tiles_by_token.setdefault(tile.token_num, []).append(tile)
+
+        self.production = {}
+        for roll in self.tiles_by_token:
+            self.update_production(roll)
+
+    # rebuilds the production entries for a single roll
+    def update_production(self, roll):
+        amounts = {}
+        for tile in self.tiles_by_token.get(roll, ()):
+            # makes sure the robber isn't there
+            if self.robber is tile:
+                continue
+            card_type = Board.get_card_from_tile(tile.type)
+            for owner, weight in self.tile_owners.get(tile, {}).items():
+                key = (owner, card_type)
+                amounts[key] = amounts.get(key, 0) + weight
+
+        self.production[roll] = [(owner, card_type, amount) for (owner, card_type), amount in amounts.items()]
 
     def produce_initial_settlement(self, building):
         # gets the card type
         for tile in building.point.tiles:
           card_type = Board.get_card_from_tile(tile.type)
-          self.game.players[building.owner].add_cards([
-            card_type
-            ])
+          # the desert does not give a card
+          if card_type != None:
+            self.game.players[building.owner].add_card(card_type)
+
 
+    # the number of cards a building gets when a tile next to it produces
+    @staticmethod
+    def get_building_weight(building):
+        if building == None:
+            return 0
+        # cities produce two cards instead of one
+        if building.type == BuildingType.City:
+            return 2
+        return 1
 
     # adds a Building object to the board
     def add_building(self, building, point):
+        is_new = point.building == None
+        weight = Board.get_building_weight(building) - Board.get_building_weight(point.building)
+        # a new settlement stops settlements being built on or next to its point
+        # and changes which roads can be built from it
+        if is_new:
+            self.legality.add_building(building.owner, point.id)
         point.building = building
+        self.buildings.setdefault(building.owner, {})[point] = building
+        if is_new:
+            if point.harbor != None:
+                self.game.players[building.owner].add_harbor(point.harbor)
+        # updates the weights and production of the tiles around the point
+        for tile in point.tiles:
+            owners = dict(self.tile_owners.get(tile, {}))
+            owners[building.owner] = owners.get(building.owner, 0) + weight
+            self.tile_owners[tile] = owners
+            if tile.token_num in self.production:
+                self.update_production(tile.token_num)
 
     # adds a Building object, which must be a road
     # since roads record their own position and are not in self.points
     def add_road(self, road):
+        self.index_road(road)
+
+    # adds a road to roads, road_index and point_roads
+    def index_road(self, road):
+        self.legality.add_road(road.owner, self.get_edge_id(road.point_one, road.point_two))
         self.roads.append(road)
+        self.road_index[Board.edge_key(road.point_one, road.point_two)] = road
+        for p in (road.point_one, road.point_two):
+            self.point_roads.setdefault(p, []).append(road)
+
+    # removes a road added with add_road, ex: when undoing an action
+    # does not change the legality bitboards, see reindex_legality
+    def remove_road(self, road):
+        self.roads.remove(road)
+        del self.road_index[Board.edge_key(road.point_one, road.point_two)]
+        for p in (road.point_one, road.point_two):
+            self.point_roads[p].remove(road)
+            if not self.point_roads[p]:
+                del self.point_roads[p]
+
+    # rebuilds the legality bitboards from the buildings and roads
+    def reindex_legality(self):
+        self.legality = Legality(self.legality.topology)
+        for point in self.get_all_points():
+            if point.building != None:
+                self.legality.add_building(point.building.owner, point.id)
+        for road in self.roads:
+            self.legality.add_road(road.owner, self.get_edge_id(road.point_one, road.point_two))
+
+    # rebuilds each player's trade_rates from the buildings on the harbors
+    def reindex_trade_rates(self):
+        for player in self.game.players:
+            player.trade_rates = [4] * 5
+        for harbor in self.harbors:
+            for p in harbor.get_points():
+                if p.building != None:
+                    self.game.players[p.building.owner].add_harbor(harbor)
 
+    # returns the road between two points, or None if there isn't one
     def get_road(self, p1, p2):
-      for r in self.roads:
-        if (r.point_one == p1 and r.point_two == p2):
-          return r
-        if (r.point_one == p2 and r.point_two == p1):
-          return r
-      return None
+      return self.road_index.get(Board.edge_key(p1, p2))
+
+    # returns the roads that touch a point
+    def get_point_roads(self, point):
+      return self.point_roads.get(point, ())
+
+    # the key used for the edge between two points in road_index
+    # the same for both orders of the points
+    @staticmethod
+    def edge_key(p1, p2):
+      if p1.position <= p2.position:
+        return (p1, p2)
+      return (p2, p1)
 
     # upgrades an existing settlement to a city
     def upgrade_settlement(self, player, point):
@@ -147,28 +293,76 @@ class Board(object):
         # removes the cards
         player.remove_cards(needed_cards)
         # changes the settlement to a city
-        point.building = City(building.owner, building.point)
+        self.add_building(City(building.owner, building.point), point)
         building = point.building
 
         # adds another victory point
         player.victory_points += 1
+        player.public_points += 1
 
         player.num_cities -= 1
         player.num_settlements += 1
 
         return Statuses.ALL_GOOD
 
-    # gets all the buildings on the board
+    # gets all the buildings on the board, by owner and then in the order they were built
     def get_buildings(self):
 
         buildings = []
-        for r in self.points:
-            for p in r:
-                if p.building != None:
-                    buildings.append(p.building)
+        for owner in sorted(self.buildings):
+            buildings.extend(self.buildings[owner].values())
 
         return buildings
 
+    # gets the buildings belonging to a player, in the order they were built
+    def get_player_buildings(self, owner):
+        return list(self.buildings.get(owner, {}).values())
+
+    # rebuilds the buildings index and tile_owners from the points
+    def reindex_buildings(self):
+        self.buildings = {}
+        self.tile_owners = {}
+        for point in self.get_all_points():
+            building = point.building
+            if building != None:
+                self.buildings.setdefault(building.owner, {})[point] = building
+                for tile in point.tiles:
+                    owners = self.tile_owners.setdefault(tile, {})
+                    owners[building.owner] = owners.get(building.owner, 0) + Board.get_building_weight(building)
+
+    # returns the players who have a settlement/city on a tile, other than the player
+    def get_robber_victims(self, tile, player):
+        return [self.game.players[owner] for owner in self.tile_owners.get(tile, {}) if owner != player.num]
+
+    # how much stealing a card is worth when ranking robber moves, in cards per roll
+    steal_value = 0.05
+
+    # returns every tile the player can move the robber to, best first, as (score, tile, victims) tuples
+    # the score is the number of cards per roll the robber takes from the other players, less the player's own,
+    # plus steal_value if there is a victim with cards
+    # the victims are the players who can be stolen from, with the most cards first
+    def robber_candidates(self, player):
+        candidates = []
+        for tile in self.get_all_tiles():
+            # the robber has to move
+            if tile is self.robber:
+                continue
+            prob = tile.prob()
+            score = 0.
+            victims = []
+            for owner, weight in self.tile_owners.get(tile, {}).items():
+                if owner == player.num:
+                    score -= weight * prob
+                else:
+                    score += weight * prob
+                    victims.append(self.game.players[owner])
+            victims.sort(key=lambda p: -p.num_cards)
+            if victims and victims[0].num_cards > 0:
+                score += Board.steal_value
+            candidates.append((score, tile, victims))
+        candidates.sort(key=lambda c: -c[0])
+        return candidates
+
     # moves the robber to a given coord
     def move_robber(self, tile):
         self.robber = tile
@@ -178,7 +372,7 @@ class Board(object):
 
     # Get a shuffled deck of the correct number of each type of tile in a board
     @staticmethod
-    def get_shuffled_tile_deck():
+    def get_shuffled_tile_deck(rng=random):
         deck = []
         # sets up all_tiles
         for i in range(4):
@@ -197,11 +391,11 @@ class Board(object):
                 deck.append(TileType.Desert)
 
         # shuffles the deck
-        random.shuffle(deck)
+        rng.shuffle(deck)
         return deck
 
     @staticmethod
-    def get_shuffled_tile_nums():
+    def get_shuffled_tile_nums(rng=random):
         nums = []
         # Get 2 of each number, most of the time
         for i in range(2):
@@ -216,38 +410,29 @@ class Board(object):
                     # Adds two of everything else
                     else:
                         nums.append(x)
-        random.shuffle(nums)
+        rng.shuffle(nums)
         return nums
 
+    # the card associated with each type of tile
+    tile_cards = {
+        TileType.Forest: ResCard.Wood,
+        TileType.Hills: ResCard.Brick,
+        TileType.Pasture: ResCard.Sheep,
+        TileType.Fields: ResCard.Wheat,
+        TileType.Mountains: ResCard.Ore
+    }
+
     # returns the card associated with the tile
     # for example, Brick for Hills, Wood for forests, etc
     @staticmethod
     def get_card_from_tile(tile):
-
-        # returns the appropriete card
-        if tile == TileType.Forest:
-            return ResCard.Wood
-
-        elif tile == TileType.Hills:
-            return ResCard.Brick
-
-        elif tile == TileType.Pasture:
-            return ResCard.Sheep
-
-        elif tile == TileType.Fields:
-            return ResCard.Wheat
-
-        elif tile == TileType.Mountains:
-            return ResCard.Ore
-
-        else:
-            return None
+        return Board.tile_cards.get(tile)
 
     def get_all_tiles(self):
-      return [item for sublist in self.game.board.tiles for item in sublist]
+      return list(self.all_tiles)
 
     def get_all_points(self):
-      return [item for sublist in self.game.board.points for item in sublist]
+      return list(self.all_points)
 
     def dict(self):
       d = {}
@@ -279,9 +464,19 @@ class Board(object):
         elif building_data['type'] == "City":
           p = self.game.get_point(building_data['point'])
           p.building = City(building_data['owner'], p)
+      self.reindex_buildings()
 
+      self.roads = []
+      self.road_index = {}
+      self.point_roads = {}
+      self.reindex_legality()
       for road_data in d['roads']:
         p1 = self.game.get_point(road_data['point_one'])
         p2 = self.game.get_point(road_data['point_two'])
-        self.roads.append(Road(road_data['owner'], p1, p2))
+        self.add_road(Road(road_data['owner'], p1, p2))
+
+      for player in self.game.players:
+        player.rebuild_road_network()
+      self.reindex_trade_rates()
+      self.reindex_production()
           
@@ -11,12 +11,16 @@ class BuildingType(Enum):
       return self.name
 
 class Building:
+    __slots__ = ("owner", "type")
+
     def __init__(self, owner, type):
       # sets the owner and type
       self.owner = owner
       self.type = type
 
 class Road(Building):
+    __slots__ = ("point_one", "point_two")
+
     def __init__(self, owner, point_one, point_two):
       super(Road, self).__init__(owner, BuildingType.Road)
       self.point_one = point_one
@@ -29,6 +33,8 @@ class Road(Building):
       return {"type":self.type, "owner":self.owner, "point_one":self.point_one, "point_two":self.point_two}
 
 class Settlement(Building):
+    __slots__ = ("point",)
+
     def __init__(self, owner, point):
       super(Settlement, self).__init__(owner, BuildingType.Settlement)
       self.point = point
@@ -40,6 +46,8 @@ class Settlement(Building):
         return {"type":self.type, "owner":self.owner, "point":self.point}
 
 class City(Building):
+    __slots__ = ("point",)
+
     def __init__(self, owner, point):
       super(City, self).__init__(owner, BuildingType.City)
       self.point = point
@@ -13,11 +13,27 @@ class ResCard(Enum):
       return self.name
     def dict(self): return self.name
 
+# counts how many of each card are in a list of cards
+# the count for a card is at the index of the card's value
+def card_counts(cards):
+    counts = [0] * 5
+    for c in cards:
+        counts[c.value] += 1
+    return counts
+
 settlementBuild = (ResCard.Wood, ResCard.Brick, ResCard.Sheep, ResCard.Wheat)
 cityBuild = (ResCard.Ore, ResCard.Ore, ResCard.Ore, ResCard.Wheat, ResCard.Wheat)
 devBuild = (ResCard.Wheat, ResCard.Sheep, ResCard.Ore)
 roadBuild = (ResCard.Wood, ResCard.Brick)
 
+# the costs above as count vectors
+buildCosts = {
+    "settlement": tuple(card_counts(settlementBuild)),
+    "city": tuple(card_counts(cityBuild)),
+    "dev": tuple(card_counts(devBuild)),
+    "road": tuple(card_counts(roadBuild))
+}
+
 # The different types of developement cards
 class DevCard(Enum):
 
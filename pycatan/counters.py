@@ -0,0 +1,76 @@
+from pycatan.statuses import Statuses
+
+# Counts the calls to each game action, the statuses they returned and the time they took
+# Set Game.counters to an ActionCounters to start counting, see undoable
+# Actions called by other actions (ex: move_robber by use_dev_card) are counted as well,
+# so their time is also part of the calling action's time
+class ActionCounters(object):
+    __slots__ = ("calls", "seconds", "statuses")
+
+    def __init__(self):
+        # the number of calls to each action
+        self.calls = {}
+        # the total wall time spent in each action, in seconds
+        self.seconds = {}
+        # the number of times each action returned each status, keyed by (action, status name)
+        self.statuses = {}
+
+    # records a call to an action, which returned result and took some number of seconds
+    def record(self, action, result, seconds):
+        self.calls[action] = self.calls.get(action, 0) + 1
+        self.seconds[action] = self.seconds.get(action, 0.) + seconds
+        # some actions, such as add_yield_for_roll, do not return a status
+        if isinstance(result, Statuses):
+            key = (action, result.name)
+            self.statuses[key] = self.statuses.get(key, 0) + 1
+
+    # the number of calls to an action which did not return ALL_GOOD
+    def get_rejections(self, action):
+        rejections = 0
+        for (name, status), count in self.statuses.items():
+            if name == action and status != Statuses.ALL_GOOD.name:
+                rejections += count
+        return rejections
+
+    # adds the counts from other to these counters, ex: to total up several games
+    # returns these counters
+    def merge(self, other):
+        for action, calls in other.calls.items():
+            self.calls[action] = self.calls.get(action, 0) + calls
+        for action, seconds in other.seconds.items():
+            self.seconds[action] = self.seconds.get(action, 0.) + seconds
+        for key, count in other.statuses.items():
+            self.statuses[key] = self.statuses.get(key, 0) + count
+        return self
+
+    # returns the counters as a dict from each action to its calls, rejections, seconds and statuses
+    def dict(self):
+        d = {}
+        for action in sorted(self.calls):
+            d[action] = {
+                "calls": self.calls[action],
+                "rejections": self.get_rejections(action),
+                "seconds": self.seconds.get(action, 0.),
+                "statuses": dict((status, count) for (name, status), count in sorted(self.statuses.items()) if name == action)
+            }
+        return d
+
+    # returns the counters in the Prometheus text exposition format
+    def to_prometheus(self, prefix="pycatan"):
+        lines = []
+
+        def metric(name, help_text):
+            lines.append("# HELP %s_%s %s" % (prefix, name, help_text))
+            lines.append("# TYPE %s_%s counter" % (prefix, name))
+
+        metric("action_calls_total", "Number of calls to each game action.")
+        for action in sorted(self.calls):
+            lines.append('%s_action_calls_total{action="%s"} %d' % (prefix, action, self.calls[action]))
+        metric("action_seconds_total", "Wall time spent in each game action, in seconds.")
+        for action in sorted(self.seconds):
+            lines.append('%s_action_seconds_total{action="%s"} %r' % (prefix, action, self.seconds[action]))
+        metric("action_statuses_total", "Number of times each game action returned each status.")
+        for (action, status), count in sorted(self.statuses.items()):
+            lines.append('%s_action_statuses_total{action="%s",status="%s"} %d' % (prefix, action, status, count))
+
+        return "\n".join(lines) + "\n"
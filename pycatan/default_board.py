@@ -3,59 +3,147 @@ from pycatan.tile import Tile
 from pycatan.point import Point
 from pycatan.tile_type import TileType
 from pycatan.harbor import Harbor, HarborType
+from pycatan.building import Road
+from pycatan.legality import Legality
 
 import math
+import operator
 import random
 
 # The default, tileagonal board filled with random tiles and tokens
 class DefaultBoard(Board):
 
-    def __init__(self, game):
+    # The shape of the board, shared by every DefaultBoard
+    # Set the first time a DefaultBoard is made
+    topology = None
+
+    def __init__(self, game, layout=None):
         super(DefaultBoard, self).__init__(game)
 
-        # Set tiles
-        tile_deck = Board.get_shuffled_tile_deck()
-        token_deck = Board.get_shuffled_tile_nums()
+        topology = DefaultBoard.get_topology()
+
+        # Add tiles
+        # their types and tokens are set by set_layout
         temp_tiles = []
-        for r in range(5):
-            temp_tiles.append([])
-            for i in range([3, 4, 5, 4, 3][r]):
-                # Add a tile
-                new_tile = Tile(type=tile_deck.pop(), token_num=None, position=[r, i], points=[])
-                temp_tiles[-1].append(new_tile)
-                # Remove the token if it is the desert
-                if new_tile.type == TileType.Desert:
-                    self.robber = new_tile
-                else:
-                    new_tile.token_num = token_deck.pop()
+        # the position tuples are shared with the topology
+        for position in topology.tile_positions:
+            if position[0] == len(temp_tiles):
+                temp_tiles.append([])
+            temp_tiles[-1].append(Tile(type=None, token_num=None, position=position, points=(), id=topology.tile_indexes[position]))
 
         self.tiles = tuple(map(lambda x: tuple(x), temp_tiles))
+        self.all_tiles = tuple(t for row in self.tiles for t in row)
+        all_tiles = self.get_all_tiles()
 
         # Add points
         temp_points = []
-        for r in range(6):
-            temp_points.append([])
-            for i in range([7, 9, 11, 11, 9, 7][r]):
-                point = Point(tiles=[], position=[r, i])
-                temp_points[-1].append(point)
-                # Set point/tile relations
-                for pos in DefaultBoard.get_tile_indexes_for_point(r, i):
-                    point.tiles.append(self.tiles[pos[0]][pos[1]])
-                    self.tiles[pos[0]][pos[1]].points.append(point)
-
+        for position in topology.point_positions:
+            if position[0] == len(temp_points):
+                temp_points.append([])
+            temp_points[-1].append(Point(tiles=(), position=position, id=topology.point_indexes[position]))
 
         self.points = tuple(map(lambda x: tuple(x), temp_points))
-        # Set the connected points for each point
-        # Must be done after initializing each point so that the point object exists
-        for r in self.points:
-            for p in r:
-                p.connected_points = self.get_connected_points(p.position[0], p.position[1])
-        # adds a harbor for each points in the pattern 2 3 2 2 3 2 etc
-        outside_points = DefaultBoard.get_outside_points()
-        # the pattern of spaces between harbors
-        pattern = [1, 2, 1]
-        # the current index of pattern
-        index = 0
+        self.all_points = tuple(p for row in self.points for p in row)
+        all_points = self.get_all_points()
+        self.edges = tuple((all_points[p], all_points[q]) for p, q in topology.edges)
+
+        # Set point/tile relations and the connected points for each point
+        for n, point in enumerate(all_points):
+            point.tiles = tuple([all_tiles[t] for t in topology.point_tiles[n]])
+            point.connected_points = tuple([all_points[p] for p in topology.point_neighbours[n]])
+        for n, tile in enumerate(all_tiles):
+            tile.points = tuple([all_points[p] for p in topology.tile_points[n]])
+
+        # adds a harbor on each harbor slot
+        for p_one, p_two in topology.harbor_slots:
+            harbor = Harbor(
+                point_one = all_points[p_one],
+                point_two = all_points[p_two],
+                type = None,
+                board = self)
+            self.harbors.append(harbor)
+            all_points[p_one].harbor = harbor
+            all_points[p_two].harbor = harbor
+
+        self.legality = Legality(topology)
+
+        if layout == None:
+            layout = DefaultBoard.get_random_layout()
+        self.set_layout(layout)
+
+    # Returns a copy of the board for another game, see Game.fork
+    # The positions, layout and production entries are shared since they are never changed in place,
+    # but the tiles, points and harbors are copied since they refer to each other and to the buildings
+    def fork(self, game):
+        topology = DefaultBoard.get_topology()
+        board = DefaultBoard.__new__(DefaultBoard)
+        Board.__init__(board, game)
+
+        all_tiles = [Tile(t.type, t.token_num, t.position, (), t.id) for t in self.all_tiles]
+        all_points = [Point((), p.position, p.id) for p in self.all_points]
+        for tile, get_points in zip(all_tiles, topology.tile_points_getters):
+            tile.points = get_points(all_points)
+        for point, get_tiles, get_neighbours in zip(all_points, topology.point_tiles_getters, topology.point_neighbours_getters):
+            point.tiles = get_tiles(all_tiles)
+            point.connected_points = get_neighbours(all_points)
+        board.tiles = topology.tile_rows(all_tiles)
+        board.points = topology.point_rows(all_points)
+        board.all_tiles = tuple(all_tiles)
+        board.all_points = tuple(all_points)
+        board.edges = tuple((all_points[p], all_points[q]) for p, q in topology.edges)
+
+        point_indexes = topology.point_indexes
+        tile_indexes = topology.tile_indexes
+        for building in self.get_buildings():
+            point = all_points[point_indexes[building.point.position]]
+            point.building = building.__class__(building.owner, point)
+            board.buildings.setdefault(building.owner, {})[point] = point.building
+        # index_road adds the roads to the bitboards again, which does not change them
+        board.legality = self.legality.copy()
+        for road in self.roads:
+            board.index_road(Road(road.owner, all_points[point_indexes[road.point_one.position]],
+                all_points[point_indexes[road.point_two.position]]))
+        for h in self.harbors:
+            harbor = Harbor(
+                point_one = all_points[point_indexes[h.point_one.position]],
+                point_two = all_points[point_indexes[h.point_two.position]],
+                type = h.type,
+                board = board)
+            board.harbors.append(harbor)
+            harbor.point_one.harbor = harbor
+            harbor.point_two.harbor = harbor
+
+        board.production = dict(self.production)
+        for tile, owners in self.tile_owners.items():
+            board.tile_owners[all_tiles[tile_indexes[tile.position]]] = owners
+        for roll, tiles in self.tiles_by_token.items():
+            board.tiles_by_token[roll] = [all_tiles[tile_indexes[t.position]] for t in tiles]
+        # the robber may be set to something other than a tile
+        if isinstance(self.robber, Tile):
+            board._robber = all_tiles[tile_indexes[self.robber.position]]
+        else:
+            board._robber = self.robber
+
+        return board
+
+    # Returns a random layout for the board, in the format used by set_layout
+    # rng is the random number generator to shuffle with, see RandomStreams
+    @staticmethod
+    def get_random_layout(rng=random):
+        topology = DefaultBoard.get_topology()
+        tile_deck = Board.get_shuffled_tile_deck(rng)
+        token_deck = Board.get_shuffled_tile_nums(rng)
+
+        tiles = []
+        tokens = []
+        for t in topology.tile_positions:
+            tiles.append(tile_deck.pop())
+            # the desert does not get a token
+            if tiles[-1] == TileType.Desert:
+                tokens.append(None)
+            else:
+                tokens.append(token_deck.pop())
+
         # the different types of harbors
         harbor_types = [
             HarborType.Wood,
@@ -69,30 +157,41 @@ class DefaultBoard(Board):
             HarborType.Any
         ]
         # Shuffles the harbors
-        random.shuffle(harbor_types)
-        # Run loop until harbor_types is empty
-        while harbor_types:
-            # Create a new harbor
-            p_one = outside_points.pop()
-            p_two = outside_points.pop()
-            harbor = Harbor(
-                point_one = self.points[p_one[0]][p_one[1]],
-                point_two = self.points[p_two[0]][p_two[1]],
-                type = harbor_types.pop())
-            # Add it to harbors
-            self.harbors.append(harbor)
-            # Remove the unused points from outside_points
-            for _ in range(pattern[index % len(pattern)]):
-                outside_points.pop()
-            # Use next pattern value for number of points inbetween next time
-            index += 1
+        rng.shuffle(harbor_types)
+        harbors = [harbor_types.pop() for slot in topology.harbor_slots]
+
+        return {"tiles": tiles, "tokens": tokens, "harbors": harbors}
 
-        # puts the robber on the desert tile to start
-        for r in range(len(temp_tiles)):
-            # checks if this row has the desert
-            if temp_tiles[r].count(TileType.Desert) > 0:
-                # places the robber
-                self.robber = [r, temp_tiles[r].index(TileType.Desert)]
+    # Returns the tile types, tokens and harbor types on the board
+    # The tiles and tokens are in the same order as get_all_tiles, and the harbors are in the same order as harbors
+    def get_layout(self):
+        all_tiles = self.get_all_tiles()
+        return {
+            "tiles": [t.type for t in all_tiles],
+            "tokens": [t.token_num for t in all_tiles],
+            "harbors": [h.type for h in self.harbors]
+        }
+
+    # Sets the tile types, tokens and harbor types, in the format returned by get_layout
+    # and puts the robber on the desert
+    def set_layout(self, layout):
+        for tile, tile_type, token_num in zip(self.get_all_tiles(), layout["tiles"], layout["tokens"]):
+            tile.type = tile_type
+            tile.token_num = token_num
+            if tile_type == TileType.Desert:
+                self.robber = tile
+
+        for harbor, harbor_type in zip(self.harbors, layout["harbors"]):
+            harbor.type = harbor_type
+
+        self.reindex_production()
+
+    # Returns the shape of the board, which is computed once and then reused
+    @staticmethod
+    def get_topology():
+        if DefaultBoard.topology == None:
+            DefaultBoard.topology = DefaultBoardTopology()
+        return DefaultBoard.topology
 
     # Returns the indexes of the tiles connected to a certain points
     # on the default, tileagonal Catan board
@@ -159,32 +258,42 @@ class DefaultBoard(Board):
 
     # gets the points that are connected to the point given
     def get_connected_points(self, r, i):
+        return [self.points[pos[0]][pos[1]] for pos in DefaultBoard.get_connected_positions(r, i)]
+
+    # returns the id of the edge between two points, or None if they are not connected
+    def get_edge_id(self, p1, p2):
+        return DefaultBoard.get_topology().edge_indexes.get((p1.id, p2.id))
+
+    # gets the positions of the points that are connected to the point at r, i
+    @staticmethod
+    def get_connected_positions(r, i):
+        row_lengths = DefaultBoardTopology.point_row_lengths
         to_return = []
         # Get the point to the left and the right
         if i > 0:
-            to_return.append(self.points[r][i - 1])
+            to_return.append([r, i - 1])
 
-        if i < len(self.points[r]) - 1:
-            to_return.append(self.points[r][i + 1])
+        if i < row_lengths[r] - 1:
+            to_return.append([r, i + 1])
 
         # Get the point above and below
         # First, if the point is in the center two rows, the connected point
         # is either directly above/below this point
         if r == 2 and i % 2 == 0:
-            to_return.append(self.points[r + 1][i])
+            to_return.append([r + 1, i])
         elif r == 3 and i % 2 == 0:
-            to_return.append(self.points[r - 1][i])
+            to_return.append([r - 1, i])
         # If the point is not in the 2 center rows, the point will have an offset
-        elif r < len(self.points) / 2:
+        elif r < len(row_lengths) / 2:
             if i % 2 == 0:
-                to_return.append(self.points[r + 1][i + 1])
+                to_return.append([r + 1, i + 1])
             elif r > 0 and i > 0:
-                to_return.append(self.points[r - 1][i - 1])
+                to_return.append([r - 1, i - 1])
         else:
             if i % 2 == 0:
-                to_return.append(self.points[r - 1][i + 1])
-            elif r < len(self.points) - 1 and i > 0:
-                to_return.append(self.points[r + 1][i - 1])
+                to_return.append([r - 1, i + 1])
+            elif r < len(row_lengths) - 1 and i > 0:
+                to_return.append([r + 1, i - 1])
         return to_return
 
     # Get the points along the outside of the board, in clockwise order
@@ -228,3 +337,103 @@ class DefaultBoard(Board):
         outside_points.extend(reversed(left))
         # Return them
         return outside_points
+
+# The tiles, points, roads and harbor spots of the default board, and how they are connected
+# Each tile and point is referred to by its index in tile_positions/point_positions,
+# which go row by row from the top left
+class DefaultBoardTopology(object):
+
+    # The number of tiles/points in each row
+    tile_row_lengths = (3, 4, 5, 4, 3)
+    point_row_lengths = (7, 9, 11, 11, 9, 7)
+
+    def __init__(self):
+        # The position (r, i) of each tile and point
+        self.tile_positions = tuple((r, i) for r in range(len(self.tile_row_lengths)) for i in range(self.tile_row_lengths[r]))
+        self.point_positions = tuple((r, i) for r in range(len(self.point_row_lengths)) for i in range(self.point_row_lengths[r]))
+        # The index of each position
+        self.tile_indexes = dict((pos, n) for n, pos in enumerate(self.tile_positions))
+        self.point_indexes = dict((pos, n) for n, pos in enumerate(self.point_positions))
+
+        # The tiles around each point and the points around each tile
+        point_tiles = []
+        tile_points = [[] for t in self.tile_positions]
+        for n, (r, i) in enumerate(self.point_positions):
+            tiles = tuple(self.tile_indexes[tuple(pos)] for pos in DefaultBoard.get_tile_indexes_for_point(r, i))
+            point_tiles.append(tiles)
+            for t in tiles:
+                tile_points[t].append(n)
+        self.point_tiles = tuple(point_tiles)
+        self.tile_points = tuple(map(tuple, tile_points))
+
+        # The points connected to each point
+        self.point_neighbours = tuple(
+            tuple(self.point_indexes[tuple(pos)] for pos in DefaultBoard.get_connected_positions(r, i))
+            for r, i in self.point_positions)
+        # Every place a road can go, as the indexes of its two points
+        self.edges = tuple((p, q) for p in range(len(self.point_positions)) for q in self.point_neighbours[p] if p < q)
+        # The index of the edge between two points, in both orders
+        self.edge_indexes = {}
+        for n, (p, q) in enumerate(self.edges):
+            self.edge_indexes[(p, q)] = n
+            self.edge_indexes[(q, p)] = n
+        # The edges touching each point
+        self.point_edges = tuple(
+            tuple(self.edge_indexes[(p, q)] for q in self.point_neighbours[p])
+            for p in range(len(self.point_positions)))
+
+        # The same relations as bitmasks, see Legality
+        # bit n of a point mask is point n, and bit n of an edge mask is edge n
+        self.all_points_mask = (1 << len(self.point_positions)) - 1
+        self.point_neighbour_masks = tuple(sum(1 << q for q in neighbours) for neighbours in self.point_neighbours)
+        self.point_edge_masks = tuple(sum(1 << e for e in edges) for edges in self.point_edges)
+        self.edge_point_masks = tuple((1 << p) | (1 << q) for p, q in self.edges)
+
+        # Functions which take a flat list of tiles/points and return the ones around each tile/point as a tuple,
+        # used to quickly link up a copy of a board
+        self.tile_points_getters = tuple(map(DefaultBoardTopology.getter, self.tile_points))
+        self.point_tiles_getters = tuple(map(DefaultBoardTopology.getter, self.point_tiles))
+        self.point_neighbours_getters = tuple(map(DefaultBoardTopology.getter, self.point_neighbours))
+
+        # The points along the outside of the board, in clockwise order
+        self.outside_points = tuple(self.point_indexes[tuple(pos)] for pos in DefaultBoard.get_outside_points())
+
+        # The pairs of points which get a harbor
+        # in the pattern 2 3 2 2 3 2 etc
+        outside_points = list(self.outside_points)
+        # the pattern of spaces between harbors
+        pattern = [1, 2, 1]
+        harbor_slots = []
+        for index in range(9):
+            p_one = outside_points.pop()
+            p_two = outside_points.pop()
+            harbor_slots.append((p_one, p_two))
+            # Remove the unused points from outside_points
+            for _ in range(pattern[index % len(pattern)]):
+                outside_points.pop()
+        self.harbor_slots = tuple(harbor_slots)
+
+    # returns a function which takes a list and returns the items at some indexes as a tuple
+    @staticmethod
+    def getter(indexes):
+        if len(indexes) == 1:
+            index = indexes[0]
+            return lambda items: (items[index],)
+        return operator.itemgetter(*indexes)
+
+    # splits a flat list of tiles into a tuple of rows
+    def tile_rows(self, items):
+        return DefaultBoardTopology.rows(items, self.tile_row_lengths)
+
+    # splits a flat list of points into a tuple of rows
+    def point_rows(self, items):
+        return DefaultBoardTopology.rows(items, self.point_row_lengths)
+
+    @staticmethod
+    def rows(items, lengths):
+        rows = []
+        start = 0
+        for length in lengths:
+            rows.append(tuple(items[start:start + length]))
+            start += length
+        return tuple(rows)
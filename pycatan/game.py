@@ -3,7 +3,8 @@ from pycatan.player import Player
 from pycatan.statuses import Statuses
 from pycatan.card import ResCard, DevCard
 from pycatan.building import *
-from pycatan.harbor import Harbor
+from pycatan.undo import undoable
+from pycatan.random_streams import RandomStreams
 
 import json
 import logging
@@ -17,10 +18,14 @@ class CatanError(Exception):
 class Game:
 
     # initializes the  game
-    def __init__(self, log=None, num_of_players=3, on_win=None, starting_board=False, points_to_win=10):
+    # seed seeds the game's own random number generators (see RandomStreams),
+    # if it is not given the game uses the random module
+    def __init__(self, log=None, num_of_players=3, on_win=None, starting_board=False, points_to_win=10, seed=None):
         self.log = log
+        # the random number generators for the layout, dice, developement deck and steals
+        self.rng = RandomStreams(seed)
         # creates a board
-        self.board = DefaultBoard(game=self);
+        self.board = DefaultBoard(game=self, layout=DefaultBoard.get_random_layout(self.rng.layout));
         # creates players
         self.players = []
         for i in range(num_of_players):
@@ -31,41 +36,225 @@ class Game:
         # Set onWin method
         self.on_win = on_win
         # creates a new Developement deck
-        self.dev_deck = []
+        self.dev_deck = Game.get_shuffled_dev_deck(self.rng.dev_deck)
+        # the longest road owner and largest army owner
+        self.longest_road_owner = None
+        self.largest_army = None
+        # whether the game has finished or not
+        self.has_ended = False
+        self.winner = None
+        # the snapshots taken before each action, used by undo
+        # None unless the game is recording (see mark)
+        self.undo_stack = None
+        # goes up by one after every action, so that results can be cached until the game changes
+        self.version = 0
+        # the last result of legal_actions for each player
+        self.legal_actions_cache = {}
+        # counts the calls to each action if it is set to an ActionCounters
+        # None by default, since counting has a small cost
+        self.counters = None
+
+    # puts the game back to the start so that the Game object can be reused
+    # seed gives the game new random number generators, so that the game is the same as
+    # making a new Game with that seed, otherwise the current ones carry on
+    # layout is the layout to use for the board (see DefaultBoard.get_layout),
+    # if it is not given a new random one is used
+    def reset(self, seed=None, layout=None):
+        if seed != None:
+            self.rng = RandomStreams(seed)
+        if layout == None:
+            layout = self.board.get_random_layout(self.rng.layout)
+        self.board.reset(layout)
+
+        for p in self.players:
+            p.reset()
+        self.currentPlayer = None
+
+        self.dev_deck = Game.get_shuffled_dev_deck(self.rng.dev_deck)
+        self.longest_road_owner = None
+        self.largest_army = None
+        self.has_ended = False
+        self.winner = None
+        self.undo_stack = None
+        self.version += 1
+
+    # returns an independent copy of the game, ex: to try out moves without changing this game
+    # the copy does not log, call on_win or count actions, and its players have no controllers
+    def fork(self):
+        game = Game.__new__(Game)
+        # copies the simple values, such as points_to_win and rolled_dice
+        game.__dict__.update(self.__dict__)
+        game.log = None
+        game.on_win = None
+        game.undo_stack = None
+        game.legal_actions_cache = {}
+        # the fork's dice, steals etc. carry on the same way as this game's would, without changing them
+        game.rng = self.rng.copy()
+        # lookahead in a fork should not be counted as actions in this game
+        game.counters = None
+
+        game.board = self.board.fork(game)
+        point_map = dict(zip(self.board.get_all_points(), game.board.get_all_points()))
+        game.players = [p.fork(game, point_map) for p in self.players]
+
+        def fork_player(player):
+            return None if player == None else game.players[player.num]
+        game.currentPlayer = fork_player(self.currentPlayer)
+        game.longest_road_owner = fork_player(self.longest_road_owner)
+        game.largest_army = fork_player(self.largest_army)
+        game.winner = fork_player(self.winner)
+        game.dev_deck = list(self.dev_deck)
+        return game
+
+    # starts recording the actions so that they can be undone, if the game is not recording already
+    # returns a mark which undo_to can go back to
+    def mark(self):
+        if self.undo_stack == None:
+            self.undo_stack = []
+        return len(self.undo_stack)
+
+    # undoes the last action, putting the game back exactly how it was before it
+    def undo(self):
+        if not self.undo_stack:
+            return Statuses.ERR_INPUT
+        self.undo_stack.pop().restore(self)
+        self.version += 1
+        return Statuses.ALL_GOOD
+
+    # undoes every action since mark was returned by Game.mark
+    def undo_to(self, mark):
+        if self.undo_stack == None or not 0 <= mark <= len(self.undo_stack):
+            return Statuses.ERR_INPUT
+        if mark < len(self.undo_stack):
+            # each snapshot only saved what its action could change, so every one is restored, newest first
+            snapshots = self.undo_stack[mark:]
+            del self.undo_stack[mark:]
+            for snapshot in reversed(snapshots):
+                snapshot.restore(self)
+            self.version += 1
+        return Statuses.ALL_GOOD
+
+    # returns every action the player can take right now, as a dict from the action to its possible arguments
+    # an action is only in the dict if it can be taken:
+    #   "build_road": the (start, end) points of every place a road can go
+    #   "build_settlement": the points a settlement can go on
+    #   "upgrade_settlement": the points of the player's settlements
+    #   "build_dev": None
+    #   "trade_to_bank": (card, number of cards needed) for each card the player can trade in,
+    #                    using the best harbor they have
+    #   "use_dev_card": a dict from each card the player can play to its possible arguments:
+    #                   Knight: (robber_tile, victim) pairs, best first (see Board.robber_candidates),
+    #                   Road: the roads it can build from (see "build_road"),
+    #                   Monopoly and YearOfPlenty: the resource cards
+    # the result is cached until the next action on the game or a change to the player's cards,
+    # so it should not be changed
+    def legal_actions(self, player):
+        key = (self.version, tuple(player.res_counts), tuple(player.dev_counts), len(self.dev_deck),
+               player.num_roads, player.num_settlements, player.num_cities)
+        cached = self.legal_actions_cache.get(player.num)
+        if cached != None and cached[0] == key:
+            return cached[1]
+
+        actions = self.find_legal_actions(player)
+        self.legal_actions_cache[player.num] = (key, actions)
+        return actions
+
+    # works out the result of legal_actions, using the players' settlement points and road frontiers
+    def find_legal_actions(self, player):
+        board = self.board
+        num = player.num
+        affordable = player.affordable()
+
+        settlements = []
+        for point, building in board.buildings.get(num, {}).items():
+            if building.type == BuildingType.Settlement:
+                settlements.append(point)
+        roads = player.road_frontier
+
+        actions = {}
+        if affordable["road"] and player.num_roads > 0 and roads:
+            actions["build_road"] = roads
+        if affordable["settlement"] and player.num_settlements > 0:
+            # settlement_points is worked out from the bitboards each time, so it is only read once
+            settlement_points = player.settlement_points
+            if settlement_points:
+                actions["build_settlement"] = settlement_points
+        if affordable["city"] and player.num_cities > 0 and settlements:
+            actions["upgrade_settlement"] = tuple(settlements)
+        if affordable["dev"] and self.dev_deck:
+            actions["build_dev"] = None
+
+        rates = player.trade_rates
+        trades = tuple((c, rates[c.value]) for c in ResCard if player.res_counts[c.value] >= rates[c.value])
+        if trades:
+            actions["trade_to_bank"] = trades
+
+        dev_cards = {}
+        if player.dev_counts[DevCard.Knight.value] > 0:
+            # the best tiles and victims come first, see Board.robber_candidates
+            targets = []
+            for score, tile, victims in board.robber_candidates(player):
+                for victim in victims:
+                    targets.append((tile, victim))
+                targets.append((tile, None))
+            dev_cards[DevCard.Knight] = tuple(targets)
+        if player.dev_counts[DevCard.Road.value] > 0 and player.num_roads >= 2 and len(roads) >= 2:
+            dev_cards[DevCard.Road] = roads
+        if player.dev_counts[DevCard.Monopoly.value] > 0:
+            dev_cards[DevCard.Monopoly] = tuple(ResCard)
+        if player.dev_counts[DevCard.YearOfPlenty.value] > 0:
+            dev_cards[DevCard.YearOfPlenty] = tuple(ResCard)
+        if dev_cards:
+            actions["use_dev_card"] = dev_cards
+
+        return actions
+
+    # returns a shuffled developement deck
+    # rng is the random number generator to shuffle with, see RandomStreams
+    @staticmethod
+    def get_shuffled_dev_deck(rng=random):
+        dev_deck = []
         for i in range(14):
             # Add 2 Road, Monopoly and Year of Plenty cards
             if i < 2:
-                self.dev_deck.append(DevCard.Road)
-                self.dev_deck.append(DevCard.Monopoly)
-                self.dev_deck.append(DevCard.YearOfPlenty)
+                dev_deck.append(DevCard.Road)
+                dev_deck.append(DevCard.Monopoly)
+                dev_deck.append(DevCard.YearOfPlenty)
             # Add 5 Victory Point cards
             if i < 5:
-                self.dev_deck.append(DevCard.VictoryPoint)
+                dev_deck.append(DevCard.VictoryPoint)
             # Add 14 knight cards
-            self.dev_deck.append(DevCard.Knight)
+            dev_deck.append(DevCard.Knight)
         # Shuffle the developement deck
-        random.shuffle(self.dev_deck)
-        # the longest road owner and largest army owner
-        self.longest_road_owner = None
-        self.largest_army = None
-        # whether the game has finished or not
-        self.has_ended = False
-        self.winner = None
+        rng.shuffle(dev_deck)
+        return dev_deck
 
 
     # creates a new settlement belong to the player at the coodinates
+    @undoable(roads=True)
     def add_settlement(self, player, point, is_starting=False):
+        # the point can also be given by its id
+        point = self.board.resolve_point(point)
         # builds the settlement
         status = player.build_settlement(point=point, is_starting=is_starting)
         # If successful, check if the player has now won
         if status == Statuses.ALL_GOOD:
           if self.log: self.log.log_player_buys_settlement(player, point)
-          self.check_for_win()
+          # the settlement may have cut somebody's longest road
+          self.set_longest_road()
+          self.check_for_win(player)
 
         return status
 
     # builds a road going from point start to point end
-    def add_road(self, player, start, end, is_starting=False):
+    # the points can also be given by their ids, or the road by the id of its edge with end left out
+    @undoable(roads=True)
+    def add_road(self, player, start, end=None, is_starting=False):
+        if end == None:
+            start, end = self.board.edges[start]
+        else:
+            start = self.board.resolve_point(start)
+            end = self.board.resolve_point(end)
         # builds the road
         stat = player.build_road(start=start, end=end, is_starting=is_starting)
         # checks for a new longest road segment
@@ -75,6 +264,7 @@ class Game:
         return stat
 
     # builds a new developement cards for the player
+    @undoable()
     def build_dev(self, player):
         # makes sure there is still at least one development card left
         if len(self.dev_deck) < 1:
@@ -96,16 +286,18 @@ class Game:
         del self.dev_deck[0]
 
         if card == DevCard.VictoryPoint:
-          self.check_for_win()
+          self.check_for_win(player)
         if self.log: self.log.log_player_buys_dev_card(player)
 
         return Statuses.ALL_GOOD
 
     # gives players the proper cards for a given roll
+    @undoable()
     def add_yield_for_roll(self, roll):
         self.board.add_yield(roll)
 
     # trades cards (given in an array) between two players
+    @undoable()
     def trade(self, player_one, player_two, cards_one, cards_two):
         # check if they players have the cards they are trading
         # Needs to do this before deleting because one might have the cards while the other does not
@@ -127,22 +319,15 @@ class Game:
     # moves the robber
     # Note that player is the player moving the robber
     # and victim is the player whose card is being taken
+    @undoable(rng=True)
     def move_robber(self, tile, player, victim):
         logging.debug("move_robber %s %s %s" % (tile, player, victim))
+        # the tile can also be given by its id
+        tile = self.board.resolve_tile(tile)
         # checks the player wants to take a card from somebody
         if victim != None:
-            # checks the victim has a settlement on the tile
-            has_settlement = False
-            # Iterate over points and check if there is a settlement/city on any of them
-            #points = self.board.get_connected_points(tile.position[0], tile.position[1])
-            points = tile.points
-            for p in points:
-                if p != None and p.building != None:
-                    # Check the victim owns the settlement/city
-                    if p.building.owner == victim.get_num():
-                        has_settlement = True
-
-            if not has_settlement:
+            # checks the victim has a settlement/city on the tile
+            if victim.get_num() not in self.board.tile_owners.get(tile, {}):
                 return Statuses.ERR_INPUT
 
         # moves the robber
@@ -151,8 +336,8 @@ class Game:
         # takes a random card from the victim
         if victim != None:
             # removes a random card from the victim
-            if victim.cards:
-              card = random.choice(victim.cards)
+            card = victim.get_random_card(self.rng.steal)
+            if card != None:
               victim.remove_cards([card])
               # adds it to the player
               player.add_cards([card])
@@ -165,6 +350,7 @@ class Game:
 
     # trades cards from a player to the bank
     # either by 4 for 1 or using a harbor
+    @undoable()
     def trade_to_bank(self, player, cards, request):
         # makes sure the player has the cards
         if not player.has_cards(cards):
@@ -174,22 +360,9 @@ class Game:
         for c in cards[1:]:
             if c != card_type:
                 return Statuses.ERR_CARDS
-        # if there are not four cards
-        if len(cards) != 4:
-            # checks if the player has a settlement on the right type of harbor
-            has_harbor = False
-            harbor_types = player.get_connected_harbor_types()
-            print(harbor_types)
-            for h_type in harbor_types:
-                if Harbor.get_card_from_harbor_type(h_type) == card_type and len(cards) == 2:
-                    has_harbor = True
-                    break
-                elif Harbor.get_card_from_harbor_type(h_type) == None and len(cards) == 3:
-                    has_harbor = True
-                    break
-
-            if not has_harbor:
-                return Statuses.ERR_HARBOR
+        # checks the player has a settlement on the right type of harbor if there are fewer than four cards
+        if len(cards) < player.trade_rates[card_type.value] or len(cards) > 4:
+            return Statuses.ERR_HARBOR
 
         # removes cards
         player.remove_cards(cards)
@@ -202,25 +375,39 @@ class Game:
         return Statuses.ALL_GOOD
 
     # gives the longest road to the correct player
+    # using the lengths kept up to date by each player's road network
     def set_longest_road(self):
-        # The length of the current longest road segment
-        longest = 0
         owner = self.longest_road_owner
+        # The length of the current longest road segment
+        longest = max(p.longest_road_length for p in self.players)
 
-        for p in self.players:
+        # the current owner keeps it as long as nobody has a longer road
+        if owner == None or owner.longest_road_length < longest:
+            leaders = [p for p in self.players if p.longest_road_length == longest]
             # longest road needs to be longer than anbody else's
             # and at least 5 road segments long
-            if p.longest_road_length > longest and p.longest_road_length >= 5:
-                longest = p.longest_road_length
-                owner = p
+            if longest >= 5 and len(leaders) == 1:
+                owner = leaders[0]
+            else:
+                owner = None
+
+        if owner != None and owner.longest_road_length < 5:
+            owner = None
 
         if self.longest_road_owner != owner:
+            if self.longest_road_owner != None:
+                self.longest_road_owner.public_points -= 2
             self.longest_road_owner = owner
-            # checks if the player has won now that they has longest road
-            self.check_for_win()
-
-    def check_for_win(self):
-      for player in self.players:
+            if owner != None:
+                owner.public_points += 2
+                # checks if the player has won now that they has longest road
+                self.check_for_win(owner)
+
+    # checks if a player has won, and ends the game if they have
+    # only the player whose score changed needs to be checked, every player is checked if it is not given
+    def check_for_win(self, player=None):
+      players = self.players if player == None else (player,)
+      for player in players:
         if player.get_VP(include_dev=True) >= self.points_to_win:
           self.has_ended = True
           self.winner = player
@@ -228,18 +415,21 @@ class Game:
       return False
 
     # changes a settlement on the board for a city
+    @undoable()
     def upgrade_settlement(self, point, player):
+        point = self.board.resolve_point(point)
         status = self.board.upgrade_settlement(player, point)
 
         if status == Statuses.ALL_GOOD:
             # checks if the player won
             if self.log: self.log.log_player_buys_city(player, point)
-            self.check_for_win()
+            self.check_for_win(player)
 
         return status
 
     # uses a developement card
     # the required args will vary between different dev cards
+    @undoable(roads=True, rng=True)
     def use_dev_card(self, player, card, args):
         # checks the player has the development card
         if not player.has_dev_cards([card]):
@@ -299,8 +489,11 @@ class Game:
                         return location_status
 
             # builds the roads
+            if player.num_roads < len(road_names):
+                return Statuses.ERR_OUTOFBUILDINGS
             for r in road_names:
-                self.board.add_road(Road(owner=player.get_num(), point_one=args[r]["start"], point_two=args[r]["end"]))
+                player.place_road(args[r]["start"], args[r]["end"])
+            self.set_longest_road()
 
             self.played_devcard = True
             if self.log: self.log.log_player_plays_road_builder(player, (args[road_names[0]]["start"], args[road_names[0]]["end"]), (args[road_names[1]]["start"], args[road_names[1]]["end"]))
@@ -335,29 +528,27 @@ class Game:
                 # if nobody has the largest army, the player needs at least 3 cards
                 if player.knight_cards >= 3:
                     self.largest_army = player
+                    player.public_points += 2
 
-            else:
+            elif self.largest_army is not player:
                 # the player needs to have more than anybody else
                 current_longest = self.largest_army.knight_cards
 
                 if player.knight_cards > current_longest:
+                    self.largest_army.public_points -= 2
                     self.largest_army = player
+                    player.public_points += 2
             self.played_devcard = True
-            self.check_for_win()
+            self.check_for_win(player)
 
         elif card == DevCard.Monopoly:
             # gets the type of card
             card_type = args['card_type']
             # for each player, checks if they have the card
             for p in self.players:
-                if p.has_cards([card_type]):
-                    # gets how many this player has
-                    number_of_cards = p.cards.count(card_type)
-                    cards_to_give = [card_type] * number_of_cards
-                    # removes the cards
-                    p.remove_cards(cards_to_give)
-                    # adds them to the user's cards
-                    player.add_cards(cards_to_give)
+                if p is not player:
+                    # takes all of them and gives them to the player
+                    player.add_card(card_type, p.remove_all_cards(card_type))
             self.played_devcard = True
             if self.log: self.log.log_player_plays_monopoly(player, args["card_type"])
 
@@ -391,21 +582,30 @@ class Game:
     def get_roll(self):
       if self.rolled_dice: 
         raise CatanError(pycatan.Statuses.ERR_INPUT)
-      #roll = round(random.random() * 6) + round(random.random() * 6)
-      roll = random.randint(1,6) + random.randint(1,6)
+      roll = self.rng.roll()
       self.rolled_dice = True
       return roll
 
+    # returns the point at a position, given as r, i or [r, i], or with an id
     def get_point(self, i, j=None):
       if j is None:
+        if isinstance(i, int):
+          return self.board.all_points[i]
         return self.board.points[i[0]][i[1]]
       return self.board.points[i][j]
 
+    # returns the tile at a position, given as r, i or [r, i], or with an id
     def get_tile(self, i, j=None):
       if j is None:
+        if isinstance(i, int):
+          return self.board.all_tiles[i]
         return self.board.tiles[i[0]][i[1]]
       return self.board.tiles[i][j]
 
+    # returns the two points of the edge with an id
+    def get_edge(self, edge_id):
+      return self.board.edges[edge_id]
+
     def start_turn(self, player):
       if self.log: self.log.log_player_start_turn(player)
       self.currentPlayer = player
@@ -444,6 +644,9 @@ class Game:
         player.load(player_data)
 
       self.board.load(d['board'])
+      for player in self.players:
+        player.reindex_points()
+      self.version += 1
       
 class DefaultEncoder(json.JSONEncoder):
   def default(self, o):
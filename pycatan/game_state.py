@@ -0,0 +1,585 @@
+from pycatan.default_board import DefaultBoard
+from pycatan.board import Board
+from pycatan.building import Road, Settlement, City, BuildingType
+from pycatan.card import ResCard, DevCard, buildCosts
+from pycatan.road_network import RoadNetwork
+from pycatan.statuses import Statuses
+from pycatan.tile_type import TileType
+from pycatan.tile import Tile
+
+import random
+
+# the value used in the arrays for "nobody" / "nowhere"
+NONE = 255
+
+# the values in the point type array
+EMPTY = 0
+SETTLEMENT = 1
+CITY = 2
+
+# where each per-player value is, relative to the start of that player's block
+P_RES = 0
+P_DEV = 5
+P_NEW_DEV = 10
+P_KNIGHTS = 15
+P_ROADS = 16
+P_SETTLEMENTS = 17
+P_CITIES = 18
+P_ROAD_LENGTH = 19
+PLAYER_SIZE = 20
+
+# where each value is in the state, after the per-player blocks
+POINT_OWNER = 0
+POINT_TYPE = 54
+EDGE_OWNER = 108
+ROBBER = 180
+DEV_DECK = 181
+LONGEST_ROAD = 186
+LARGEST_ARMY = 187
+WINNER = 188
+PLAYERS = 189
+
+# The tiles, tokens and harbors of a board, in a form the state can use directly
+# Never changes, so it is shared between a state and all of its copies
+class StateLayout(object):
+    __slots__ = ("tiles", "tokens", "harbors", "tile_cards", "tiles_by_token")
+
+    def __init__(self, layout):
+        self.tiles = tuple(layout["tiles"])
+        self.tokens = tuple(layout["tokens"])
+        self.harbors = tuple(layout["harbors"])
+        # the value of the card each tile gives, or None for the desert
+        self.tile_cards = tuple(None if Board.get_card_from_tile(t) == None else Board.get_card_from_tile(t).value for t in self.tiles)
+        # the tiles for each token number
+        tiles_by_token = {}
+        for n, token in enumerate(self.tokens):
+            if token != None and self.tile_cards[n] != None:
+                tiles_by_token.setdefault(token, []).append(n)
+        self.tiles_by_token = dict((k, tuple(v)) for k, v in tiles_by_token.items())
+
+    # returns the layout in the format used by DefaultBoard.set_layout
+    def dict(self):
+        return {"tiles": list(self.tiles), "tokens": list(self.tokens), "harbors": list(self.harbors)}
+
+# A whole game of Catan stored in a single bytearray, for search and simulation
+# Points, edges and tiles are referred to by their index in DefaultBoard.get_topology(),
+# players by their number, and cards by their value
+# Counts are stored in a byte, so they cannot go over 255
+class GameState(object):
+    __slots__ = ("layout", "num_players", "points_to_win", "data")
+
+    def __init__(self, layout, num_players=3, points_to_win=10, data=None):
+        self.layout = layout
+        self.num_players = num_players
+        self.points_to_win = points_to_win
+        if data != None:
+            self.data = data
+            return
+
+        self.data = bytearray(PLAYERS + PLAYER_SIZE * num_players)
+        d = self.data
+        for n in range(54):
+            d[POINT_OWNER + n] = NONE
+        for n in range(72):
+            d[EDGE_OWNER + n] = NONE
+        d[ROBBER] = NONE
+        for n, tile_type in enumerate(layout.tiles):
+            if tile_type == TileType.Desert:
+                d[ROBBER] = n
+        # the number of each developement card in the deck
+        d[DEV_DECK + DevCard.Road.value] = 2
+        d[DEV_DECK + DevCard.Monopoly.value] = 2
+        d[DEV_DECK + DevCard.YearOfPlenty.value] = 2
+        d[DEV_DECK + DevCard.VictoryPoint.value] = 5
+        d[DEV_DECK + DevCard.Knight.value] = 14
+        d[LONGEST_ROAD] = NONE
+        d[LARGEST_ARMY] = NONE
+        d[WINNER] = NONE
+        for player in range(num_players):
+            base = PLAYERS + PLAYER_SIZE * player
+            d[base + P_ROADS] = 15
+            d[base + P_SETTLEMENTS] = 5
+            d[base + P_CITIES] = 4
+
+    def __repr__(self):
+        return "GameState(%s players)" % self.num_players
+
+    # returns an independent copy of the state, which shares the layout
+    def copy(self):
+        return GameState(self.layout, self.num_players, self.points_to_win, bytearray(self.data))
+
+    def to_bytes(self):
+        return bytes(self.data)
+
+    @staticmethod
+    def from_bytes(layout, data, num_players=3, points_to_win=10):
+        return GameState(layout, num_players, points_to_win, bytearray(data))
+
+    # Conversion ------------------------------------------------
+
+    # creates a state from a Game
+    @staticmethod
+    def from_game(game):
+        board = game.board
+        state = GameState(StateLayout(board.get_layout()), len(game.players), game.points_to_win)
+        d = state.data
+
+        # the state numbers the points, edges and tiles the same way as their ids
+        for building in board.get_buildings():
+            d[POINT_OWNER + building.point.id] = building.owner
+            d[POINT_TYPE + building.point.id] = CITY if building.type == BuildingType.City else SETTLEMENT
+        for road in board.roads:
+            d[EDGE_OWNER + board.get_edge_id(road.point_one, road.point_two)] = road.owner
+
+        # the robber may be set to something other than a tile
+        d[ROBBER] = NONE
+        if isinstance(board.robber, Tile):
+            d[ROBBER] = board.robber.id
+
+        for n in range(5):
+            d[DEV_DECK + n] = 0
+        for card in game.dev_deck:
+            d[DEV_DECK + card.value] += 1
+
+        for player in game.players:
+            base = PLAYERS + PLAYER_SIZE * player.num
+            d[base + P_RES:base + P_RES + 5] = bytes(player.res_counts)
+            d[base + P_DEV:base + P_DEV + 5] = bytes(player.dev_counts)
+            d[base + P_NEW_DEV:base + P_NEW_DEV + 5] = bytes(player.new_dev_counts)
+            d[base + P_KNIGHTS] = player.knight_cards
+            d[base + P_ROADS] = player.num_roads
+            d[base + P_SETTLEMENTS] = player.num_settlements
+            d[base + P_CITIES] = player.num_cities
+            d[base + P_ROAD_LENGTH] = player.longest_road_length
+
+        d[LONGEST_ROAD] = NONE if game.longest_road_owner == None else game.longest_road_owner.num
+        d[LARGEST_ARMY] = NONE if game.largest_army == None else game.largest_army.num
+        d[WINNER] = NONE if game.winner == None else game.winner.num
+        return state
+
+    # puts this state into a Game, creating a new one if it is not given
+    # the order of the developement deck is not stored, so it is shuffled
+    def to_game(self, game=None):
+        if game == None:
+            # imported here since game imports this module
+            from pycatan.game import Game
+            game = Game(num_of_players=self.num_players, points_to_win=self.points_to_win)
+        topology = DefaultBoard.get_topology()
+        d = self.data
+
+        game.reset(layout=self.layout.dict())
+        game.points_to_win = self.points_to_win
+        board = game.board
+        points = board.get_all_points()
+        tiles = board.get_all_tiles()
+
+        for n, point in enumerate(points):
+            owner = d[POINT_OWNER + n]
+            if owner != NONE:
+                if d[POINT_TYPE + n] == CITY:
+                    board.add_building(City(owner, point), point)
+                else:
+                    board.add_building(Settlement(owner, point), point)
+        for n, (p, q) in enumerate(topology.edges):
+            owner = d[EDGE_OWNER + n]
+            if owner != NONE:
+                board.add_road(Road(owner, points[p], points[q]))
+        board.robber = None if d[ROBBER] == NONE else tiles[d[ROBBER]]
+
+        for player in game.players:
+            base = PLAYERS + PLAYER_SIZE * player.num
+            player.res_counts = list(d[base + P_RES:base + P_RES + 5])
+            player.dev_counts = list(d[base + P_DEV:base + P_DEV + 5])
+            player.new_dev_counts = list(d[base + P_NEW_DEV:base + P_NEW_DEV + 5])
+            player.knight_cards = d[base + P_KNIGHTS]
+            player.num_roads = d[base + P_ROADS]
+            player.num_settlements = d[base + P_SETTLEMENTS]
+            player.num_cities = d[base + P_CITIES]
+            player.rebuild_road_network()
+
+        board.reindex_trade_rates()
+
+        dev_deck = [card for card in DevCard for i in range(d[DEV_DECK + card.value])]
+        game.rng.dev_deck.shuffle(dev_deck)
+        game.dev_deck = dev_deck
+
+        game.longest_road_owner = None if d[LONGEST_ROAD] == NONE else game.players[d[LONGEST_ROAD]]
+        game.largest_army = None if d[LARGEST_ARMY] == NONE else game.players[d[LARGEST_ARMY]]
+        for player in game.players:
+            player.reindex_points()
+        game.winner = None if d[WINNER] == NONE else game.players[d[WINNER]]
+        game.has_ended = game.winner != None
+        return game
+
+    # Queries ------------------------------------------------
+
+    def get_res(self, player, card):
+        return self.data[PLAYERS + PLAYER_SIZE * player + P_RES + card.value]
+
+    def get_dev(self, player, card):
+        return self.data[PLAYERS + PLAYER_SIZE * player + P_DEV + card.value]
+
+    def num_cards(self, player):
+        base = PLAYERS + PLAYER_SIZE * player + P_RES
+        return sum(self.data[base:base + 5])
+
+    def get_point(self, point):
+        return (self.data[POINT_OWNER + point], self.data[POINT_TYPE + point])
+
+    def get_edge(self, edge):
+        return self.data[EDGE_OWNER + edge]
+
+    def get_robber(self):
+        return self.data[ROBBER]
+
+    def get_winner(self):
+        winner = self.data[WINNER]
+        return None if winner == NONE else winner
+
+    def get_longest_road_owner(self):
+        owner = self.data[LONGEST_ROAD]
+        return None if owner == NONE else owner
+
+    def get_largest_army(self):
+        owner = self.data[LARGEST_ARMY]
+        return None if owner == NONE else owner
+
+    # the victory points a player gets from their settlements and cities
+    def count_buildings(self, player):
+        d = self.data
+        points = 0
+        for n in range(54):
+            if d[POINT_OWNER + n] == player:
+                points += d[POINT_TYPE + n]
+        return points
+
+    # returns the number of VP
+    # if include_dev is False, it will not include points from developement cards
+    def get_VP(self, player, include_dev=False):
+        d = self.data
+        points = self.count_buildings(player)
+        if d[LONGEST_ROAD] == player:
+            points += 2
+        if d[LARGEST_ARMY] == player:
+            points += 2
+        if include_dev:
+            # victory point cards count as soon as the player has them, like Player.hidden_points
+            base = PLAYERS + PLAYER_SIZE * player
+            points += d[base + P_DEV + DevCard.VictoryPoint.value] + d[base + P_NEW_DEV + DevCard.VictoryPoint.value]
+        return points
+
+    # checks if a player has the cards in a count vector
+    def has_counts(self, player, counts):
+        base = PLAYERS + PLAYER_SIZE * player + P_RES
+        d = self.data
+        for i in range(5):
+            if counts[i] > d[base + i]:
+                return False
+        return True
+
+    # checks if a player has a road touching a point
+    def has_road_at(self, player, point):
+        d = self.data
+        for e in DefaultBoard.get_topology().point_edges[point]:
+            if d[EDGE_OWNER + e] == player:
+                return True
+        return False
+
+    # checks if a settlement can go on a point, ignoring the cards needed
+    def settlement_location_is_valid(self, player, point, is_starting=False):
+        d = self.data
+        if not is_starting and not self.has_road_at(player, point):
+            return Statuses.ERR_ISOLATED
+        if d[POINT_OWNER + point] != NONE:
+            return Statuses.ERR_BLOCKED
+        for p in DefaultBoard.get_topology().point_neighbours[point]:
+            if d[POINT_OWNER + p] != NONE:
+                return Statuses.ERR_BLOCKED
+        return Statuses.ALL_GOOD
+
+    # checks if a road can go on an edge, ignoring the cards needed
+    def road_location_is_valid(self, player, edge):
+        d = self.data
+        if d[EDGE_OWNER + edge] != NONE:
+            return Statuses.ERR_BLOCKED
+        for p in DefaultBoard.get_topology().edges[edge]:
+            owner = d[POINT_OWNER + p]
+            if owner != NONE:
+                # the road can only connect through a settlement/city if this player owns it
+                if owner == player:
+                    return Statuses.ALL_GOOD
+            elif self.has_road_at(player, p):
+                return Statuses.ALL_GOOD
+        return Statuses.ERR_ISOLATED
+
+    # Rules ------------------------------------------------
+
+    def _pay(self, player, counts):
+        base = PLAYERS + PLAYER_SIZE * player + P_RES
+        for i in range(5):
+            self.data[base + i] -= counts[i]
+
+    def build_settlement(self, player, point, is_starting=False):
+        d = self.data
+        base = PLAYERS + PLAYER_SIZE * player
+        if d[base + P_SETTLEMENTS] == 0:
+            return Statuses.ERR_OUTOFBUILDINGS
+        cost = buildCosts["settlement"]
+        if not is_starting and not self.has_counts(player, cost):
+            return Statuses.ERR_CARDS
+        status = self.settlement_location_is_valid(player, point, is_starting)
+        if status != Statuses.ALL_GOOD:
+            return status
+
+        if not is_starting:
+            self._pay(player, cost)
+        d[POINT_OWNER + point] = player
+        d[POINT_TYPE + point] = SETTLEMENT
+        d[base + P_SETTLEMENTS] -= 1
+
+        # the settlement may cut the other players' roads
+        for other in range(self.num_players):
+            if other != player:
+                self._update_road_length(other)
+        self._set_longest_road()
+        self._check_for_win()
+        return Statuses.ALL_GOOD
+
+    def build_road(self, player, edge, is_starting=False):
+        d = self.data
+        base = PLAYERS + PLAYER_SIZE * player
+        if d[base + P_ROADS] == 0:
+            return Statuses.ERR_OUTOFBUILDINGS
+        status = self.road_location_is_valid(player, edge)
+        if status != Statuses.ALL_GOOD:
+            return status
+        cost = buildCosts["road"]
+        if not is_starting:
+            if not self.has_counts(player, cost):
+                return Statuses.ERR_CARDS
+            self._pay(player, cost)
+
+        self._place_road(player, edge)
+        self._set_longest_road()
+        self._check_for_win()
+        return Statuses.ALL_GOOD
+
+    def _place_road(self, player, edge):
+        self.data[EDGE_OWNER + edge] = player
+        self.data[PLAYERS + PLAYER_SIZE * player + P_ROADS] -= 1
+        self._update_road_length(player)
+
+    def upgrade_settlement(self, player, point):
+        d = self.data
+        base = PLAYERS + PLAYER_SIZE * player
+        if d[base + P_CITIES] == 0:
+            return Statuses.ERR_OUTOFBUILDINGS
+        if d[POINT_OWNER + point] == NONE:
+            return Statuses.ERR_NOT_EXIST
+        if d[POINT_OWNER + point] != player:
+            return Statuses.ERR_BAD_OWNER
+        if d[POINT_TYPE + point] != SETTLEMENT:
+            return Statuses.ERR_UPGRADE_CITY
+        cost = buildCosts["city"]
+        if not self.has_counts(player, cost):
+            return Statuses.ERR_CARDS
+
+        self._pay(player, cost)
+        d[POINT_TYPE + point] = CITY
+        d[base + P_CITIES] -= 1
+        d[base + P_SETTLEMENTS] += 1
+        self._check_for_win()
+        return Statuses.ALL_GOOD
+
+    # buys a developement card, drawing it from the deck with rng
+    def build_dev(self, player, rng=random):
+        d = self.data
+        total = sum(d[DEV_DECK:DEV_DECK + 5])
+        if total == 0:
+            return Statuses.ERR_DECK
+        cost = buildCosts["dev"]
+        if not self.has_counts(player, cost):
+            return Statuses.ERR_CARDS
+
+        self._pay(player, cost)
+        n = rng.randrange(total)
+        for card in range(5):
+            n -= d[DEV_DECK + card]
+            if n < 0:
+                break
+        d[DEV_DECK + card] -= 1
+        d[PLAYERS + PLAYER_SIZE * player + P_NEW_DEV + card] += 1
+        # a victory point card counts straight away, as in Game.build_dev
+        if card == DevCard.VictoryPoint.value:
+            self._check_for_win()
+        return Statuses.ALL_GOOD
+
+    # makes the cards a player bought this turn playable
+    def finished_turn(self, player):
+        base = PLAYERS + PLAYER_SIZE * player
+        d = self.data
+        for i in range(5):
+            d[base + P_DEV + i] += d[base + P_NEW_DEV + i]
+            d[base + P_NEW_DEV + i] = 0
+
+    # gives players the proper cards for a given roll
+    def add_yield(self, roll):
+        d = self.data
+        robber = d[ROBBER]
+        topology = DefaultBoard.get_topology()
+        for tile in self.layout.tiles_by_token.get(roll, ()):
+            if tile == robber:
+                continue
+            card = self.layout.tile_cards[tile]
+            for p in topology.tile_points[tile]:
+                owner = d[POINT_OWNER + p]
+                if owner != NONE:
+                    d[PLAYERS + PLAYER_SIZE * owner + P_RES + card] += d[POINT_TYPE + p]
+
+    # moves the robber and steals a random card from the victim, if there is one
+    def move_robber(self, player, tile, victim=None, rng=random):
+        d = self.data
+        if victim != None:
+            # checks the victim has a settlement on the tile
+            if victim not in [d[POINT_OWNER + p] for p in DefaultBoard.get_topology().tile_points[tile]]:
+                return Statuses.ERR_INPUT
+
+        d[ROBBER] = tile
+
+        if victim != None:
+            total = self.num_cards(victim)
+            if total > 0:
+                victim_base = PLAYERS + PLAYER_SIZE * victim + P_RES
+                n = rng.randrange(total)
+                for card in range(5):
+                    n -= d[victim_base + card]
+                    if n < 0:
+                        break
+                d[victim_base + card] -= 1
+                d[PLAYERS + PLAYER_SIZE * player + P_RES + card] += 1
+        return Statuses.ALL_GOOD
+
+    # uses a developement card, with args like Game.use_dev_card but using indexes:
+    # Road: "edge_one" and "edge_two", Knight: "robber_tile" and "victim" (a player number or None),
+    # Monopoly: "card_type", YearOfPlenty: "card_one" and "card_two"
+    def use_dev_card(self, player, card, args, rng=random):
+        d = self.data
+        base = PLAYERS + PLAYER_SIZE * player
+        if d[base + P_DEV + card.value] == 0:
+            return Statuses.ERR_CARDS
+
+        if card == DevCard.Road:
+            if not ("edge_one" in args and "edge_two" in args) or args["edge_one"] == args["edge_two"]:
+                return Statuses.ERR_INPUT
+            if d[base + P_ROADS] < 2:
+                return Statuses.ERR_OUTOFBUILDINGS
+            edges = (args["edge_one"], args["edge_two"])
+            # one of the roads may only be connected through the other one
+            if self.road_location_is_valid(player, edges[0]) != Statuses.ALL_GOOD:
+                edges = (edges[1], edges[0])
+            status = self.road_location_is_valid(player, edges[0])
+            if status != Statuses.ALL_GOOD:
+                return status
+            self._place_road(player, edges[0])
+            status = self.road_location_is_valid(player, edges[1])
+            if status != Statuses.ALL_GOOD:
+                # takes the first road back
+                d[EDGE_OWNER + edges[0]] = NONE
+                d[base + P_ROADS] += 1
+                self._update_road_length(player)
+                return status
+            self._place_road(player, edges[1])
+            self._set_longest_road()
+
+        elif card == DevCard.Knight:
+            if not ("robber_tile" in args and "victim" in args):
+                return Statuses.ERR_INPUT
+            victim = args["victim"]
+            if victim != None and (victim == player or not 0 <= victim < self.num_players):
+                return Statuses.ERR_INPUT
+            status = self.move_robber(player, args["robber_tile"], victim, rng)
+            if status != Statuses.ALL_GOOD:
+                return status
+            d[base + P_KNIGHTS] += 1
+            # checks for the largest army
+            knights = d[base + P_KNIGHTS]
+            holder = d[LARGEST_ARMY]
+            if holder == NONE:
+                if knights >= 3:
+                    d[LARGEST_ARMY] = player
+            elif knights > d[PLAYERS + PLAYER_SIZE * holder + P_KNIGHTS]:
+                d[LARGEST_ARMY] = player
+
+        elif card == DevCard.Monopoly:
+            card_type = args["card_type"].value
+            for other in range(self.num_players):
+                if other != player:
+                    other_index = PLAYERS + PLAYER_SIZE * other + P_RES + card_type
+                    d[base + P_RES + card_type] += d[other_index]
+                    d[other_index] = 0
+
+        elif card == DevCard.YearOfPlenty:
+            if not ("card_one" in args and "card_two" in args):
+                return Statuses.ERR_INPUT
+            d[base + P_RES + args["card_one"].value] += 1
+            d[base + P_RES + args["card_two"].value] += 1
+
+        else:
+            # victory point cards are not played
+            return Statuses.ERR_INPUT
+
+        d[base + P_DEV + card.value] -= 1
+        self._check_for_win()
+        return Statuses.ALL_GOOD
+
+    # Bookkeeping ------------------------------------------------
+
+    # recomputes the longest road for a player from the edge array
+    def _update_road_length(self, player):
+        edges = DefaultBoard.get_topology().edges
+        d = self.data
+        network = StateRoadNetwork(player, self)
+        network.rebuild([edges[e] for e in range(72) if d[EDGE_OWNER + e] == player])
+        d[PLAYERS + PLAYER_SIZE * player + P_ROAD_LENGTH] = network.longest
+
+    def get_road_length(self, player):
+        return self.data[PLAYERS + PLAYER_SIZE * player + P_ROAD_LENGTH]
+
+    # gives the longest road to the correct player, using the same rules as Game.set_longest_road
+    def _set_longest_road(self):
+        d = self.data
+        lengths = [self.get_road_length(p) for p in range(self.num_players)]
+        longest = max(lengths)
+        owner = d[LONGEST_ROAD]
+        if owner == NONE or lengths[owner] < longest:
+            leaders = [p for p in range(self.num_players) if lengths[p] == longest]
+            if longest >= 5 and len(leaders) == 1:
+                owner = leaders[0]
+            else:
+                owner = NONE
+        if owner != NONE and lengths[owner] < 5:
+            owner = NONE
+        d[LONGEST_ROAD] = owner
+
+    def _check_for_win(self):
+        d = self.data
+        if d[WINNER] != NONE:
+            return True
+        for player in range(self.num_players):
+            if self.get_VP(player, include_dev=True) >= self.points_to_win:
+                d[WINNER] = player
+                return True
+        return False
+
+# A RoadNetwork whose points are indexes, and which reads the buildings from a GameState
+class StateRoadNetwork(RoadNetwork):
+    __slots__ = ("state",)
+
+    def __init__(self, owner, state=None):
+        super(StateRoadNetwork, self).__init__(owner)
+        if state != None:
+            self.state = state
+
+    def is_blocked(self, point):
+        owner = self.state.data[POINT_OWNER + point]
+        return owner != NONE and owner != self.owner
@@ -18,15 +18,30 @@ class HarborType(Enum):
 
 # represents a catan harbor
 class Harbor:
+    __slots__ = ("_type", "point_one", "point_two", "board")
 
-    def __init__(self, point_one, point_two, type):
-        # sets the type
-        self.type = type
-
+    def __init__(self, point_one, point_two, type, board=None):
         # sets the points
         self.point_one = point_one
         self.point_two = point_two
 
+        # the board the harbor is on, if it should keep the players' trade rates up to date
+        self.board = board
+
+        # sets the type
+        self.type = type
+
+    @property
+    def type(self):
+        return self._type
+
+    # the players who have already built on the harbor get the new trade rate
+    @type.setter
+    def type(self, type):
+        self._type = type
+        if self.board != None and (self.point_one.building != None or self.point_two.building != None):
+            self.board.reindex_trade_rates()
+
     def __repr__(self):
         return "Harbor %s, %s Type %s" % (self.point_one, self.point_two, self.type)
 
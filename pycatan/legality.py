@@ -0,0 +1,95 @@
+from pycatan.statuses import Statuses
+
+# returns the ids of the bits set in a mask, lowest first
+def mask_ids(mask):
+    ids = []
+    while mask:
+        low = mask & -mask
+        ids.append(low.bit_length() - 1)
+        mask ^= low
+    return ids
+
+# The buildings and roads on a board as bitboards, used to check where things can be built
+# Bit n of a point mask is the point with id n, and bit n of an edge mask is the edge with id n
+# The masks of the board's shape come from its topology, see DefaultBoardTopology
+class Legality(object):
+    __slots__ = ("topology", "buildings", "roads", "road_points", "occupied", "blocked", "all_roads")
+
+    def __init__(self, topology):
+        self.topology = topology
+        # the points each player has a settlement/city on, by owner
+        self.buildings = {}
+        # the edges each player has a road on, and the points those roads touch, by owner
+        self.roads = {}
+        self.road_points = {}
+        # the points with a settlement/city on them
+        self.occupied = 0
+        # the points with a settlement/city on or next to them
+        self.blocked = 0
+        # the edges with a road on them
+        self.all_roads = 0
+
+    # returns an independent copy of the bitboards
+    def copy(self):
+        copy = Legality.__new__(Legality)
+        copy.topology = self.topology
+        copy.buildings = dict(self.buildings)
+        copy.roads = dict(self.roads)
+        copy.road_points = dict(self.road_points)
+        copy.occupied = self.occupied
+        copy.blocked = self.blocked
+        copy.all_roads = self.all_roads
+        return copy
+
+    # records a new settlement
+    def add_building(self, owner, point_id):
+        bit = 1 << point_id
+        self.buildings[owner] = self.buildings.get(owner, 0) | bit
+        self.occupied |= bit
+        self.blocked |= bit | self.topology.point_neighbour_masks[point_id]
+
+    # records a new road
+    def add_road(self, owner, edge_id):
+        self.roads[owner] = self.roads.get(owner, 0) | (1 << edge_id)
+        self.road_points[owner] = self.road_points.get(owner, 0) | self.topology.edge_point_masks[edge_id]
+        self.all_roads |= 1 << edge_id
+
+    # the points a settlement could go on, ignoring roads
+    def open_mask(self):
+        return self.topology.all_points_mask & ~self.blocked
+
+    # the points a player can build a settlement on
+    def settlement_mask(self, owner):
+        return self.road_points.get(owner, 0) & ~self.blocked
+
+    # the points a player's roads can be built from:
+    # their own settlements/cities, and the ends of their roads which nobody else has built on
+    def road_source_mask(self, owner):
+        return self.buildings.get(owner, 0) | (self.road_points.get(owner, 0) & ~self.occupied)
+
+    # the edges a player can build a road on
+    def road_mask(self, owner):
+        point_edge_masks = self.topology.point_edge_masks
+        edges = 0
+        for point_id in mask_ids(self.road_source_mask(owner)):
+            edges |= point_edge_masks[point_id]
+        return edges & ~self.all_roads
+
+    # checks if a player can build a settlement on a point, in the same way as Player.build_settlement
+    def settlement_status(self, owner, point_id, is_starting=False):
+        bit = 1 << point_id
+        if not is_starting and not self.road_points.get(owner, 0) & bit:
+            return Statuses.ERR_ISOLATED
+        if self.blocked & bit:
+            return Statuses.ERR_BLOCKED
+        return Statuses.ALL_GOOD
+
+    # checks if a player can build a road on an edge, in the same way as Player.road_location_is_valid
+    def road_status(self, owner, edge_id):
+        if edge_id == None:
+            return Statuses.ERR_NOT_CON
+        if self.all_roads & (1 << edge_id):
+            return Statuses.ERR_BLOCKED
+        if self.road_source_mask(owner) & self.topology.edge_point_masks[edge_id]:
+            return Statuses.ALL_GOOD
+        return Statuses.ERR_ISOLATED
@@ -1,39 +1,87 @@
 from pycatan.building import *
 from pycatan.statuses import Statuses
-from pycatan.card import ResCard, DevCard
+from pycatan.card import ResCard, DevCard, card_counts, buildCosts
+from pycatan.road_network import RoadNetwork
+from pycatan.harbor import Harbor
+from pycatan.legality import mask_ids
 
 import math
+import random
 
 # The player class for
 class Player:
+    __slots__ = ("game", "num", "starting_roads", "victory_points", "public_points", "hidden_points", "res_counts", "dev_counts",
+                 "new_dev_counts", "knight_cards", "longest_road_length", "road_network",
+                 "num_roads", "num_settlements", "num_cities", "trade_rates", "controller", "name")
 
     def __init__ (self, game, num):
         # the game the player belongs to
         self.game = game
         # the player number for this player
         self.num = num
+
+        self.reset()
+
+        self.controller = None
+        self.name = "P%s"%self.num
+
+    # puts the player back to how they are at the start of a game
+    def reset(self):
         # the starting roads for this player
         # used to determine the longest road
         self.starting_roads = []
-        # the number of victory points
+        # the number of victory points from settlements and cities
         self.victory_points = 0
-        # the cards the player has
-        # each will be a number corresponding with the static variables CARD_<type>
-        self.cards = []
-        # the development cards this player has
-        self.dev_cards = []
-        self.new_dev_cards = []
+        # the player's score, kept up to date by each scoring event, see get_VP
+        # public_points includes the buildings, longest road and largest army,
+        # and hidden_points the victory point development cards
+        self.public_points = 0
+        self.hidden_points = 0
+        # the number of each resource card the player has
+        # indexed by the ResCard value
+        self.res_counts = [0] * 5
+        # the number of each development card this player has, indexed by the DevCard value
+        # new_dev_counts holds the cards bought this turn, which cannot be played yet
+        self.dev_counts = [0] * 5
+        self.new_dev_counts = [0] * 5
         # the number of knight cards the player has played
         self.knight_cards = 0
         # the longest road segment this player has
         self.longest_road_length = 0
+        # the graph of this player's roads, which keeps track of the longest road
+        self.road_network = RoadNetwork(self.num)
 
         self.num_roads = 15
         self.num_settlements = 5
         self.num_cities = 4
-
-        self.controller = None
-        self.name = "P%s"%self.num
+        # the number of each card, indexed by the ResCard value, the player needs to trade with the bank
+        # kept up to date by the board as the player builds on harbors
+        self.trade_rates = [4] * 5
+
+    # returns a copy of the player for another game, see Game.fork
+    # point_map maps the points on this player's board to the points on the new board
+    def fork(self, game, point_map):
+        player = Player.__new__(Player)
+        player.game = game
+        player.num = self.num
+        player.starting_roads = list(self.starting_roads)
+        player.victory_points = self.victory_points
+        player.public_points = self.public_points
+        player.hidden_points = self.hidden_points
+        player.res_counts = list(self.res_counts)
+        player.dev_counts = list(self.dev_counts)
+        player.new_dev_counts = list(self.new_dev_counts)
+        player.knight_cards = self.knight_cards
+        player.longest_road_length = self.longest_road_length
+        player.road_network = self.road_network.copy(point_map)
+        player.num_roads = self.num_roads
+        player.num_settlements = self.num_settlements
+        player.num_cities = self.num_cities
+        player.trade_rates = list(self.trade_rates)
+        # the fork is not controlled by anything
+        player.controller = None
+        player.name = self.name
+        return player
 
     def __repr__(self): return "P%s" % self.num
 
@@ -44,7 +92,38 @@ class Player:
     def seat(self): return self.num
 
     def get_num(self): return self.num
-        
+
+    # the resource cards as a list, for code that expects a list of cards
+    @property
+    def cards(self):
+        return [c for c in ResCard for i in range(self.res_counts[c.value])]
+
+    @cards.setter
+    def cards(self, cards):
+        self.res_counts = card_counts(cards)
+
+    # the development cards as a list
+    @property
+    def dev_cards(self):
+        return [c for c in DevCard for i in range(self.dev_counts[c.value])]
+
+    @dev_cards.setter
+    def dev_cards(self, cards):
+        self.dev_counts = card_counts(cards)
+
+    @property
+    def new_dev_cards(self):
+        return [c for c in DevCard for i in range(self.new_dev_counts[c.value])]
+
+    @new_dev_cards.setter
+    def new_dev_cards(self, cards):
+        self.new_dev_counts = card_counts(cards)
+
+    # the number of resource cards in the player's hand
+    @property
+    def num_cards(self):
+        return sum(self.res_counts)
+
     def dict(self):
       d = {}
       d['cards'] = self.cards
@@ -63,13 +142,8 @@ class Player:
       self.num_settlements = d['num_settlements']
       self.num_cities = d['num_cities']
       self.knight_cards = d['knight_cards']
-      self.dev_cards = []
-      for card in d['dev_cards']:
-        self.dev_cards.append(getattr(DevCard, card))
-
-      self.cards = []
-      for card in d['cards']:
-        self.cards.append(getattr(ResCard, card))
+      self.dev_cards = [getattr(DevCard, card) for card in d['dev_cards']]
+      self.cards = [getattr(ResCard, card) for card in d['cards']]
 
       
 
@@ -90,33 +164,11 @@ class Player:
             if not self.has_cards(cards_needed):
                 return Statuses.ERR_CARDS
 
-            # checks it is connected to a road owned by the player
-            connected_by_road = False
-            # gets the roads
-            roads = self.game.board.roads
-
-            for r in roads:
-                # checks if the road is connected
-                if r.point_one is point or r.point_two is point:
-                    # checks this player owns the road
-                    if r.owner == self.num:
-                        connected_by_road = True
-
-            if not connected_by_road:
-                return Statuses.ERR_ISOLATED
-
-        # checks that a building does not already exist there
-        if point.building != None:
-            return Statuses.ERR_BLOCKED
-
-        # checks all other settlements are at least 2 away
-        # gets the connecting point's coords
-        points = point.connected_points
-        for p in points:
-
-            # checks if the point is occupied
-            if p.building != None:
-                return Statuses.ERR_BLOCKED
+        # checks it is connected to a road owned by the player, unless it is a starting settlement,
+        # and that there are no other settlements on or next to the point
+        status = self.game.board.legality.settlement_status(self.num, point.id, is_starting)
+        if status != Statuses.ALL_GOOD:
+            return status
 
         if not is_starting:
             # removes the cards
@@ -125,124 +177,115 @@ class Player:
         # adds the settlement
         building = Settlement(owner=self.num, point=point)
         self.game.board.add_building(building, point)
+        # the settlement may cut the other players' roads
+        for p in self.game.players:
+            if p is not self:
+                p.cut_roads(point)
         # adds a victory point
         self.victory_points += 1
+        self.public_points += 1
         self.num_settlements -= 1
 
         return Statuses.ALL_GOOD
 
     # checks if the player has all of the cards given in an array
     def has_cards(self, cards):
+        return self.has_card_counts(card_counts(cards))
 
-        # needs to duplicate the cards, and then delete them once found
-        # otherwise checking if the player has multiple of the same card
-        # will return true with only one card
-
-        # cards_dup stands for cards duplicate
-        cards_dup = self.cards[:]
-        for c in cards:
-            if cards_dup.count(c) == 0:
+    # checks if the player has at least the number of each card in a count vector
+    def has_card_counts(self, counts):
+        res_counts = self.res_counts
+        for i in range(5):
+            if counts[i] > res_counts[i]:
                 return False
-            else:
-                index = cards_dup.index(c)
-                del cards_dup[index]
-
         return True
 
+    # returns how many of a type of card the player has
+    def count_cards(self, card):
+        return self.res_counts[card.value]
+
     # adds some cards to a player's hand
     def add_cards(self, cards):
         for c in cards:
-            self.cards.append(c)
+            self.res_counts[c.value] += 1
+
+    # adds several cards of the same type to a player's hand
+    def add_card(self, card, amount=1):
+        self.res_counts[card.value] += amount
 
     # removes cards from a player's hand
     def remove_cards(self, cards):
         # makes sure it has all the cards before deleting any
-        if not self.has_cards(cards):
+        counts = card_counts(cards)
+        if not self.has_card_counts(counts):
             return Statuses.ERR_CARDS
 
-        else:
-            # removes the cards
-            for c in cards:
-                index = self.cards.index(c)
-                del self.cards[index]
+        # removes the cards
+        for i in range(5):
+            self.res_counts[i] -= counts[i]
+
+    # removes every card of a type, and returns how many were removed
+    def remove_all_cards(self, card):
+        amount = self.res_counts[card.value]
+        self.res_counts[card.value] = 0
+        return amount
+
+    # picks a random card from the player's hand, with each card equally likely
+    # returns None if the player has no cards
+    # rng is the random number generator to pick with, ex: the Game's steal stream
+    def get_random_card(self, rng=random):
+        total = self.num_cards
+        if total == 0:
+            return None
+        n = rng.randrange(total)
+        for c in ResCard:
+            n -= self.res_counts[c.value]
+            if n < 0:
+                return c
+
+    # returns which of the things in card.buildCosts the player has the cards for
+    # ex: {"settlement": True, "city": False, "dev": True, "road": True}
+    def affordable(self):
+        res_counts = self.res_counts
+        affordable = {}
+        for name, cost in buildCosts.items():
+            affordable[name] = (cost[0] <= res_counts[0] and cost[1] <= res_counts[1] and
+                                cost[2] <= res_counts[2] and cost[3] <= res_counts[3] and
+                                cost[4] <= res_counts[4])
+        return affordable
 
     #adds a development card
     def add_dev_card(self, dev_card):
-        self.new_dev_cards.append(dev_card)
+        self.new_dev_counts[dev_card.value] += 1
+        # victory point cards count as soon as the player has them
+        if dev_card == DevCard.VictoryPoint:
+            self.hidden_points += 1
 
     def finished_turn(self):
-      for dcard in self.new_dev_cards:
-        self.dev_cards.append(dcard)
-      self.new_dev_cards = []
+      for i in range(5):
+        self.dev_counts[i] += self.new_dev_counts[i]
+      self.new_dev_counts = [0] * 5
 
     # removes a dev card
     def remove_dev_card(self, card):
-        # finds the card
-        for i in range(len(self.dev_cards)):
-            if self.dev_cards[i] == card:
-
-                # deletes the card
-                del self.dev_cards[i]
-                return Statuses.ALL_GOOD
-
         # error if the player does not have the cards
-        return Statuses.ERR_CARDS
+        if self.dev_counts[card.value] == 0:
+            return Statuses.ERR_CARDS
+
+        self.dev_counts[card.value] -= 1
+        return Statuses.ALL_GOOD
 
     # checks a road location is valid
+    # checks the two points are connected, the road does not already exist,
+    # and this player has a settlement on one of these points or a connecting road
+    # the road can only connect through a settlement/city if this player owns it
     def road_location_is_valid(self, start, end):
-        # checks the two points are connected
-        connected = False
-        # gets the points connected to start
-        points = start.connected_points
-
-        for p in points:
-            if end == p:
-                connected = True
-                break
-
-        if not connected:
-            return Statuses.ERR_NOT_CON
-
-        connected_by_road = False
-        for road in self.game.board.roads:
-            # checks the road does not already exists with these points
-            if road.point_one == start or road.point_two == start:
-                if road.point_one == end or road.point_two == end:
-                    return Statuses.ERR_BLOCKED
-
-        # check this player has a settlement on one of these points or a connecting road
-        is_connected = False
-
-        if start.building != None:
-            # checks if this player owns the settlement/city
-            if start.building.owner == self.num:
-                is_connected = True
-
-        # does the same for the other point
-        elif end.building != None:
-            if end.building.owner == self.num:
-                is_connected = True
-
-        # then checks if there is a road connecting them
-        roads = self.game.board.roads
-        points = [start, end]
-
-        for r in roads:
-            for p in points:
-                if r.point_one == p or r.point_two == p:
-
-                    # checks that there is not another player's settlement here, so that it's not going through it
-                    if p.building == None:
-                        is_connected = True
-
-                    # if there is a settlement/city there, the road can be built if this player owns it
-                    elif p.building.owner == self.num:
-                        is_connected = True
+        board = self.game.board
+        return board.legality.road_status(self.num, board.get_edge_id(start, end))
 
-        if not is_connected:
-            return Statuses.ERR_ISOLATED
-
-        return Statuses.ALL_GOOD
+    # checks if this player has a road touching a point
+    def has_road_at(self, point):
+        return bool(self.game.board.legality.road_points.get(self.num, 0) & (1 << point.id))
 
     # builds a road
     def build_road(self, start, end, is_starting=False):
@@ -270,6 +313,12 @@ class Player:
             self.remove_cards(cards_needed)
 
         # adds the road
+        self.place_road(start, end)
+
+        return Statuses.ALL_GOOD
+
+    # puts one of this player's roads on the board, without checking the location or cards
+    def place_road(self, start, end):
         road = Road(owner=self.num, point_one=start, point_two=end)
         (self.game).board.add_road(road)
 
@@ -277,75 +326,47 @@ class Player:
 
         self.num_roads -= 1
 
-        return Statuses.ALL_GOOD
+        return road
 
     # returns an array of all the harbors the player has access to
     def get_connected_harbor_types(self):
 
-        # gets the settlements/cities belonging to this player
         harbors = []
-        all_harbors = self.game.board.harbors
-        buildings = self.game.board.get_buildings()
-
-        for b in buildings:
-            # checks the building belongs to this player
-            if b.owner == self.num:
-                # checks if the building is connected to any harbors
-                for h in all_harbors:
-                    print(h)
-                    print(b.point)
-                    if h.point_one is b.point or h.point_two is b.point:
-                        print("A")
-                        # adds the type
-                        if harbors.count(h.type) == 0:
-                            harbors.append(h.type)
+        for b in self.get_buildings():
+            # checks the building is on a harbor
+            if b.point.harbor != None:
+                # adds the type
+                if harbors.count(b.point.harbor.type) == 0:
+                    harbors.append(b.point.harbor.type)
 
         return harbors
 
-    # gets the longest road segment this player has which includes the road given
+    # lowers the player's trade rates for a harbor they have built on
+    def add_harbor(self, harbor):
+        card = Harbor.get_card_from_harbor_type(harbor.type)
+        # 3:1 harbors work for every card
+        if card == None:
+            self.trade_rates = [min(rate, 3) for rate in self.trade_rates]
+        else:
+            self.trade_rates[card.value] = 2
+
+    # updates the longest road segment this player has with a new road
     # should be called whenever a new road is build
-    # since this player's longest road will only change if a new road is build
     def get_longest_road(self, new_road):
+        self.longest_road_length = self.road_network.add_road(new_road.point_one, new_road.point_two)
+        return self.longest_road_length
 
-        # gets the roads that belong to this player
-        roads = self.get_roads()
-        del roads[roads.index(new_road)]
-
-        # checks for longest road
-        self.check_connected_roads(road=new_road, all_roads=roads, length=1)
-
-    # checks the roads for connected roads, and then checks those roads until there are no more
-    def check_connected_roads(self, road, all_roads, length):
-
-        # do both point one and two
-        points = [
-            road.point_one,
-            road.point_two
-        ]
-
-        for p in points:
-            # gets the connected roads
-            connected = self.get_connected_roads(point=p, roads=all_roads)
-            # if there are no new connected roads
-            if len(connected) == 0:
-                # if this is the longest road so far
-                if length > self.longest_road_length:
-                    # records the length
-                    self.longest_road_length = length
-                    # self.begin_celebration()
-
-            # if there are connected roads
-            else:
-                # check each of them for connections if they have not been used
-                for c in connected:
-                    # checks it hasn't used this road before
-                    if all_roads.count(c) > 0:
-                        # copies all usable roads
-                        c_roads = all_roads[:]
-                        # removes this road from them
-                        del c_roads[c_roads.index(c)]
-                        # checks for connected roads to this road
-                        self.check_connected_roads(c, c_roads, length + 1)
+    # updates the longest road segment after another player builds on a point
+    # since the settlement/city may cut one of this player's roads in two
+    def cut_roads(self, point):
+        self.longest_road_length = self.road_network.cut(point)
+        return self.longest_road_length
+
+    # recomputes the longest road from the roads on the board
+    def rebuild_road_network(self):
+        edges = [(r.point_one, r.point_two) for r in self.get_roads()]
+        self.longest_road_length = self.road_network.rebuild(edges)
+        return self.longest_road_length
 
     # returns which roads in the roads array are connected to the point
     def get_connected_roads(self, point, roads):
@@ -372,13 +393,10 @@ class Player:
 
     # checks if the player has some development cards
     def has_dev_cards(self, cards):
-        card_duplicate = self.dev_cards[:]
-        for c in cards:
-            if not card_duplicate.count(c) > 0:
+        counts = card_counts(cards)
+        for i in range(5):
+            if counts[i] > self.dev_counts[i]:
                 return False
-            else:
-                del card_duplicate[card_duplicate.index(c)]
-
         return True
 
     # returns the number of VP
@@ -386,25 +404,27 @@ class Player:
     # because other players aren't able to see them
     def get_VP(self, include_dev=False):
 
-        # gets the victory points from settlements and cities
-        points = self.victory_points
-
-        # adds VPs from longest road
-        if self.game.longest_road_owner == self.num:
-            points += 2
-
-        # adds VPs from largest army
-        if self.game.largest_army == self.num:
-            points += 2
+        # gets the victory points from settlements, cities, longest road and largest army
+        points = self.public_points
 
         # adds VPs from developement cards
         if include_dev:
-            for d in self.dev_cards:
-                if d == DevCard.VictoryPoint:
-                    points += 1
+            points += self.hidden_points
 
         return points
 
+    # works out public_points and hidden_points from scratch, ex: after loading a game
+    def reindex_points(self):
+        self.victory_points = 0
+        for building in self.get_buildings():
+            self.victory_points += 2 if building.type == BuildingType.City else 1
+        self.public_points = self.victory_points
+        if self.game.longest_road_owner is self:
+            self.public_points += 2
+        if self.game.largest_army is self:
+            self.public_points += 2
+        self.hidden_points = self.dev_counts[DevCard.VictoryPoint.value] + self.new_dev_counts[DevCard.VictoryPoint.value]
+
     # prints the cards given
     @staticmethod
     def print_cards(cards):
@@ -420,80 +440,35 @@ class Player:
         print("]")
 
       
-    def get_available_roads(self):
-      available_roads = []
-
-      roads = self.get_roads()
-      for road in roads:
-        for p1 in (road.point_one, road.point_two):
-          if p1.building and p1.building.owner != self.num:
-            ## skip points that dead-end into a opponent's building
-            continue
-          for p2 in p1.connected_points:
-            if not self.game.board.get_road(p1, p2):
-              if (p2, p1) not in available_roads:
-                available_roads.append((p1, p2))
-
-      buildings = self.get_buildings()
-      for building in buildings:
-        p1 = building.point
-        for p2 in p1.connected_points:
-          if not self.game.board.get_road(p1, p2):
-            if (p2, p1) not in available_roads and (p1, p2) not in available_roads:
-              available_roads.append((p1, p2))
-
-      return available_roads
-
-    def get_available_settlements(self):
-      available_points = []
-
-      ## if no buildings, then list all possble points
-      buildings = self.get_buildings()
-      if len(buildings) < 2:
-        bpoints = [item for sublist in self.game.board.points for item in sublist]
-        for point in bpoints:
-          if point.building != None: continue
-          
-          occupied = False
-          for p in point.connected_points:
-            # checks if the point is occupied
-            if p.building != None: occupied = True
-          if occupied: continue
-          available_points.append(point)
-
-      bpoints = [item for sublist in self.game.board.points for item in sublist]
-      for point in bpoints:
-        if point.building != None: continue
-
-        connected_by_road = False
-        roads = self.game.board.roads
+    # the points this player can build a settlement on, from the board's legality bitboards
+    @property
+    def settlement_points(self):
+      board = self.game.board
+      return tuple(board.all_points[p] for p in mask_ids(board.legality.settlement_mask(self.num)))
 
-        for r in roads:
-          # checks if the road is connected
-          if r.point_one is point or r.point_two is point:
-            # checks this player owns the road
-            if r.owner == self.num:
-              connected_by_road = True
-        if not connected_by_road: continue
+    # the places this player can build a road, as Board.edge_key of their points
+    # from the board's legality bitboards
+    @property
+    def road_frontier(self):
+      board = self.game.board
+      return tuple(board.edges[e] for e in mask_ids(board.legality.road_mask(self.num)))
 
-        occupied = False
-        points = point.connected_points
-        for p in points:
-          # checks if the point is occupied
-          if p.building != None: occupied = True
-        if occupied: continue
+    # returns the (start, end) points of every place this player can build a road
+    def get_available_roads(self):
+      return list(self.road_frontier)
 
-        available_points.append(point)
-      return available_points
+    # returns the points this player can build a settlement on
+    # before the player has placed both starting settlements, they do not need a road there
+    def get_available_settlements(self):
+      board = self.game.board
+      if (5 - self.num_settlements) + (4 - self.num_cities) < 2:
+        mask = board.legality.open_mask()
+      else:
+        mask = board.legality.settlement_mask(self.num)
+      return [board.all_points[p] for p in mask_ids(mask)]
 
     def get_buildings(self):
-      bpoints = [item for sublist in self.game.board.points for item in sublist]
-      buildings = []
-      for p in bpoints:
-        if not p.building: continue
-        if p.building.owner == self.num:
-          buildings.append(p.building)
-      return buildings
+      return self.game.board.get_player_buildings(self.num)
         
         
       
@@ -1,9 +1,15 @@
 class Point:
-    def __init__(self, tiles, position):
+    __slots__ = ("tiles", "building", "position", "connected_points", "harbor", "id")
+
+    def __init__(self, tiles, position, id=None):
         self.tiles = tiles
         self.building = None
         self.position = position
         self.connected_points = None
+        # the harbor this point is on, if any
+        self.harbor = None
+        # the number of the point on its board, see Board.all_points
+        self.id = id
 
     def __repr__(self):
         return "Point(%s,%s)" % (self.position[0], self.position[1])
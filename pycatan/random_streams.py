@@ -0,0 +1,84 @@
+import random
+
+# The random number generators a Game uses, one for each kind of thing which is random:
+# the board layout, the dice, the developement deck and the cards stolen by the robber
+# Since each stream is separate, the same seed rolls the same dice whatever the players do,
+# and games with their own seeds do not change each other's streams
+# Without a seed every stream is the random module, so the game can be seeded with random.seed,
+# but the game does not own the random module, so its state is not saved or put back by undo
+class RandomStreams(object):
+    __slots__ = ("seed", "layout", "dice", "dev_deck", "steal", "rolls", "roll_index")
+
+    # the names of the streams
+    names = ("layout", "dice", "dev_deck", "steal")
+
+    def __init__(self, seed=None):
+        self.seed = seed
+        for name in RandomStreams.names:
+            if seed == None:
+                setattr(self, name, random)
+            else:
+                setattr(self, name, random.Random("%s-%s" % (seed, name)))
+        # the rolls given with set_rolls, which are used before the dice stream
+        self.rolls = ()
+        self.roll_index = 0
+
+    # returns the generators the streams own, which is none of them if they use the random module
+    def get_generators(self):
+        if self.seed == None:
+            return []
+        return [getattr(self, name) for name in RandomStreams.names]
+
+    # returns a copy whose streams carry on the same way as these ones, but separately
+    # if there is no seed the copy uses the random module as well
+    def copy(self):
+        copy = RandomStreams.__new__(RandomStreams)
+        copy.seed = self.seed
+        for name in RandomStreams.names:
+            stream = getattr(self, name)
+            if stream is not random:
+                stream_copy = random.Random()
+                stream_copy.setstate(stream.getstate())
+                stream = stream_copy
+            setattr(copy, name, stream)
+        copy.rolls = self.rolls
+        copy.roll_index = self.roll_index
+        return copy
+
+    # the random module cannot be copied or pickled, so deepcopy uses copy,
+    # and pickling saves the seed and the state of the streams
+    def __deepcopy__(self, memo):
+        return self.copy()
+
+    def __reduce__(self):
+        return (RandomStreams.from_state, (self.seed, self.rolls, self.getstate()))
+
+    # makes streams with a seed and a state from getstate, see __reduce__
+    @staticmethod
+    def from_state(seed, rolls, state):
+        streams = RandomStreams(seed)
+        streams.rolls = rolls
+        streams.setstate(state)
+        return streams
+
+    # returns the state of every stream, to be put back with setstate
+    def getstate(self):
+        return (tuple(g.getstate() for g in self.get_generators()), self.roll_index)
+
+    def setstate(self, state):
+        states, self.roll_index = state
+        for g, s in zip(self.get_generators(), states):
+            g.setstate(s)
+
+    # sets the rolls to use before rolling the dice stream, ex: rolls generated in bulk beforehand
+    # rolls can be any sequence of numbers from 2 to 12, such as a list or a numpy array
+    def set_rolls(self, rolls):
+        self.rolls = tuple(int(roll) for roll in rolls)
+        self.roll_index = 0
+
+    # returns the total of two dice
+    def roll(self):
+        if self.roll_index < len(self.rolls):
+            self.roll_index += 1
+            return self.rolls[self.roll_index - 1]
+        return self.dice.randint(1, 6) + self.dice.randint(1, 6)
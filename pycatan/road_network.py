@@ -0,0 +1,183 @@
+# The roads belonging to a single player, as a graph
+# Used to keep track of the player's longest road
+#
+# The roads are split into components, where two roads are in the same component
+# if they share a point that is not blocked by another player's settlement/city.
+# Each component remembers its longest road, so adding a road only needs to recompute
+# the component it joins, and a new settlement only needs to recompute the component it cuts
+class RoadNetwork:
+    __slots__ = ("owner", "edges", "adjacent", "edge_component", "components",
+                 "component_lengths", "next_component", "longest")
+
+    def __init__(self, owner):
+        # the number of the player who owns the roads
+        self.owner = owner
+        # the roads, as (point_one, point_two)
+        self.edges = []
+        # the roads touching each point, as a list of (other point, edge index)
+        self.adjacent = {}
+        # the component each edge is in
+        self.edge_component = []
+        # the edge indexes in each component
+        self.components = {}
+        # the longest road in each component
+        self.component_lengths = {}
+        # the id to use for the next component
+        self.next_component = 0
+        # the longest road in the whole network
+        self.longest = 0
+
+    # returns a copy of the network, with each point replaced by point_map[point] if it is given
+    # the component lists are shared, since they are replaced rather than changed
+    def copy(self, point_map=None):
+        network = self.__class__.__new__(self.__class__)
+        network.owner = self.owner
+        if point_map == None:
+            network.edges = list(self.edges)
+            network.adjacent = dict((p, list(touching)) for p, touching in self.adjacent.items())
+        else:
+            network.edges = [(point_map[p1], point_map[p2]) for p1, p2 in self.edges]
+            network.adjacent = dict((point_map[p], [(point_map[other], e) for other, e in touching])
+                                    for p, touching in self.adjacent.items())
+        network.edge_component = list(self.edge_component)
+        network.components = dict(self.components)
+        network.component_lengths = dict(self.component_lengths)
+        network.next_component = self.next_component
+        network.longest = self.longest
+        return network
+
+    def __len__(self):
+        return len(self.edges)
+
+    # checks if a point is blocked by another player's settlement/city
+    def is_blocked(self, point):
+        return point.building != None and point.building.owner != self.owner
+
+    # adds a road to the network
+    # returns the new longest road length
+    def add_road(self, point_one, point_two):
+        edge = len(self.edges)
+        self.edges.append((point_one, point_two))
+        self.edge_component.append(None)
+        self.adjacent.setdefault(point_one, []).append((point_two, edge))
+        self.adjacent.setdefault(point_two, []).append((point_one, edge))
+
+        # merges the components the road connects to
+        edges = [edge]
+        for p in (point_one, point_two):
+            if self.is_blocked(p):
+                continue
+            for other, e in self.adjacent[p]:
+                c = self.edge_component[e]
+                if c in self.components:
+                    edges.extend(self.components.pop(c))
+                    del self.component_lengths[c]
+
+        self.add_component(edges)
+        self.longest = max(self.component_lengths.values())
+        return self.longest
+
+    # splits the roads going through a point which has just been blocked by another player
+    # returns the new longest road length
+    def cut(self, point):
+        touching = self.adjacent.get(point, ())
+        # a point with one road cannot split anything
+        if len(touching) < 2:
+            return self.longest
+
+        # removes the components going through the point
+        edges = []
+        for other, e in touching:
+            c = self.edge_component[e]
+            if c in self.components:
+                edges.extend(self.components.pop(c))
+                del self.component_lengths[c]
+
+        # and adds back each of the parts they are split into
+        for part in self.split(edges):
+            self.add_component(part)
+
+        self.longest = max(self.component_lengths.values())
+        return self.longest
+
+    # recomputes every component, ex: after roads or buildings were removed
+    # returns the new longest road length
+    def rebuild(self, edges=None):
+        if edges == None:
+            edges = self.edges
+        self.__init__(self.owner)
+        for point_one, point_two in edges:
+            self.add_road(point_one, point_two)
+        return self.longest
+
+    # splits some edges into groups which are connected through unblocked points
+    def split(self, edges):
+        remaining = set(edges)
+        parts = []
+        while remaining:
+            first = remaining.pop()
+            part = [first]
+            to_visit = list(self.edges[first])
+            while to_visit:
+                p = to_visit.pop()
+                if self.is_blocked(p):
+                    continue
+                for other, e in self.adjacent[p]:
+                    if e in remaining:
+                        remaining.remove(e)
+                        part.append(e)
+                        to_visit.append(other)
+            parts.append(part)
+        return parts
+
+    # records a new component and finds its longest road
+    def add_component(self, edges):
+        c = self.next_component
+        self.next_component += 1
+        for e in edges:
+            self.edge_component[e] = c
+        self.components[c] = edges
+        self.component_lengths[c] = self.longest_trail(edges)
+
+    # finds the longest path through some edges which does not use an edge twice
+    # and does not go through a blocked point
+    def longest_trail(self, edges):
+        allowed = 0
+        degrees = {}
+        for e in edges:
+            allowed |= 1 << e
+            for p in self.edges[e]:
+                degrees[p] = degrees.get(p, 0) + 1
+
+        # a longest path can always be found starting on a point with an odd number of roads
+        # or a blocked point, since otherwise it could be made longer at its start.
+        # if there aren't any, every road can be used in a single loop
+        starts = [p for p, d in degrees.items() if d % 2 == 1 or self.is_blocked(p)]
+        if not starts:
+            return len(edges)
+
+        longest = 0
+        for start in starts:
+            length = self.walk(start, 0, allowed, True)
+            if length > longest:
+                longest = length
+                # cannot do any better than using every edge
+                if longest == len(edges):
+                    break
+        return longest
+
+    # returns the longest trail starting at a point without reusing the edges in used
+    def walk(self, point, used, allowed, is_start):
+        # the road cannot continue through another player's building
+        if not is_start and self.is_blocked(point):
+            return 0
+
+        longest = 0
+        for other, e in self.adjacent[point]:
+            bit = 1 << e
+            if used & bit or not allowed & bit:
+                continue
+            length = 1 + self.walk(other, used | bit, allowed, False)
+            if length > longest:
+                longest = length
+        return longest
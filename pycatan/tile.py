@@ -2,11 +2,15 @@ from pycatan.tile_type import TileType
 from pycatan.point import Point
 
 class Tile:
-    def __init__(self, type, token_num, position, points):
+    __slots__ = ("type", "token_num", "position", "points", "id")
+
+    def __init__(self, type, token_num, position, points, id=None):
         self.type = type
         self.token_num = token_num
         self.position = position
         self.points = points
+        # the number of the tile on its board, see Board.all_tiles
+        self.id = id
 
     def __repr__(self):
         return "<%s %s at %s>" % (self.type.name, self.token_num, self.position)
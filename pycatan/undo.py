@@ -0,0 +1,115 @@
+import functools
+import time
+
+# The values on Game and Player which are saved before an action
+GAME_VALUES = ("longest_road_owner", "largest_army", "has_ended", "winner", "rolled_dice", "played_devcard")
+PLAYER_VALUES = ("victory_points", "public_points", "hidden_points", "knight_cards", "longest_road_length", "num_roads", "num_settlements", "num_cities")
+
+# used for values which were not set on the game yet
+MISSING = object()
+
+# The state of a game before an action, which can be put back with restore
+# Only what the action may change is saved:
+# the buildings and their indexes, roads, robber and production index on the board, the players' cards and pieces,
+# the dev deck and the longest road/largest army owners, and the state of the game's rng if the action uses it
+# (only the generators a seeded game owns, an unseeded game's random module is left alone, see RandomStreams)
+class Snapshot(object):
+    __slots__ = ("game_values", "dev_deck", "player_values", "player_cards", "road_networks",
+                 "trade_rates", "legality", "buildings", "building_index",
+                 "tile_owners", "num_roads", "robber", "production", "random_state")
+
+    def __init__(self, game, roads=False, rng=False):
+        self.game_values = tuple(getattr(game, name, MISSING) for name in GAME_VALUES)
+        self.dev_deck = list(game.dev_deck)
+
+        self.player_values = []
+        self.player_cards = []
+        for p in game.players:
+            self.player_values.append(tuple(getattr(p, name) for name in PLAYER_VALUES))
+            self.player_cards.append((list(p.res_counts), list(p.dev_counts), list(p.new_dev_counts)))
+        # the road networks, trade rates and bitboards are only copied if the action can change them
+        if roads:
+            self.road_networks = [p.road_network.copy() for p in game.players]
+            self.trade_rates = [list(p.trade_rates) for p in game.players]
+            self.legality = game.board.legality.copy()
+        else:
+            self.road_networks = None
+
+        board = game.board
+        self.buildings = [p.building for p in board.get_all_points()]
+        self.building_index = dict((owner, dict(points)) for owner, points in board.buildings.items())
+        # the dicts in tile_owners are replaced rather than changed, like the production lists
+        self.tile_owners = dict(board.tile_owners)
+        self.num_roads = len(board.roads)
+        self.robber = board.robber
+        # the lists in the production index are replaced rather than changed, so they can be shared
+        self.production = dict(board.production)
+
+        self.random_state = game.rng.getstate() if rng else None
+
+    # puts the game back to how it was when the snapshot was taken
+    def restore(self, game):
+        for name, value in zip(GAME_VALUES, self.game_values):
+            if value is MISSING:
+                if name in game.__dict__:
+                    delattr(game, name)
+            else:
+                setattr(game, name, value)
+        game.dev_deck = self.dev_deck
+
+        for n, p in enumerate(game.players):
+            for name, value in zip(PLAYER_VALUES, self.player_values[n]):
+                setattr(p, name, value)
+            p.res_counts, p.dev_counts, p.new_dev_counts = self.player_cards[n]
+            if self.road_networks != None:
+                p.road_network = self.road_networks[n]
+                p.trade_rates = self.trade_rates[n]
+
+        board = game.board
+        for point, building in zip(board.get_all_points(), self.buildings):
+            point.building = building
+        board.buildings = self.building_index
+        board.tile_owners = self.tile_owners
+        while len(board.roads) > self.num_roads:
+            board.remove_road(board.roads[-1])
+        board._robber = self.robber
+        board.production = self.production
+        if self.road_networks != None:
+            board.legality = self.legality
+
+        if self.random_state != None:
+            game.rng.setstate(self.random_state)
+
+# Makes a Game method undoable, and marks the game as changed when it is called
+# If the game is recording (see Game.mark), a Snapshot is added to game.undo_stack before the method runs
+# If the game has counters (see ActionCounters), the call, its status and its time are counted
+# roads should be True if the method can add roads or settlements, rng if it uses the game's rng
+def undoable(roads=False, rng=False):
+    def decorator(method):
+        name = method.__name__
+
+        def run(game, args, kwargs):
+            stack = game.undo_stack
+            if stack == None:
+                return method(game, *args, **kwargs)
+            stack.append(Snapshot(game, roads, rng))
+            # any undoable methods called by this one are part of the same action
+            game.undo_stack = None
+            try:
+                return method(game, *args, **kwargs)
+            finally:
+                game.undo_stack = stack
+
+        @functools.wraps(method)
+        def wrapper(game, *args, **kwargs):
+            # any action may change the game, see Game.legal_actions
+            game.version += 1
+            counters = game.counters
+            if counters == None:
+                return run(game, args, kwargs)
+            start = time.perf_counter()
+            result = run(game, args, kwargs)
+            counters.record(name, result, time.perf_counter() - start)
+            return result
+        return wrapper
+    return decorator
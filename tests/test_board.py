@@ -4,6 +4,7 @@ from pycatan.statuses import Statuses
 from pycatan.card import ResCard
 from pycatan.tile_type import TileType
 from pycatan.tile import Tile
+from pycatan.building import BuildingType
 
 import random
 
@@ -41,3 +42,39 @@ class TestBoard:
         # Ensure the robber prevented the player from getting the card
         assert not player0.has_cards([ResCard.Brick])
 
+
+    def test_production_index_matches_board(self):
+        random.seed(2)
+        game = Game()
+        board = game.board
+        player0 = game.players[0]
+        player1 = game.players[1]
+        game.add_settlement(player0, game.get_point(2,4), True)
+        game.add_settlement(player1, game.get_point(3,7), True)
+        player1.add_cards([ResCard.Wheat] * 2 + [ResCard.Ore] * 3)
+        game.upgrade_settlement(game.get_point(3,7), player1)
+        # Count what each roll should give by looking at every point on the board
+        for roll in range(2, 13):
+            expected = {}
+            for point in board.get_all_points():
+                if point.building == None: continue
+                for tile in point.tiles:
+                    if tile.token_num != roll or board.robber is tile: continue
+                    key = (point.building.owner, Board.get_card_from_tile(tile.type))
+                    amount = 2 if point.building.type == BuildingType.City else 1
+                    expected[key] = expected.get(key, 0) + amount
+            assert sorted(board.production.get(roll, []), key=str) == sorted([(o, c, a) for (o, c), a in expected.items()], key=str)
+
+    def test_moving_robber_updates_production(self):
+        random.seed(1)
+        game = Game()
+        board = game.board
+        player0 = game.players[0]
+        game.add_settlement(player0, game.get_point(0,0), True)
+        # Block the top-left tile, then move the robber away again
+        game.move_robber(game.get_tile(0,0), None, None)
+        board.add_yield(8)
+        assert not player0.has_cards([ResCard.Brick])
+        game.move_robber(game.get_tile(2,2), None, None)
+        board.add_yield(8)
+        assert player0.has_cards([ResCard.Brick])
@@ -0,0 +1,50 @@
+from pycatan.game import Game
+from pycatan.counters import ActionCounters
+from pycatan.card import ResCard
+from pycatan.statuses import Statuses
+
+class TestCounters:
+
+    def play(self, g):
+        player0 = g.players[0]
+        g.add_settlement(player0, g.get_point(0, 0), True)
+        g.add_settlement(player0, g.get_point(0, 1), True)
+        g.trade_to_bank(player0, [ResCard.Wood] * 4, ResCard.Ore)
+        g.add_yield_for_roll(8)
+
+    def test_counts(self):
+        # nothing is counted by default
+        g = Game()
+        self.play(g)
+        assert g.counters == None
+        g = Game()
+        g.counters = ActionCounters()
+        self.play(g)
+        d = g.counters.dict()
+        assert d["add_settlement"]["calls"] == 2
+        assert d["add_settlement"]["rejections"] == 1
+        assert d["add_settlement"]["statuses"] == {"ALL_GOOD": 1, "ERR_BLOCKED": 1}
+        assert d["trade_to_bank"]["statuses"] == {"ERR_CARDS": 1}
+        assert d["add_yield_for_roll"]["calls"] == 1
+        assert d["add_yield_for_roll"]["rejections"] == 0
+        assert all(action["seconds"] >= 0 for action in d.values())
+        # forks do not count into their game's counters
+        f = g.fork()
+        self.play(f)
+        assert f.counters == None
+        assert g.counters.dict() == d
+
+    def test_merge_and_prometheus(self):
+        games = [Game() for i in range(3)]
+        total = ActionCounters()
+        for g in games:
+            g.counters = ActionCounters()
+            self.play(g)
+            total.merge(g.counters)
+        assert total.calls["add_settlement"] == 6
+        assert total.get_rejections("trade_to_bank") == 3
+        text = total.to_prometheus()
+        assert '# TYPE pycatan_action_calls_total counter' in text
+        assert 'pycatan_action_calls_total{action="add_settlement"} 6' in text
+        assert 'pycatan_action_statuses_total{action="trade_to_bank",status="ERR_CARDS"} 3' in text
+        assert text.endswith("\n")
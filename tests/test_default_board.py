@@ -1,5 +1,8 @@
 from pycatan.game import Game
 from pycatan.default_board import DefaultBoard
+from pycatan.board import Board
+from pycatan.card import ResCard
+from pycatan.statuses import Statuses
 
 class TestDefaultBoard:
     def test_get_connected_tiles(self):
@@ -144,3 +147,30 @@ class TestDefaultBoard:
         for harbor in g.board.harbors:
             print(harbor.point_one)
             assert harbor.point_two in harbor.point_one.connected_points
+
+    def test_ids(self):
+        g = Game()
+        board = g.board
+        assert [p.id for p in board.get_all_points()] == list(range(54))
+        assert [t.id for t in board.get_all_tiles()] == list(range(19))
+        assert len(board.edges) == 72
+        for n, (p1, p2) in enumerate(board.edges):
+            assert p2 in p1.connected_points
+            assert board.get_edge_id(p1, p2) == n
+            assert board.get_edge_id(p2, p1) == n
+            assert g.get_edge(n) == Board.edge_key(p1, p2)
+        assert g.get_point(9) is g.get_point(1, 2)
+        assert g.get_tile(3) is g.get_tile(1, 0)
+        # the actions take ids too
+        player0 = g.players[0]
+        player0.add_cards([ResCard.Wood, ResCard.Brick])
+        assert g.add_settlement(player0, 9, True) == Statuses.ALL_GOOD
+        edge = board.get_edge_id(g.get_point(9), g.get_point(9).connected_points[0])
+        assert g.add_road(player0, edge) == Statuses.ALL_GOOD
+        assert board.get_road(*g.get_edge(edge)).owner == 0
+        assert g.move_robber(7, player0, None) == Statuses.ALL_GOOD
+        assert board.robber is g.get_tile(7)
+        # and are the same on a fork
+        f = g.fork()
+        assert [p.id for p in f.board.get_all_points()] == list(range(54))
+        assert [(p1.id, p2.id) for p1, p2 in f.board.edges] == [(p1.id, p2.id) for p1, p2 in board.edges]
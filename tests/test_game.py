@@ -1,8 +1,11 @@
 from pycatan.game import Game
+from pycatan.game_state import GameState
+from pycatan.board import Board
 from pycatan.building import *
-from pycatan.card import ResCard
+from pycatan.card import ResCard, DevCard
 from pycatan.statuses import Statuses
 from pycatan.harbor import HarborType
+from pycatan.tile_type import TileType
 import random
 import logging
 
@@ -149,6 +152,24 @@ class TestGame:
         assert res == Statuses.ERR_CARDS
         assert not player0.has_cards([ResCard.Sheep])
         assert player0.has_cards([ResCard.Ore])
+
+    def test_harbor_trade_rates(self):
+        g = Game()
+        player0 = g.players[0]
+        # Add Settlement next to the harbor on the top
+        res = g.add_settlement(player0, g.get_point(0,2), is_starting=True)
+        assert res == Statuses.ALL_GOOD
+        harbor = [h for h in g.board.harbors if g.get_point(0,2) in h.get_points()][0]
+        # Changing the harbor's type changes the trade rates of the players on it
+        harbor.type = HarborType.Ore
+        assert player0.trade_rates[ResCard.Ore.value] == 2
+        assert player0.trade_rates[ResCard.Brick.value] == 4
+        harbor.type = HarborType.Any
+        assert player0.trade_rates[ResCard.Ore.value] == 3
+        assert player0.trade_rates[ResCard.Brick.value] == 3
+        # The other players are not changed
+        assert g.players[1].trade_rates == [4] * 5
+
     def test_moving_robber(self):
         random.seed(1)
         g = Game()
@@ -172,6 +193,40 @@ class TestGame:
         # Make sure they stole the brick
         assert player1.has_cards([ResCard.Brick])
 
+    def test_robber_candidates(self):
+        random.seed(3)
+        g = Game()
+        player0 = g.players[0]
+        player1 = g.players[1]
+        g.add_settlement(player0, g.get_point(1,1), is_starting=True)
+        g.add_settlement(player1, g.get_point(2,4), is_starting=True)
+        g.add_settlement(player1, g.get_point(3,6), is_starting=True)
+        player1.add_cards([ResCard.Ore] * 3 + [ResCard.Wheat] * 3)
+        g.upgrade_settlement(g.get_point(2,4), player1)
+        # the weights match the buildings around each tile
+        for tile in g.board.get_all_tiles():
+            weights = {}
+            for p in tile.points:
+                if p.building != None:
+                    weights[p.building.owner] = weights.get(p.building.owner, 0) + (2 if p.building.type == BuildingType.City else 1)
+            assert g.board.tile_owners.get(tile, {}) == weights
+        candidates = g.board.robber_candidates(player0)
+        assert len(candidates) == len(g.board.get_all_tiles()) - 1
+        assert g.board.robber not in [tile for score, tile, victims in candidates]
+        scores = [score for score, tile, victims in candidates]
+        assert scores == sorted(scores, reverse=True)
+        # the knight's targets in legal_actions are in the same order
+        player0.dev_counts[DevCard.Knight.value] = 1
+        targets = g.legal_actions(player0)["use_dev_card"][DevCard.Knight]
+        assert [tile for tile, victim in targets if victim == None] == [tile for score, tile, victims in candidates]
+        assert targets[0] == (candidates[0][1], candidates[0][2][0] if candidates[0][2] else None)
+        # the best tile takes from player1, and player0 never robs themselves
+        score, tile, victims = candidates[0]
+        assert victims == [player1]
+        assert all(player0 not in victims for score, tile, victims in candidates)
+        assert g.move_robber(tile, player0, player1) == Statuses.ALL_GOOD
+        assert player0.num_cards == 1
+
     def test_get_buildings(self):
         # Create game
         g = Game()
@@ -191,6 +246,9 @@ class TestGame:
 
         buildings = player0.get_buildings()
         assert len(buildings) == 2
+        assert [b.point for b in buildings] == [g.get_point(5,3), g.get_point(3,2)]
+        assert g.board.get_buildings() == buildings
+        assert g.fork().players[0].get_buildings()[1].point.position == (3,2)
         
 
     def test_get_available_settlements1(self):
@@ -312,3 +370,217 @@ class TestGame:
         assert len(buildings) == 1
 
         assert buildings[0].type == BuildingType.City
+
+    def test_monopoly_takes_all_cards(self):
+        g = Game()
+        player0 = g.players[0]
+        player1 = g.players[1]
+        player2 = g.players[2]
+        player1.add_cards([ResCard.Wheat] * 3 + [ResCard.Ore])
+        player2.add_cards([ResCard.Wheat] * 2)
+        player0.add_dev_card(DevCard.Monopoly)
+        player0.finished_turn()
+        res = g.use_dev_card(player0, DevCard.Monopoly, {'card_type': ResCard.Wheat})
+        assert res == Statuses.ALL_GOOD
+        assert player0.count_cards(ResCard.Wheat) == 5
+        assert player1.cards == [ResCard.Ore]
+        assert player2.num_cards == 0
+        assert not player0.has_dev_cards([DevCard.Monopoly])
+
+    def test_affordable(self):
+        g = Game()
+        player0 = g.players[0]
+        assert player0.affordable() == {"settlement": False, "city": False, "dev": False, "road": False}
+        player0.add_cards([ResCard.Wood, ResCard.Brick, ResCard.Sheep, ResCard.Wheat])
+        assert player0.affordable() == {"settlement": True, "city": False, "dev": False, "road": True}
+        player0.remove_cards([ResCard.Wood])
+        player0.add_cards([ResCard.Ore])
+        assert player0.affordable() == {"settlement": False, "city": False, "dev": True, "road": False}
+
+    def test_road_index(self):
+        g = Game()
+        player0 = g.players[0]
+        player1 = g.players[1]
+        g.add_settlement(player0, g.get_point(0,0), True)
+        g.add_road(player0, g.get_point(0,0), g.get_point(0,1), True)
+        road = g.board.get_road(g.get_point(0,1), g.get_point(0,0))
+        assert road is g.board.get_road(g.get_point(0,0), g.get_point(0,1))
+        assert road.owner == 0
+        assert g.board.get_point_roads(g.get_point(0,1)) == [road]
+        assert g.board.get_road(g.get_point(0,1), g.get_point(0,2)) == None
+        # Building on top of an existing road is blocked
+        res = g.add_road(player0, g.get_point(0,1), g.get_point(0,0), True)
+        assert res == Statuses.ERR_BLOCKED
+        # Another player's road does not connect this player's road
+        res = g.add_road(player1, g.get_point(0,1), g.get_point(0,2), True)
+        assert res == Statuses.ERR_ISOLATED
+
+    def test_reset(self):
+        g = Game()
+        player0 = g.players[0]
+        g.add_settlement(player0, g.get_point(0,0), True)
+        g.add_road(player0, g.get_point(0,0), g.get_point(0,1), True)
+        player0.add_cards([ResCard.Wood] * 3)
+        g.build_dev(player0)
+        g.reset(seed=4)
+        assert g.board.roads == []
+        assert g.board.get_road(g.get_point(0,0), g.get_point(0,1)) == None
+        assert all(p.building == None for p in g.board.get_all_points())
+        assert player0.num_cards == 0
+        assert player0.num_roads == 15 and player0.num_settlements == 5
+        assert player0.longest_road_length == 0
+        assert len(g.dev_deck) == 25
+        assert g.board.robber.type == TileType.Desert
+        # Resetting with a seed gives the same game as a new one with that seed
+        new_game = Game(seed=4)
+        assert g.board.get_layout() == new_game.board.get_layout()
+        assert g.dev_deck == new_game.dev_deck
+
+    def test_reset_with_layout(self):
+        g = Game()
+        layout = g.board.get_layout()
+        g.add_settlement(g.players[0], g.get_point(2,2), True)
+        g.reset(layout=layout)
+        assert g.board.get_layout() == layout
+        assert g.get_point(2,2).building == None
+        # The production index is rebuilt for the new game
+        assert all(entries == [] for entries in g.board.production.values())
+
+    def test_fork(self):
+        g = Game()
+        player0 = g.players[0]
+        g.add_settlement(player0, g.get_point(2,0), True)
+        for i in range(5):
+            g.add_road(player0, g.get_point(2,i), g.get_point(2,i+1), True)
+        player0.add_cards([ResCard.Wood, ResCard.Brick] * 2)
+        f = g.fork()
+        assert GameState.from_game(f).to_bytes() == GameState.from_game(g).to_bytes()
+        assert f.longest_road_owner is f.players[0]
+        assert f.get_point(2,0).building.point is f.get_point(2,0)
+        assert f.get_point(2,0).tiles[0] is f.get_tile(2,0)
+        # changing the fork does not change the original
+        assert f.add_road(f.players[0], f.get_point(2,5), f.get_point(2,6)) == Statuses.ALL_GOOD
+        assert f.add_settlement(f.players[1], f.get_point(2,3), True) == Statuses.ALL_GOOD
+        assert f.players[0].longest_road_length == 3
+        assert player0.longest_road_length == 5
+        assert g.get_point(2,3).building == None
+        assert g.board.get_road(g.get_point(2,5), g.get_point(2,6)) == None
+        assert player0.count_cards(ResCard.Wood) == 2
+
+    def test_legal_actions(self):
+        random.seed(4)
+        g = Game()
+        for p, starts in zip(g.players, [[(0, 0), (3, 2)], [(2, 4), (5, 5)], [(4, 0), (1, 7)]]):
+            for pos in starts:
+                g.add_settlement(p, g.get_point(*pos), True)
+                g.add_road(p, g.get_point(*pos), g.get_point(*pos).connected_points[0], True)
+        player0 = g.players[0]
+        player0.add_cards([ResCard.Wood, ResCard.Brick] * 20 + [ResCard.Sheep, ResCard.Wheat, ResCard.Ore] * 6)
+        player0.dev_counts = [1] * 5
+        g.mark()
+        for i in range(10):
+            actions = g.legal_actions(player0)
+            # cached until something changes
+            assert g.legal_actions(player0) is actions
+            # every action given can be taken
+            for start, end in actions["build_road"]:
+                assert g.add_road(player0, start, end) == Statuses.ALL_GOOD
+                g.undo()
+            for point in actions.get("build_settlement", ()):
+                assert g.add_settlement(player0, point) == Statuses.ALL_GOOD
+                g.undo()
+            for point in actions["upgrade_settlement"]:
+                assert g.upgrade_settlement(point, player0) == Statuses.ALL_GOOD
+                g.undo()
+            for card, rate in actions["trade_to_bank"]:
+                assert g.trade_to_bank(player0, [card] * rate, ResCard.Wood) == Statuses.ALL_GOOD
+                g.undo()
+            for tile, victim in actions["use_dev_card"][DevCard.Knight]:
+                assert g.use_dev_card(player0, DevCard.Knight, {"robber_tile": tile, "victim": victim}) == Statuses.ALL_GOOD
+                g.undo()
+            # and no other settlements can be built
+            settlements = set(actions.get("build_settlement", ()))
+            for point in g.board.get_all_points():
+                if point not in settlements:
+                    assert g.add_settlement(player0, point) != Statuses.ALL_GOOD
+                    g.undo()
+            assert set(map(frozenset, actions["build_road"])) == set(map(frozenset, player0.get_available_roads()))
+            start, end = random.choice(actions["build_road"])
+            g.add_road(player0, start, end)
+            assert g.legal_actions(player0) is not actions
+
+    def test_settlement_points_and_road_frontier(self):
+        random.seed(6)
+        g = Game()
+        # the points each player could build a settlement on, the slow way
+        def expected(player):
+            points = set()
+            for point in g.board.get_all_points():
+                if point.building == None and all(p.building == None for p in point.connected_points):
+                    if player.has_road_at(point):
+                        points.add(point)
+            return points
+        # the roads each player could build, the slow way
+        def expected_roads(player):
+            roads = set()
+            for p1 in g.board.get_all_points():
+                for p2 in p1.connected_points:
+                    if player.road_location_is_valid(p1, p2) == Statuses.ALL_GOOD:
+                        roads.add(Board.edge_key(p1, p2))
+            return roads
+        for p in g.players:
+            assert len(p.get_available_settlements()) == 54
+            p.add_cards([ResCard.Wood, ResCard.Brick, ResCard.Sheep, ResCard.Wheat] * 10)
+        for p, starts in zip(g.players, [[(0, 0), (3, 2)], [(2, 4), (5, 5)], [(4, 0), (1, 7)]]):
+            for pos in starts:
+                g.add_settlement(p, g.get_point(*pos), True)
+                g.add_road(p, g.get_point(*pos), g.get_point(*pos).connected_points[0], True)
+        for i in range(60):
+            player = g.players[i % 3]
+            road = random.choice(player.get_available_roads())
+            g.add_road(player, road[0], road[1])
+            if player.get_available_settlements() and random.random() < 0.3:
+                g.add_settlement(player, random.choice(player.get_available_settlements()))
+            for p in g.players:
+                assert set(p.get_available_settlements()) == expected(p)
+                assert len(p.get_available_settlements()) == len(p.settlement_points)
+                assert set(p.get_available_roads()) == expected_roads(p)
+        f = g.fork()
+        for p, fp in zip(g.players, f.players):
+            assert [point.position for point in p.settlement_points] == [point.position for point in fp.settlement_points]
+            assert [(p1.position, p2.position) for p1, p2 in p.road_frontier] == [(p1.position, p2.position) for p1, p2 in fp.road_frontier]
+
+    def test_victory_points(self):
+        g = Game()
+        player0 = g.players[0]
+        player1 = g.players[1]
+        g.add_settlement(player0, g.get_point(2,0), True)
+        g.add_settlement(player1, g.get_point(0,0), True)
+        assert player0.get_VP() == 1
+        # longest road is worth two points
+        for i in range(5):
+            g.add_road(player0, g.get_point(2,i), g.get_point(2,i+1), True)
+        assert g.longest_road_owner is player0
+        assert player0.get_VP() == 3
+        # and is lost when the road is cut
+        g.add_settlement(player1, g.get_point(2,3), True)
+        assert g.longest_road_owner == None
+        assert player0.get_VP() == 1
+        # victory point cards are hidden, but count as soon as the player has them
+        player0.add_dev_card(DevCard.VictoryPoint)
+        assert player0.get_VP() == 1
+        assert player0.get_VP(include_dev=True) == 2
+        # largest army moves to whoever has played the most knights
+        for player in (player0, player1):
+            player.dev_counts[DevCard.Knight.value] = 4
+            for i in range(3 if player is player0 else 4):
+                tile = g.board.robber_candidates(player)[-1][1]
+                assert g.use_dev_card(player, DevCard.Knight, {"robber_tile": tile, "victim": None}) == Statuses.ALL_GOOD
+        assert g.largest_army is player1
+        assert player0.get_VP() == 1
+        assert player1.get_VP() == 4
+        # the stored points match working them out from scratch
+        for p in g.players:
+            points = (p.public_points, p.hidden_points)
+            p.reindex_points()
+            assert (p.public_points, p.hidden_points) == points
@@ -0,0 +1,152 @@
+from pycatan.game import Game
+from pycatan.game_state import GameState, NONE, PLAYERS, PLAYER_SIZE, P_RES, P_DEV, P_NEW_DEV, DEV_DECK
+from pycatan.default_board import DefaultBoard
+from pycatan.building import BuildingType
+from pycatan.card import ResCard, DevCard
+from pycatan.statuses import Statuses
+
+import random
+
+def point(r, i):
+    return DefaultBoard.get_topology().point_indexes[(r, i)]
+
+def edge(a, b):
+    return DefaultBoard.get_topology().edge_indexes[(point(*a), point(*b))]
+
+# plays some turns of a game through the Game object
+def play_some_turns(g, turns):
+    for p in g.players:
+        p.add_cards([ResCard.Wood, ResCard.Brick, ResCard.Sheep, ResCard.Wheat, ResCard.Ore] * 10)
+    for i in range(turns):
+        player = g.players[i % len(g.players)]
+        g.add_yield_for_roll(random.randint(1, 6) + random.randint(1, 6))
+        roads = player.get_available_roads()
+        if roads:
+            road = random.choice(roads)
+            g.add_road(player, road[0], road[1])
+        settlements = player.get_available_settlements()
+        if settlements:
+            g.add_settlement(player, random.choice(settlements))
+
+class TestGameState:
+
+    def test_round_trip(self):
+        random.seed(3)
+        g = Game()
+        starts = [(0, 0), (2, 4), (4, 0)]
+        for p, pos in zip(g.players, starts):
+            g.add_settlement(p, g.get_point(*pos), True)
+            g.add_road(p, g.get_point(*pos), g.get_point(*pos).connected_points[0], True)
+        play_some_turns(g, 12)
+
+        state = GameState.from_game(g)
+        # the state should match the game
+        for p in g.players:
+            assert state.get_road_length(p.num) == p.longest_road_length
+            assert state.count_buildings(p.num) == p.victory_points
+            for card in ResCard:
+                assert state.get_res(p.num, card) == p.count_cards(card)
+        for pos in [b.point.position for b in g.board.get_buildings()]:
+            assert state.get_point(point(*pos))[0] != NONE
+
+        # and converting it back should give the same game
+        g2 = state.to_game()
+        assert GameState.from_game(g2).to_bytes() == state.to_bytes()
+        assert g2.board.get_layout() == g.board.get_layout()
+        for p, p2 in zip(g.players, g2.players):
+            assert p.longest_road_length == p2.longest_road_length
+            assert sorted(p.cards, key=lambda c: c.value) == sorted(p2.cards, key=lambda c: c.value)
+
+    def test_copy_is_independent(self):
+        state = GameState.from_game(Game())
+        copy = state.copy()
+        assert copy.layout is state.layout
+        assert copy.build_settlement(0, point(0, 0), True) == Statuses.ALL_GOOD
+        assert state.get_point(point(0, 0)) == (NONE, 0)
+        assert copy.get_point(point(0, 0)) == (0, 1)
+
+    def test_building_rules(self):
+        state = GameState.from_game(Game())
+        assert state.build_settlement(0, point(0, 0), True) == Statuses.ALL_GOOD
+        # too close
+        assert state.build_settlement(1, point(0, 1), True) == Statuses.ERR_BLOCKED
+        # not connected to a road
+        state.data[PLAYERS + P_RES:PLAYERS + P_RES + 5] = bytes([1, 1, 0, 1, 1])
+        assert state.build_settlement(0, point(0, 4)) == Statuses.ERR_ISOLATED
+        assert state.build_road(0, edge((2, 0), (2, 1)), True) == Statuses.ERR_ISOLATED
+        state.data[PLAYERS + P_RES:PLAYERS + P_RES + 5] = bytes(5)
+        assert state.build_road(0, edge((0, 0), (0, 1))) == Statuses.ERR_CARDS
+        assert state.build_road(0, edge((0, 0), (0, 1)), True) == Statuses.ALL_GOOD
+        assert state.build_road(1, edge((0, 0), (0, 1)), True) == Statuses.ERR_BLOCKED
+        assert state.upgrade_settlement(0, point(0, 0)) == Statuses.ERR_CARDS
+        assert state.upgrade_settlement(1, point(0, 0)) == Statuses.ERR_BAD_OWNER
+        assert state.upgrade_settlement(0, point(0, 1)) == Statuses.ERR_NOT_EXIST
+
+    def test_dev_card_win(self):
+        # a deck of victory point cards, so both draw one
+        g = Game(points_to_win=1)
+        g.dev_deck = [DevCard.VictoryPoint] * 25
+        state = GameState.from_game(g)
+        player = g.players[0]
+        player.add_cards([ResCard.Sheep, ResCard.Wheat, ResCard.Ore])
+        state.data[PLAYERS + P_RES + ResCard.Sheep.value] = 1
+        state.data[PLAYERS + P_RES + ResCard.Wheat.value] = 1
+        state.data[PLAYERS + P_RES + ResCard.Ore.value] = 1
+        assert g.build_dev(player) == Statuses.ALL_GOOD
+        assert state.build_dev(0, random.Random(1)) == Statuses.ALL_GOOD
+        assert state.get_VP(0, include_dev=True) == player.get_VP(include_dev=True) == 1
+        assert g.winner == player
+        assert state.get_winner() == 0
+
+    def test_longest_road_and_win(self):
+        state = GameState.from_game(Game())
+        state.build_settlement(0, point(2, 0), True)
+        for i in range(5):
+            assert state.build_road(0, edge((2, i), (2, i + 1)), True) == Statuses.ALL_GOOD
+        assert state.get_road_length(0) == 5
+        assert state.get_longest_road_owner() == 0
+        assert state.get_VP(0) == 3
+        # another player's settlement cuts the road
+        state.build_settlement(1, point(2, 3), True)
+        assert state.get_road_length(0) == 3
+        assert state.get_longest_road_owner() == None
+
+    def test_yield_and_robber(self):
+        g = Game()
+        state = GameState.from_game(g)
+        # finds a tile which produces something
+        tile = state.layout.tile_cards.index(ResCard.Ore.value)
+        p = DefaultBoard.get_topology().tile_points[tile][0]
+        state.build_settlement(0, p, True)
+        state.move_robber(1, state.layout.tile_cards.index(None))
+        state.add_yield(state.layout.tokens[tile])
+        assert state.get_res(0, ResCard.Ore) >= 1
+        # moving the robber onto the tile stops it producing
+        assert state.move_robber(1, tile, 0) == Statuses.ALL_GOOD
+        assert state.get_res(1, ResCard.Ore) == 1
+        assert state.num_cards(0) == 0
+        state.add_yield(state.layout.tokens[tile])
+        assert state.get_res(0, ResCard.Ore) == 0
+        # the victim has to have a building on the tile
+        assert state.move_robber(1, tile, 2) == Statuses.ERR_INPUT
+
+    def test_dev_cards(self):
+        state = GameState.from_game(Game())
+        player0 = PLAYERS
+        player1 = PLAYERS + PLAYER_SIZE
+        state.data[player0 + P_DEV + DevCard.Monopoly.value] = 1
+        state.data[player1 + P_RES + ResCard.Ore.value] = 4
+        assert state.use_dev_card(0, DevCard.Monopoly, {"card_type": ResCard.Ore}) == Statuses.ALL_GOOD
+        assert state.get_res(0, ResCard.Ore) == 4
+        assert state.get_res(1, ResCard.Ore) == 0
+        assert state.use_dev_card(0, DevCard.Monopoly, {"card_type": ResCard.Ore}) == Statuses.ERR_CARDS
+        # buying a card takes one from the deck, and it cannot be used until the next turn
+        state.data[player0 + P_RES + ResCard.Sheep.value] = 1
+        state.data[player0 + P_RES + ResCard.Wheat.value] = 1
+        assert state.build_dev(0, random.Random(1)) == Statuses.ALL_GOOD
+        assert state.build_dev(0, random.Random(1)) == Statuses.ERR_CARDS
+        assert sum(state.data[DEV_DECK:DEV_DECK + 5]) == 24
+        assert sum(state.data[player0 + P_NEW_DEV:player0 + P_NEW_DEV + 5]) == 1
+        state.finished_turn(0)
+        assert sum(state.data[player0 + P_NEW_DEV:player0 + P_NEW_DEV + 5]) == 0
+        assert sum(state.data[player0 + P_DEV:player0 + P_DEV + 5]) == 1
@@ -0,0 +1,54 @@
+import os, sys
+
+# the ladder is in examples, which is not a package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "examples"))
+
+from ladder import Rating, rate_game, get_ranks, pick_group
+
+class TestLadder:
+
+    def test_rate_game(self):
+        winner, loser = Rating(), Rating()
+        rate_game([winner, loser], [0, 1])
+        assert winner.mu > Rating.MU and loser.mu < Rating.MU
+        # two equal ratings move by the same amount
+        assert abs((winner.mu - Rating.MU) - (Rating.MU - loser.mu)) < 1e-9
+        assert winner.sigma < Rating.SIGMA and loser.sigma < Rating.SIGMA
+        assert winner.games == loser.games == 1
+        # beating a weaker player gains less than beating an equal one
+        gain = winner.mu - Rating.MU
+        strong, weak = Rating(mu=30.), Rating(mu=20.)
+        rate_game([strong, weak], [0, 1])
+        assert 0 < strong.mu - 30. < gain
+
+    def test_ties_and_ranks(self):
+        # a tie between equal ratings only makes them more certain
+        a, b = Rating(), Rating()
+        rate_game([a, b], [0, 0])
+        assert a.mu == b.mu == Rating.MU
+        assert a.sigma == b.sigma < Rating.SIGMA
+        # with three equal ratings, the middle one beats one and loses to one, so does not move
+        first, second, third = Rating(), Rating(), Rating()
+        rate_game([third, first, second], [2, 0, 1])
+        assert first.mu > second.mu > third.mu
+        assert abs(second.mu - Rating.MU) < 1e-9
+
+    def test_get_ranks(self):
+        # the winner comes first, then the others by their points, with equal points tied
+        result = {"seats": ["a", "b", "c", "d"], "scores": [10, 7, 4, 7], "winner": "a"}
+        assert get_ranks(result) == [0, 1, 2, 1]
+        # a game nobody won is ranked by the points alone
+        result = {"seats": ["a", "b", "c"], "scores": [6, 8, 6], "winner": None}
+        assert get_ranks(result) == [1, 0, 1]
+
+    def test_pick_group(self):
+        ratings = {"a": Rating(sigma=1.), "b": Rating(), "c": Rating(mu=40.), "d": Rating(), "e": Rating(sigma=2.)}
+        # the game is built around the most uncertain player, ties going to the first name,
+        # and then the uncertain players are picked before the nearly certain ones
+        assert pick_group(ratings, 3, {}) == ["b", "d", "c"]
+        # between players who are as uncertain, the even match is picked
+        ratings["c"].sigma = ratings["e"].sigma = 2.
+        assert pick_group(ratings, 3, {}) == ["b", "d", "e"]
+        # players who are already down to play many games are picked less
+        group = pick_group(ratings, 3, {"b": 20, "d": 20})
+        assert group[0] == "c" and len(set(group)) == 3
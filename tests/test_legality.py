@@ -0,0 +1,106 @@
+from pycatan.game import Game
+from pycatan.legality import mask_ids
+from pycatan.card import ResCard
+from pycatan.statuses import Statuses
+
+import random
+
+# the points a player can build a settlement on, the slow way
+def slow_settlements(g, player):
+    points = []
+    for point in g.board.get_all_points():
+        if point.building != None or any(p.building != None for p in point.connected_points):
+            continue
+        if any(r.owner == player.num for r in g.board.get_point_roads(point)):
+            points.append(point.id)
+    return points
+
+# the edges a player can build a road on, the slow way
+def slow_roads(g, player):
+    edges = []
+    for n, (p1, p2) in enumerate(g.board.edges):
+        if g.board.get_road(p1, p2) != None:
+            continue
+        for p in (p1, p2):
+            if p.building != None:
+                if p.building.owner == player.num:
+                    edges.append(n)
+                    break
+            elif any(r.owner == player.num for r in g.board.get_point_roads(p)):
+                edges.append(n)
+                break
+    return edges
+
+class TestLegality:
+
+    def test_mask_ids(self):
+        assert mask_ids(0) == []
+        assert mask_ids(0b101001) == [0, 3, 5]
+        assert mask_ids(1 << 71) == [71]
+
+    def test_masks_match_board(self):
+        random.seed(4)
+        g = Game()
+        legality = g.board.legality
+        for p, starts in zip(g.players, [[(0, 0), (3, 2)], [(2, 4), (5, 5)], [(4, 0), (1, 7)]]):
+            for pos in starts:
+                g.add_settlement(p, g.get_point(*pos), True)
+                g.add_road(p, g.get_point(*pos), g.get_point(*pos).connected_points[0], True)
+            p.add_cards([ResCard.Wood, ResCard.Brick] * 20 + [ResCard.Sheep, ResCard.Wheat] * 10)
+        for i in range(36):
+            player = g.players[i % 3]
+            road = random.choice(player.get_available_roads())
+            assert g.add_road(player, road[0], road[1]) == Statuses.ALL_GOOD
+            if player.num_settlements > 0 and player.get_available_settlements() and random.random() < 0.3:
+                assert g.add_settlement(player, random.choice(player.get_available_settlements())) == Statuses.ALL_GOOD
+            legality = g.board.legality
+            for p in g.players:
+                assert mask_ids(legality.settlement_mask(p.num)) == slow_settlements(g, p)
+                assert mask_ids(legality.road_mask(p.num)) == slow_roads(g, p)
+        # the bitboards are rebuilt the same way, and copied by fork
+        g.board.reindex_legality()
+        f = g.fork()
+        for p in g.players:
+            assert f.board.legality.road_mask(p.num) == legality.road_mask(p.num)
+            assert g.board.legality.settlement_mask(p.num) == legality.settlement_mask(p.num)
+
+    def test_statuses(self):
+        g = Game()
+        player0 = g.players[0]
+        player1 = g.players[1]
+        legality = g.board.legality
+        point = g.get_point(2, 2)
+        assert legality.settlement_status(0, point.id) == Statuses.ERR_ISOLATED
+        assert legality.settlement_status(0, point.id, is_starting=True) == Statuses.ALL_GOOD
+        g.add_settlement(player0, point, True)
+        for p in (point,) + tuple(point.connected_points):
+            assert legality.settlement_status(1, p.id, is_starting=True) == Statuses.ERR_BLOCKED
+        other = point.connected_points[0]
+        assert player0.road_location_is_valid(point, other) == Statuses.ALL_GOOD
+        assert player1.road_location_is_valid(point, other) == Statuses.ERR_ISOLATED
+        assert player0.road_location_is_valid(point, g.get_point(4, 4)) == Statuses.ERR_NOT_CON
+        g.add_road(player0, point, other, True)
+        assert player0.road_location_is_valid(point, other) == Statuses.ERR_BLOCKED
+        assert player0.has_road_at(other) and not player1.has_road_at(other)
+
+    def test_undo_to(self):
+        g = Game()
+        player0 = g.players[0]
+        g.add_settlement(player0, g.get_point(2, 0), True)
+        g.add_road(player0, g.get_point(2, 0), g.get_point(2, 1), True)
+        g.add_road(player0, g.get_point(2, 1), g.get_point(2, 2), True)
+        player0.add_cards([ResCard.Wood, ResCard.Brick] * 6 + [ResCard.Sheep, ResCard.Wheat] * 2 + [ResCard.Ore] * 4)
+        before = [list(p.settlement_points) for p in g.players]
+        actions = g.legal_actions(player0)
+        mark = g.mark()
+        # an action which does not save the bitboards comes first
+        g.trade_to_bank(player0, [ResCard.Ore] * 4, ResCard.Wood)
+        for i in range(2, 6):
+            assert g.add_road(player0, g.get_point(2, i), g.get_point(2, i + 1)) == Statuses.ALL_GOOD
+        assert g.add_settlement(player0, g.get_point(2, 4)) == Statuses.ALL_GOOD
+        assert [list(p.settlement_points) for p in g.players] != before
+        g.undo_to(mark)
+        assert [list(p.settlement_points) for p in g.players] == before
+        assert mask_ids(g.board.legality.settlement_mask(0)) == slow_settlements(g, player0)
+        assert mask_ids(g.board.legality.road_mask(0)) == slow_roads(g, player0)
+        assert g.legal_actions(player0) == actions
@@ -0,0 +1,38 @@
+from pycatan.game import Game
+from pycatan.building import Road, Settlement, City
+
+import gc
+import tracemalloc
+
+# the number of games to average the memory over
+NUM_GAMES = 100
+
+class TestMemory:
+
+    def test_model_objects_have_no_dict(self):
+        g = Game()
+        point = g.get_point(0,0)
+        g.add_settlement(g.players[0], point, True)
+        g.add_road(g.players[0], point, g.get_point(0,1), True)
+        objects = [point, g.get_tile(0,0), g.board.harbors[0], g.players[0], g.board.roads[0], point.building,
+                   City(0, point)]
+        for o in objects:
+            assert not hasattr(o, "__dict__")
+        # positions are immutable
+        assert isinstance(point.position, tuple)
+        assert isinstance(g.get_tile(0,0).position, tuple)
+
+    def test_bytes_per_game(self):
+        # make one game first so the shared board topology is not counted
+        Game()
+        gc.collect()
+        tracemalloc.start()
+        try:
+            before = tracemalloc.get_traced_memory()[0]
+            games = [Game() for i in range(NUM_GAMES)]
+            gc.collect()
+            bytes_per_game = (tracemalloc.get_traced_memory()[0] - before) / NUM_GAMES
+        finally:
+            tracemalloc.stop()
+        print("bytes per Game: %d" % bytes_per_game)
+        assert bytes_per_game < 32000
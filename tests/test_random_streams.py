@@ -0,0 +1,85 @@
+from pycatan.game import Game
+from pycatan.random_streams import RandomStreams
+from pycatan.card import ResCard, DevCard
+from pycatan.statuses import Statuses
+
+import random
+
+# rolls the dice n times
+def rolls(g, n):
+    result = []
+    for i in range(n):
+        g.rolled_dice = False
+        result.append(g.get_roll())
+    return result
+
+class TestRandomStreams:
+
+    def test_seeded_games_are_independent(self):
+        one = Game(seed=7)
+        random.seed(1)
+        two = Game(seed=7)
+        assert one.board.get_layout() == two.board.get_layout()
+        assert one.dev_deck == two.dev_deck
+        # the global random module does not change the game
+        random.seed(2)
+        first = rolls(one, 20)
+        random.seed(3)
+        assert rolls(two, 20) == first
+        assert Game(seed=8).board.get_layout() != one.board.get_layout()
+
+    def test_dice_do_not_depend_on_steals(self):
+        one = Game(seed=3)
+        two = Game(seed=3)
+        victim = two.players[1]
+        two.add_settlement(victim, two.get_point(2,2), True)
+        victim.add_cards([ResCard.Wood, ResCard.Ore, ResCard.Sheep])
+        for i in range(3):
+            tile = two.get_point(2,2).tiles[i]
+            assert two.move_robber(tile, two.players[0], victim) == Statuses.ALL_GOOD
+        assert two.players[0].num_cards == 3
+        assert rolls(one, 10) == rolls(two, 10)
+
+    def test_set_rolls(self):
+        g = Game(seed=1)
+        g.rng.set_rolls([8, 8, 7])
+        assert rolls(g, 3) == [8, 8, 7]
+        # then the dice carry on as they would have
+        assert rolls(g, 5) == rolls(Game(seed=1), 5)
+
+    def test_fork_and_undo(self):
+        g = Game(seed=5)
+        f = g.fork()
+        assert rolls(f, 10) == rolls(g, 10)
+        victim = g.players[1]
+        g.add_settlement(victim, g.get_point(2,2), True)
+        victim.add_cards([ResCard.Wood, ResCard.Ore, ResCard.Sheep, ResCard.Wheat])
+        g.mark()
+        tile = g.get_point(2,2).tiles[0]
+        g.move_robber(tile, g.players[0], victim)
+        stolen = g.players[0].get_random_card()
+        g.undo()
+        g.move_robber(tile, g.players[0], victim)
+        assert g.players[0].res_counts[stolen.value] == 1
+
+    def test_unseeded_uses_random(self):
+        random.seed(4)
+        one = Game()
+        random.seed(4)
+        two = Game()
+        assert one.rng.seed == None and one.rng.dice is random
+        # the game does not own the random module, so undo does not save it
+        assert one.rng.getstate()[0] == ()
+        assert one.board.get_layout() == two.board.get_layout()
+
+    def test_deepcopy_and_pickle(self):
+        import copy, pickle
+        g = Game(seed=2)
+        g.rng.set_rolls([4, 10])
+        one = copy.deepcopy(g.rng)
+        two = pickle.loads(pickle.dumps(g.rng))
+        expected = [g.rng.roll() for i in range(6)]
+        assert [one.roll() for i in range(6)] == expected
+        assert [two.roll() for i in range(6)] == expected
+        # unseeded streams still use the random module
+        assert copy.deepcopy(Game()).rng.dice is random
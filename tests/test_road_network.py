@@ -0,0 +1,81 @@
+from pycatan.game import Game
+from pycatan.statuses import Statuses
+
+import random
+
+# finds the longest road by trying every path, the slow way
+def brute_force_longest(player):
+    roads = player.get_roads()
+
+    def walk(point, used, is_start):
+        if not is_start and point.building != None and point.building.owner != player.num:
+            return 0
+        longest = 0
+        for r in roads:
+            if r in used: continue
+            if r.point_one is point: other = r.point_two
+            elif r.point_two is point: other = r.point_one
+            else: continue
+            longest = max(longest, 1 + walk(other, used + [r], False))
+        return longest
+
+    longest = 0
+    for r in roads:
+        for p in (r.point_one, r.point_two):
+            longest = max(longest, walk(p, [], True))
+    return longest
+
+class TestRoadNetwork:
+
+    def test_straight_road(self):
+        g = Game()
+        player0 = g.players[0]
+        g.add_settlement(player0, g.get_point(2,0), True)
+        for i in range(10):
+            assert g.add_road(player0, g.get_point(2,i), g.get_point(2,i+1), True) == Statuses.ALL_GOOD
+            assert player0.longest_road_length == i + 1
+        assert g.longest_road_owner is player0
+
+    def test_settlement_cuts_road(self):
+        g = Game()
+        player0 = g.players[0]
+        player1 = g.players[1]
+        g.add_settlement(player0, g.get_point(2,0), True)
+        for i in range(7):
+            g.add_road(player0, g.get_point(2,i), g.get_point(2,i+1), True)
+        assert g.longest_road_owner is player0
+        # Cut the road into a 4 and a 3
+        assert g.add_settlement(player1, g.get_point(2,4), True) == Statuses.ALL_GOOD
+        assert player0.longest_road_length == 4
+        assert g.longest_road_owner == None
+
+    def test_loop(self):
+        g = Game()
+        player0 = g.players[0]
+        g.add_settlement(player0, g.get_point(0,0), True)
+        # Go around the top left tile
+        loop = [(0,0), (0,1), (0,2), (1,3), (1,2), (1,1), (0,0)]
+        for p1, p2 in zip(loop, loop[1:]):
+            assert g.add_road(player0, g.get_point(p1), g.get_point(p2), True) == Statuses.ALL_GOOD
+        assert player0.longest_road_length == 6
+        # A tail on the loop can be walked on both ends
+        g.add_road(player0, g.get_point(1,3), g.get_point(1,4), True)
+        assert player0.longest_road_length == 7
+
+    def test_matches_brute_force(self):
+        random.seed(3)
+        for game_num in range(30):
+            g = Game()
+            player0 = g.players[0]
+            player1 = g.players[1]
+            start = random.choice(g.board.get_all_points())
+            g.add_settlement(player0, start, True)
+            # Build all 15 roads, with the other player building settlements in the way
+            while player0.num_roads > 0:
+                roads = player0.get_available_roads()
+                if not roads: break
+                p1, p2 = random.choice(roads)
+                assert g.add_road(player0, p1, p2, True) == Statuses.ALL_GOOD
+                if random.random() < .3:
+                    g.add_settlement(player1, random.choice([p1, p2]), True)
+                assert player0.longest_road_length == brute_force_longest(player0)
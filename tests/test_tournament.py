@@ -0,0 +1,48 @@
+import os, sys
+
+# the tournament scripts are in examples, which is not a package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "examples"))
+
+from tournament import make_tasks, paired_differences, game_seed
+
+NAMES = ["a", "b", "c"]
+
+# returns a result of a duplicate game, with the seats rotated as play_game does
+def result(deal, rotation, winner):
+    return {"deal": deal, "rotation": rotation, "seats": NAMES[rotation:] + NAMES[:rotation], "winner": winner}
+
+class TestTournament:
+
+    def test_make_tasks(self):
+        tasks = make_tasks(NAMES, 2, seed=7, duplicate=True)
+        assert [(game, deal, rotation) for game, deal, seed, rotation in tasks] == [
+            (0, 0, 0), (1, 0, 1), (2, 0, 2), (3, 1, 0), (4, 1, 1), (5, 1, 2)]
+        # every rotation of a deal is played with the same seed, and the deals have different ones
+        seeds = dict(((deal, rotation), seed) for game, deal, seed, rotation in tasks)
+        assert seeds[(0, 0)] == seeds[(0, 1)] == seeds[(0, 2)] == game_seed(7, 0)
+        assert seeds[(1, 0)] == seeds[(1, 1)] == seeds[(1, 2)] == game_seed(7, 1)
+        assert seeds[(0, 0)] != seeds[(1, 0)]
+        # without duplicate each deal is played once, with random seats
+        assert [(game, deal, rotation) for game, deal, seed, rotation in make_tasks(NAMES, 2, seed=7)] == [
+            (0, 0, None), (1, 1, None)]
+
+    def test_paired_differences(self):
+        results = [
+            # a wins two of the first deal's games and b the other
+            result(0, 0, "a"), result(0, 1, "a"), result(0, 2, "b"),
+            # each wins one game of the second deal
+            result(1, 0, "a"), result(1, 1, "b"), result(1, 2, "c")]
+        differences = dict(((name, other), (mean, low, high)) for name, other, mean, low, high in paired_differences(NAMES, results))
+        assert sorted(differences) == [("a", "b"), ("a", "c"), ("b", "c")]
+        # a - b is 1/3 then 0, so the mean is 1/6 with a standard error of 1/6
+        mean, low, high = differences[("a", "b")]
+        assert abs(mean - 1. / 6) < 1e-9
+        assert abs(low - (1. / 6 - 1.96 / 6)) < 1e-9
+        assert abs(high - (1. / 6 + 1.96 / 6)) < 1e-9
+        # a - c is 2/3 then 0
+        mean, low, high = differences[("a", "c")]
+        assert abs(mean - 1. / 3) < 1e-9
+        assert abs(high - mean - 1.96 / 3) < 1e-9
+        # with one deal there is no spread to work out the interval from
+        mean, low, high = paired_differences(NAMES, results[:3])[0][2:]
+        assert abs(mean - 1. / 3) < 1e-9 and low == float("-inf") and high == float("inf")
@@ -0,0 +1,75 @@
+import os, sys
+import math
+import random
+
+# the tournament scripts are in examples, which is not a package
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "examples"))
+
+from tournament_stats import wilson_interval, incomplete_beta, credible_interval, SPRT, TournamentStats
+
+def close(a, b, tolerance=1e-4):
+    return abs(a - b) < tolerance
+
+class TestTournamentStats:
+
+    def test_wilson_interval(self):
+        # the usual reference value, 50 wins out of 100 at 95%
+        low, high = wilson_interval(50, 100)
+        assert close(low, 0.4038) and close(high, 0.5962)
+        low, high = wilson_interval(0, 10)
+        assert low == 0. and close(high, 0.2775)
+        assert wilson_interval(0, 0) == (0., 1.)
+
+    def test_incomplete_beta(self):
+        # I_x(a, 1) = x^a, I_x(1, b) = 1 - (1 - x)^b
+        assert close(incomplete_beta(2, 1, 0.3), 0.09, 1e-10)
+        assert close(incomplete_beta(1, 3, 0.2), 0.488, 1e-10)
+        # I_0.5(2, 3) = 11/16, and the symmetric case is 1/2
+        assert close(incomplete_beta(2, 3, 0.5), 0.6875, 1e-10)
+        assert close(incomplete_beta(10, 10, 0.5), 0.5, 1e-10)
+        # I_x(a, b) = 1 - I_1-x(b, a)
+        assert close(incomplete_beta(50, 70, 0.45), 1 - incomplete_beta(70, 50, 0.55), 1e-10)
+        assert incomplete_beta(3, 4, 0.) == 0. and incomplete_beta(3, 4, 1.) == 1.
+
+    def test_credible_interval(self):
+        # with no games the interval is the middle 95% of the uniform prior
+        low, high = credible_interval(0, 0)
+        assert close(low, 0.025) and close(high, 0.975)
+        # with no wins in 9 games the posterior is Beta(1, 10), whose quantiles are 1 - (1 - q)^(1/10)
+        low, high = credible_interval(0, 9)
+        assert close(low, 1 - 0.975 ** 0.1) and close(high, 1 - 0.025 ** 0.1)
+        # and is symmetric
+        low, high = credible_interval(5, 10)
+        assert close(low + high, 1.)
+
+    def test_sprt_boundaries(self):
+        test = SPRT("a", "b", delta=0.05, alpha=0.05, beta=0.05)
+        assert close(test.upper, math.log(19), 1e-10) and close(test.lower, -math.log(19), 1e-10)
+        # each win moves the log likelihood ratio by log(0.55 / 0.45), so it takes 15 in a row
+        for i in range(14):
+            test.add("a")
+        assert test.decision == None
+        # games won by somebody else do not count
+        test.add("c")
+        test.add(None)
+        assert test.wins == 14 and test.losses == 0
+        test.add("a")
+        assert test.decision == "a"
+        # the decision does not change afterwards
+        for i in range(40):
+            test.add("b")
+        assert test.decision == "a"
+
+    def test_sprt_stops_on_lopsided_games(self):
+        rng = random.Random(1)
+        stats = TournamentStats(["a", "b"])
+        for n in range(2000):
+            winner = "b" if rng.random() < 0.7 else "a"
+            stats.add({"seats": ["a", "b"], "winner": winner})
+            if stats.settled():
+                break
+        assert stats.settled()
+        assert stats.tests[0].decision == "b"
+        assert stats.games < 200
+        assert stats.win_rates["b"].wins + stats.win_rates["a"].wins == stats.games
+        assert len(stats.report()) == 3
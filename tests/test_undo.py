@@ -0,0 +1,150 @@
+from pycatan.game import Game
+from pycatan.game_state import GameState
+from pycatan.card import ResCard, DevCard
+from pycatan.statuses import Statuses
+
+import random
+
+# everything undo should put back
+def get_state(g):
+    return (
+        GameState.from_game(g).to_bytes(),
+        list(g.dev_deck),
+        g.has_ended,
+        g.rng.getstate(),
+        [p.road_network.longest for p in g.players],
+        [sorted(g.board.get_point_roads(p), key=id) for p in g.board.get_all_points()],
+        [len(p.road_network) for p in g.players],
+        [set(p.settlement_points) for p in g.players],
+        [set(p.road_frontier) for p in g.players],
+        [list(p.trade_rates) for p in g.players],
+        [[(b.point, b.type) for b in p.get_buildings()] for p in g.players],
+        dict(g.board.tile_owners),
+        [p.get_VP(include_dev=True) for p in g.players])
+
+# returns a random action on the game, as a function
+def random_action(g, player):
+    other = random.choice([p for p in g.players if p is not player])
+    choice = random.randrange(9)
+    if choice == 0:
+        road = random.choice(player.get_available_roads() or [(None, None)])
+        if road[0] != None:
+            return lambda: g.add_road(player, road[0], road[1])
+    elif choice == 1:
+        points = player.get_available_settlements()
+        if points:
+            point = random.choice(points)
+            return lambda: g.add_settlement(player, point)
+    elif choice == 2:
+        point = random.choice(g.board.get_all_points())
+        return lambda: g.upgrade_settlement(point, player)
+    elif choice == 3:
+        return lambda: g.build_dev(player)
+    elif choice == 4:
+        return lambda: g.trade(player, other, [ResCard.Wood], [ResCard.Ore])
+    elif choice == 5:
+        return lambda: g.trade_to_bank(player, [ResCard.Sheep] * 4, ResCard.Brick)
+    elif choice == 6:
+        tile = random.choice(random.choice(other.get_buildings()).point.tiles)
+        return lambda: g.move_robber(tile, player, other)
+    elif choice == 7:
+        player.dev_counts = [1] * 5
+        tile = random.choice(random.choice(other.get_buildings()).point.tiles)
+        return lambda: g.use_dev_card(player, DevCard.Knight, {"robber_tile": tile, "victim": other})
+    roll = random.randint(2, 12)
+    return lambda: g.add_yield_for_roll(roll)
+
+class TestUndo:
+
+    def test_undo_each_action(self):
+        random.seed(2)
+        g = Game()
+        for p, starts in zip(g.players, [[(0, 0), (3, 2)], [(2, 4), (5, 5)], [(4, 0), (1, 7)]]):
+            for pos in starts:
+                g.add_settlement(p, g.get_point(*pos), True)
+                g.add_road(p, g.get_point(*pos), g.get_point(*pos).connected_points[0], True)
+            p.add_cards([ResCard.Wood, ResCard.Brick, ResCard.Sheep, ResCard.Wheat, ResCard.Ore] * 6)
+        g.mark()
+        for i in range(150):
+            action = random_action(g, g.players[i % 3])
+            before = get_state(g)
+            action()
+            assert g.undo() == Statuses.ALL_GOOD
+            assert get_state(g) == before
+            # does the action again so that the game moves on
+            action()
+        assert len(g.undo_stack) == 150
+
+    def test_undo_to(self):
+        random.seed(5)
+        g = Game()
+        player0 = g.players[0]
+        g.add_settlement(player0, g.get_point(2,0), True)
+        player0.add_cards([ResCard.Wood, ResCard.Brick] * 6)
+        before = get_state(g)
+        mark = g.mark()
+        for i in range(6):
+            g.add_road(player0, g.get_point(2,i), g.get_point(2,i+1))
+        assert g.longest_road_owner is player0
+        g.add_settlement(g.players[1], g.get_point(2,3), True)
+        assert g.undo_to(mark) == Statuses.ALL_GOOD
+        assert get_state(g) == before
+        assert g.longest_road_owner == None
+        assert g.board.roads == []
+        assert g.undo() == Statuses.ERR_INPUT
+
+    def test_undo_to_after_other_actions(self):
+        # the same game, set up the same way
+        def setup():
+            g = Game(seed=3)
+            player0 = g.players[0]
+            g.add_settlement(player0, g.get_point(2,0), True)
+            player0.add_cards([ResCard.Wood, ResCard.Brick] * 8 + [ResCard.Sheep, ResCard.Wheat] + [ResCard.Ore] * 4)
+            return g
+        # what undo_to should put back, which can be compared between games
+        def state(g):
+            return (
+                GameState.from_game(g).to_bytes(),
+                [(p.road_network.longest, len(p.road_network)) for p in g.players],
+                [list(p.trade_rates) for p in g.players],
+                [sorted((a.id, b.id) for a, b in p.get_available_roads()) for p in g.players],
+                g.longest_road_owner)
+        g = setup()
+        player0 = g.players[0]
+        mark = g.mark()
+        # the first action does not save the roads, so undo_to cannot only restore its snapshot
+        assert g.trade_to_bank(player0, [ResCard.Ore] * 4, ResCard.Wood) == Statuses.ALL_GOOD
+        for i in range(5):
+            assert g.add_road(player0, g.get_point(2,i), g.get_point(2,i+1)) == Statuses.ALL_GOOD
+        assert g.add_settlement(player0, g.get_point(2,5)) == Statuses.ALL_GOOD
+        assert g.longest_road_owner is player0
+        assert g.undo_to(mark) == Statuses.ALL_GOOD
+        assert state(g) == state(setup())
+        # the roads can be built again
+        assert g.add_road(player0, g.get_point(2,0), g.get_point(2,1)) == Statuses.ALL_GOOD
+
+    def test_undo_win(self):
+        g = Game(points_to_win=3)
+        player0 = g.players[0]
+        g.add_settlement(player0, g.get_point(0,0), True)
+        g.add_settlement(player0, g.get_point(2,4), True)
+        player0.add_cards([ResCard.Ore] * 3 + [ResCard.Wheat] * 2)
+        g.mark()
+        g.upgrade_settlement(g.get_point(0,0), player0)
+        assert g.has_ended and g.winner is player0
+        g.undo()
+        assert not g.has_ended and g.winner == None
+        assert g.get_point(0,0).building.type.name == "Settlement"
+
+    def test_undo_keeps_global_random(self):
+        random.seed(3)
+        g = Game()
+        victim = g.players[1]
+        g.add_settlement(victim, g.get_point(2,2), True)
+        victim.add_cards([ResCard.Wood, ResCard.Ore, ResCard.Sheep])
+        g.mark()
+        g.move_robber(g.get_point(2,2).tiles[0], g.players[0], victim)
+        # a rollout's own random choices are not replayed after undo
+        first = random.random()
+        g.undo()
+        assert random.random() != first